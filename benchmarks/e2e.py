@@ -0,0 +1,344 @@
+"""
+Run main() against fake drivers with simulated latency & errors.
+
+Usage: python -m benchmarks.e2e [OPTIONS] [-- CLOUDVIEW_OPTIONS]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, cast
+
+from libcloud.common.exceptions import BaseHTTPError
+from libcloud.compute.base import Node, NodeDriver
+from libcloud.compute.types import NodeState
+
+from cloudview import cloudview
+from cloudview.azure import Azure
+from cloudview.ec2 import EC2
+from cloudview.gce import GCE, PAGE_SIZE
+from cloudview.instance import CSP
+from cloudview.openstack import Openstack
+
+LAUNCH_TIME = "2023-04-19T13:04:22.000Z"
+
+
+class Fleet:  # pylint: disable=too-few-public-methods
+    """
+    Simulated API behaviour shared by all fake drivers
+    """
+
+    def __init__(self, latency: float, jitter: float, error_rate: float) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def call(self) -> None:
+        """
+        Simulate an API call
+        """
+        with self._lock:
+            self.calls += 1
+        time.sleep(max(0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if random.random() < self.error_rate:
+            raise BaseHTTPError(500, "Internal Server Error")
+
+
+class FakeDriver:
+    """
+    Driver returning synthetic nodes, one simulated call per page
+    """
+
+    page_size = 1000
+
+    def __init__(self, fleet: Fleet, nodes: list[Node], **extra: Any) -> None:
+        self.fleet = fleet
+        self.nodes = nodes
+        self.connection = self
+        for key, value in extra.items():
+            setattr(self, key, value)
+
+    def _pages(self, count: int) -> None:
+        for _ in range(max(1, -(-count // self.page_size))):
+            self.fleet.call()
+
+    def list_nodes(self, *_: Any, **kwargs: Any) -> list[Node]:
+        """
+        List nodes, of a zone if given
+        """
+        zone = kwargs.get("ex_zone")
+        nodes = [
+            node for node in self.nodes if zone is None or node.extra["zone"] is zone
+        ]
+        self._pages(len(nodes))
+        return nodes
+
+    def list_sizes(self) -> list[SimpleNamespace]:
+        """
+        List Openstack flavors
+        """
+        self.fleet.call()
+        return [SimpleNamespace(id=f"flavor{i}", name=f"m1.size{i}") for i in range(4)]
+
+    def ex_list_zones(self) -> list[SimpleNamespace]:
+        """
+        List GCE zones
+        """
+        self.fleet.call()
+        return getattr(self, "zones", [])
+
+    def request(self, action: str, *_: Any, **kwargs: Any) -> SimpleNamespace:
+        """
+        Serve the GCE aggregated list & the Azure bulk requests
+        """
+        self.fleet.call()
+        if action != "/aggregated/instances":
+            return SimpleNamespace(object={"value": []})
+        start = int(kwargs["params"].get("pageToken", 0))
+        end = start + PAGE_SIZE
+        items = [{"node": node} for node in self.nodes[start:end]]
+        response: dict = {"items": {"zones/all": {"instances": items}}}
+        if end < len(self.nodes):
+            response["nextPageToken"] = str(end)
+        return SimpleNamespace(object=response)
+
+    @staticmethod
+    def _to_node(item: dict) -> Node:
+        return item["node"]
+
+
+def make_node(i: int, extra: dict) -> Node:
+    """
+    Make node
+    """
+    return Node(
+        id=f"id-{i}",
+        name=f"instance-{i}",
+        state=NodeState.RUNNING,
+        public_ips=[],
+        private_ips=[],
+        driver=None,
+        extra=extra,
+    )
+
+
+def make_ec2(cloud: str, fleet: Fleet, count: int, regions: int) -> CSP:
+    """
+    Make EC2 client with nodes spread across regions
+    """
+    client = EC2(cloud=cloud, key="key", secret="secret")
+    active = list(client.regions)[:regions]
+    for index, region in enumerate(client.regions):
+        nodes = [
+            make_node(
+                i,
+                {
+                    "tags": {"Name": f"instance-{i}"},
+                    "instance_type": "t3.micro",
+                    "launch_time": LAUNCH_TIME,
+                    "availability": f"{region}a",
+                },
+            )
+            for i in range(index, count, len(active))
+            if region in active
+        ]
+        # pylint: disable=protected-access
+        client._drivers[region] = cast(NodeDriver, FakeDriver(fleet, nodes))
+    return client
+
+
+def make_gce(
+    cloud: str, fleet: Fleet, count: int, regions: int, aggregated: bool
+) -> CSP:
+    """
+    Make GCE client with nodes spread across zones
+    """
+    client = GCE(cloud=cloud, key="key", user_id="user", project="project")
+    client.aggregated = aggregated
+    zones = [
+        SimpleNamespace(id=str(i), name=f"zone-{i}", status="UP")
+        for i in range(regions)
+    ]
+    nodes = [
+        make_node(
+            i,
+            {
+                "machineType": "zones/zone/machineTypes/e2-small",
+                "creationTimestamp": LAUNCH_TIME,
+                "zone": zones[i % regions],
+            },
+        )
+        for i in range(count)
+    ]
+    # pylint: disable=protected-access
+    client._driver = cast(NodeDriver, FakeDriver(fleet, nodes, zones=zones))
+    return client
+
+
+def make_azure(cloud: str, fleet: Fleet, count: int) -> CSP:
+    """
+    Make Azure client
+    """
+    client = Azure(
+        cloud=cloud,
+        tenant_id="tenant",
+        subscription_id="subscription",
+        key="key",
+        secret="secret",
+    )
+    nodes = [
+        make_node(
+            i,
+            {
+                "properties": {
+                    "vmId": f"id-{i}",
+                    "hardwareProfile": {"vmSize": "Standard_B1ms"},
+                    "timeCreated": LAUNCH_TIME,
+                },
+                "location": "westeurope",
+            },
+        )
+        for i in range(count)
+    ]
+    # pylint: disable=protected-access
+    client._driver = cast(NodeDriver, FakeDriver(fleet, nodes))
+    return client
+
+
+def make_openstack(cloud: str, fleet: Fleet, count: int) -> CSP:
+    """
+    Make Openstack client
+    """
+    client = Openstack(cloud=cloud, key="key")
+    nodes = [
+        make_node(
+            i,
+            {
+                "flavorId": f"flavor{i % 4}",
+                "created": LAUNCH_TIME,
+                "availability_zone": "nova",
+            },
+        )
+        for i in range(count)
+    ]
+    # pylint: disable=protected-access
+    client._driver = cast(NodeDriver, FakeDriver(fleet, nodes))
+    return client
+
+
+def make_clients(opts: argparse.Namespace, fleet: Fleet) -> list[CSP]:
+    """
+    Make clients for each cloud of each provider
+    """
+    clients = []
+    for provider in opts.providers:
+        for i in range(opts.clouds):
+            cloud = f"{provider}{i}"
+            if provider == "ec2":
+                clients.append(make_ec2(cloud, fleet, opts.instances, opts.regions))
+            elif provider == "gce":
+                clients.append(
+                    make_gce(cloud, fleet, opts.instances, opts.regions, not opts.zonal)
+                )
+            elif provider == "azure":
+                clients.append(make_azure(cloud, fleet, opts.instances))
+            elif provider == "openstack":
+                clients.append(make_openstack(cloud, fleet, opts.instances))
+    return clients
+
+
+def run(opts: argparse.Namespace) -> dict[str, float]:
+    """
+    Run main() once and return metrics
+    """
+    fleet = Fleet(opts.latency / 1000, opts.jitter / 1000, opts.error_rate)
+    clients = make_clients(opts, fleet)
+    sys.argv = ["cloudview", *opts.args]
+    cloudview.args = cloudview.parse_args()
+    cloudview.get_clients = lambda **_: clients  # type: ignore
+
+    threads = threading.active_count()
+    done = threading.Event()
+
+    def sample() -> None:
+        nonlocal threads
+        while not done.wait(0.005):
+            threads = max(threads, threading.active_count())
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            cloudview.main()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    return {
+        "instances": opts.instances * opts.clouds * len(opts.providers),
+        "wall time (s)": elapsed,
+        "API calls": fleet.calls,
+        "peak RSS (MB)": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak threads": threads - 1,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line options
+    """
+    argparser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        epilog="options after -- are passed to cloudview",
+    )
+    argparser.add_argument(
+        "-p",
+        "--providers",
+        nargs="+",
+        default=["ec2", "gce", "azure", "openstack"],
+        choices=["ec2", "gce", "azure", "openstack"],
+    )
+    argparser.add_argument("-c", "--clouds", type=int, default=1, help="per provider")
+    argparser.add_argument(
+        "-n", "--instances", type=int, default=1000, help="per cloud"
+    )
+    argparser.add_argument(
+        "-r", "--regions", type=int, default=4, help="EC2 regions & GCE zones in use"
+    )
+    argparser.add_argument("--zonal", action="store_true", help="GCE zone by zone")
+    argparser.add_argument("--latency", type=float, default=100, help="per call (ms)")
+    argparser.add_argument("--jitter", type=float, default=20, help="per call (ms)")
+    argparser.add_argument("--error-rate", type=float, default=0, help="per call")
+    argparser.add_argument("args", nargs="*", help=argparse.SUPPRESS)
+    return argparser.parse_args()
+
+
+def main() -> None:
+    """
+    Main function
+    """
+    opts = parse_args()
+    logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s")
+    with tempfile.TemporaryDirectory() as cache_home:
+        os.environ["XDG_CACHE_HOME"] = cache_home
+        metrics = run(opts)
+    for key, value in metrics.items():
+        print(
+            f"{key:<16} {value:>10.2f}"
+            if isinstance(value, float)
+            else f"{key:<16} {value:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Measure the import time of cloudview, alone and with the module of each
+provider, and check with python -X importtime that the modules of the
+providers & their drivers aren't imported until a provider is used.
+Exits with status 1 on regression.
+
+Usage: python -m benchmarks.import_time [OPTIONS]
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+from cloudview.cloudview import PROVIDERS
+
+IMPORT = "import cloudview.cloudview"
+
+# Modules only imported when a provider is used
+LAZY = re.compile(
+    r"cloudview\.(ec2|gce|azure|openstack)|libcloud\.compute\.drivers|cryptography"
+)
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|( +)(\S+)")
+
+TIMED = """
+import time
+started = time.perf_counter()
+import cloudview.cloudview
+{}
+print(time.perf_counter() - started)
+"""
+
+
+def run(code: str, *options: str) -> subprocess.CompletedProcess:
+    """
+    Run code in a new interpreter
+    """
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+def import_time(provider: str = "") -> float:
+    """
+    Get milliseconds taken to import cloudview and look up provider
+    """
+    lookup = f"cloudview.cloudview.PROVIDERS[{provider!r}]" if provider else ""
+    return float(run(TIMED.format(lookup)).stdout) * 1000
+
+
+def imported_modules() -> list[tuple[int, str]]:
+    """
+    Get the modules imported by cloudview with their self time in microseconds
+    """
+    output = run(IMPORT, "-X", "importtime").stderr
+    modules: list[tuple[int, str]] = []
+    # Modules are printed after those they import
+    nested: list[tuple[int, str]] = []
+    for match in LINE.finditer(output):
+        self_us, indent, name = match.groups()
+        nested.append((int(self_us), name))
+        if len(indent) > 1:
+            continue
+        if name.startswith("cloudview"):
+            modules += nested
+        nested = []
+    return modules
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line options
+    """
+    argparser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    argparser.add_argument("-r", "--runs", type=int, default=10)
+    argparser.add_argument(
+        "-t", "--top", type=int, default=10, help="slowest modules to show"
+    )
+    argparser.add_argument(
+        "--max-ms", type=float, help="fail if importing cloudview takes longer"
+    )
+    return argparser.parse_args()
+
+
+def main() -> None:
+    """
+    Main function
+    """
+    opts = parse_args()
+    print(f"{'import':<12} {'median':>10} {'min':>10}")
+    medians = {}
+    for provider in ("", *PROVIDERS):
+        name = f"+ {provider}" if provider else "cloudview"
+        times = [import_time(provider) for _ in range(opts.runs)]
+        medians[name] = statistics.median(times)
+        print(f"{name:<12} {medians[name]:>8.1f}ms {min(times):>8.1f}ms")
+
+    modules = imported_modules()
+    print(f"\nslowest modules imported by {IMPORT}:")
+    for self_us, module in sorted(modules, reverse=True)[: opts.top]:
+        print(f"{module:<48} {self_us / 1000:>8.1f}ms")
+
+    failed = False
+    eager = sorted({module for _, module in modules if LAZY.match(module)})
+    if eager:
+        print(f"\nFAIL: imported before use: {', '.join(eager)}")
+        failed = True
+    if opts.max_ms is not None and medians["cloudview"] > opts.max_ms:
+        print(f"\nFAIL: {medians['cloudview']:.1f}ms > {opts.max_ms:.1f}ms")
+        failed = True
+    sys.exit(failed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Measure the memory used per instance.
+
+Usage: python -m benchmarks.instance_memory [COUNT]
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+from cloudview.instance import Instance
+
+
+@dataclass(kw_only=True)
+class LegacyInstance:  # pylint: disable=too-many-instance-attributes
+    """
+    Instance as it was before it was made compact
+    """
+
+    provider: str
+    cloud: str
+    name: str
+    id: str
+    size: str
+    time: str | datetime
+    state: str
+    location: str
+    extra: dict
+
+
+def make_payload(count: int) -> str:
+    """
+    Make a JSON payload similar to what EC2 returns
+    """
+    nodes = [
+        {
+            "id": f"i-{i:017x}",
+            "name": f"instance-{i}",
+            "state": "running" if i % 4 else "stopped",
+            "extra": {
+                "instance_type": ("t3.micro", "m5.large", "c5.xlarge")[i % 3],
+                "availability": ("us-east-1a", "us-east-1b", "eu-west-1a")[i % 3],
+                "launch_time": "2023-04-19T13:04:22.000Z",
+                "image_id": f"ami-{i % 50:017x}",
+                "key_name": "default",
+                "private_dns": f"ip-10-0-{i // 256 % 256}-{i % 256}.ec2.internal",
+                "public_dns": f"ec2-3-{i // 256 % 256}-{i % 256}.compute.amazonaws.com",
+                "subnet_id": f"subnet-{i % 8:017x}",
+                "vpc_id": "vpc-0123456789abcdef0",
+                "architecture": "x86_64",
+                "root_device_type": "ebs",
+                "root_device_name": "/dev/xvda",
+                "block_device_mapping": [
+                    {"device_name": "/dev/xvda", "ebs": {"volume_id": f"vol-{i:017x}"}}
+                ],
+                "groups": [{"group_id": "sg-0123456789abcdef0", "group_name": "web"}],
+                "tags": {"Name": f"instance-{i}", "Owner": "team", "Env": "prod"},
+            },
+        }
+        for i in range(count)
+    ]
+    return json.dumps(nodes)
+
+
+def measure(cls: type, payload: str) -> float:
+    """
+    Return the bytes retained per instance of cls built from payload
+    """
+    gc.collect()
+    tracemalloc.start()
+    nodes = json.loads(payload)
+    instances = [
+        cls(
+            provider="ec2",
+            cloud="project",
+            name=node["name"],
+            id=node["id"],
+            size=node["extra"]["instance_type"],
+            time=node["extra"]["launch_time"],
+            state=node["state"],
+            location=node["extra"]["availability"],
+            extra=node["extra"],
+        )
+        for node in nodes
+    ]
+    del nodes
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used / len(instances)
+
+
+def main() -> None:
+    """
+    Main function
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    payload = make_payload(count)
+    legacy = measure(LegacyInstance, payload)
+    Instance.keep_extra = True
+    with_extra = measure(Instance, payload)
+    Instance.keep_extra = False
+    compact = measure(Instance, payload)
+    print(f"{count} instances, bytes per instance:")
+    for name, used in (
+        ("dataclass", legacy),
+        ("slots with extra", with_extra),
+        ("slots without extra", compact),
+    ):
+        print(f"  {name:<20} {used:>8.0f}  {used / legacy:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Run main() with the real drivers against the local mock server to load
+test the HTTP & parsing paths, including connection reuse & retries.
+
+Usage: python -m benchmarks.load [OPTIONS] [-- CLOUDVIEW_OPTIONS]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from libcloud.common.azure_arm import AzureResourceManagementConnection
+from libcloud.compute.drivers.azure_arm import AzureNodeDriver
+from libcloud.compute.providers import get_driver
+from libcloud.compute.types import Provider
+
+from benchmarks.mock_server import MockServer
+from cloudview import cloudview
+from cloudview.azure import Azure
+from cloudview.ec2 import EC2
+from cloudview.gce import GCE
+from cloudview.instance import CSP
+from cloudview.openstack import Openstack
+
+
+class LineCounter:  # pylint: disable=too-few-public-methods
+    """
+    File counting the lines written to it
+    """
+
+    def __init__(self) -> None:
+        self.lines = 0
+
+    def write(self, data: str) -> int:
+        """
+        Write data
+        """
+        self.lines += data.count("\n")
+        return len(data)
+
+
+class MockAzureConnection(AzureResourceManagementConnection):
+    """
+    Azure connection to the port of the mock server as the driver always
+    uses HTTPS on port 443
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        url = urlsplit(kwargs["cloud_environment"]["resourceManagerEndpointUrl"])
+        self.secure = False
+        self.port = url.port
+
+    def get_token_from_credentials(self) -> None:
+        # pylint: disable=attribute-defined-outside-init
+        response = requests.post(
+            f"http://{self.host}:{self.port}/{self.tenant_id}/oauth2/token",
+            data={"client_id": self.user_id, "client_secret": self.key},
+            timeout=self.timeout,
+        ).json()
+        self.access_token = response["access_token"]
+        self.expires_on = response["expires_on"]
+
+
+class MockAzureNodeDriver(AzureNodeDriver):  # pylint: disable=abstract-method
+    """
+    Azure driver using MockAzureConnection
+    """
+
+    connectionCls = MockAzureConnection
+
+
+def make_ec2(cloud: str, server: MockServer) -> CSP:
+    """
+    Make EC2 client with the drivers of all regions pointing to server.
+    Signature version 4 is used as the server gets the region from it
+    """
+    client = EC2(cloud=cloud, key=f"AKID{cloud.upper()}", secret="secret")
+    _, port = server.server_address[:2]
+    for region in client.regions:
+        # pylint: disable=protected-access
+        client._drivers[region] = get_driver(Provider.EC2)(
+            *client._key_secret,
+            region=region,
+            host="127.0.0.1",
+            port=port,
+            secure=False,
+            signature_version="4",
+        )
+    return client
+
+
+def make_gce(cloud: str, server: MockServer, cache_home: str, aggregated: bool) -> CSP:
+    """
+    Make GCE client authenticated with a token cached to disk and a driver
+    pointing to server
+    """
+    credential_file = os.path.join(cache_home, f"gce-token-{cloud}")
+    with open(credential_file, "w", encoding="utf-8") as file:
+        json.dump({"access_token": "mock", "expire_time": "2100-01-01T00:00:00Z"}, file)
+    client = GCE(
+        cloud=cloud,
+        user_id="mock.apps.googleusercontent.com",
+        key="secret",
+        project=cloud,
+        auth_type="IA",
+        credential_file=credential_file,
+        aggregated=aggregated,
+    )
+    # The driver passes the host & port to the connection as other arguments
+    connection = client.driver.connection
+    connection.host, connection.port = server.server_address[:2]
+    connection.secure = False
+    connection.connect()
+    return client
+
+
+def make_azure(cloud: str, server: MockServer) -> CSP:
+    """
+    Make Azure client with a driver pointing to server
+    """
+    client = Azure(
+        cloud=cloud,
+        tenant_id=cloud,
+        subscription_id=cloud,
+        key="key",
+        secret="secret",
+    )
+    # pylint: disable=protected-access
+    driver = MockAzureNodeDriver(
+        *client._creds,
+        cloud_environment={
+            "resourceManagerEndpointUrl": server.url,
+            "activeDirectoryEndpointUrl": server.url,
+            "activeDirectoryResourceId": server.url,
+            "storageEndpointSuffix": "mock",
+        },
+        **client.options,
+    )
+    client._driver = driver
+    return client
+
+
+def make_openstack(cloud: str, server: MockServer) -> CSP:
+    """
+    Make Openstack client with a token
+    """
+    return Openstack(
+        cloud=cloud,
+        key="user",
+        secret="password",
+        ex_force_auth_url=server.url,
+        ex_force_base_url=f"{server.url}/v2.1",
+        ex_force_auth_token="mock",
+        ex_tenant_name="mock",
+        ex_domain_name="Default",
+        api_version="2.2",
+    )
+
+
+def make_clients(
+    opts: argparse.Namespace, server: MockServer, cache_home: str
+) -> list[CSP]:
+    """
+    Make clients for each cloud of each provider
+    """
+    clients = []
+    for provider in opts.providers:
+        for i in range(opts.clouds):
+            cloud = f"{provider}{i}"
+            if provider == "ec2":
+                clients.append(make_ec2(cloud, server))
+            elif provider == "gce":
+                clients.append(make_gce(cloud, server, cache_home, not opts.zonal))
+            elif provider == "azure":
+                clients.append(make_azure(cloud, server))
+            elif provider == "openstack":
+                clients.append(make_openstack(cloud, server))
+    return clients
+
+
+def run(opts: argparse.Namespace, cache_home: str) -> dict[str, Any]:
+    """
+    Run main() once against the mock server and return metrics
+    """
+    with MockServer(
+        instances=opts.instances,
+        regions=opts.regions,
+        page_size=opts.page_size,
+        latency=opts.latency / 1000,
+        throttle_rate=opts.throttle_rate,
+    ) as server:
+        clients = make_clients(opts, server, cache_home)
+        sys.argv = ["cloudview", "-o", "ndjson", *opts.args]
+        cloudview.args = cloudview.parse_args()
+        cloudview.get_clients = lambda **_: clients  # type: ignore
+        output = LineCounter()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):  # type: ignore
+            cloudview.main()
+        elapsed = time.perf_counter() - start
+        stats = dict(server.stats)
+    return {
+        "instances": output.lines,
+        "wall time (s)": elapsed,
+        "requests": stats.get("requests", 0),
+        "throttled": stats.get("throttled", 0),
+        "connections": stats.get("connections", 0),
+        "received (MB)": stats.get("bytes", 0) / 1e6,
+        "errors": sum(client.errors for client in clients),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line options
+    """
+    argparser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        epilog="options after -- are passed to cloudview",
+    )
+    argparser.add_argument(
+        "-p",
+        "--providers",
+        nargs="+",
+        default=["ec2", "gce", "azure", "openstack"],
+        choices=["ec2", "gce", "azure", "openstack"],
+    )
+    argparser.add_argument("-c", "--clouds", type=int, default=1, help="per provider")
+    argparser.add_argument(
+        "-n", "--instances", type=int, default=1000, help="per cloud"
+    )
+    argparser.add_argument(
+        "-r", "--regions", type=int, default=4, help="EC2 regions & GCE zones in use"
+    )
+    argparser.add_argument("--page-size", type=int, default=500)
+    argparser.add_argument("--zonal", action="store_true", help="GCE zone by zone")
+    argparser.add_argument("--latency", type=float, default=0, help="per call (ms)")
+    argparser.add_argument("--throttle-rate", type=float, default=0, help="per call")
+    argparser.add_argument("args", nargs="*", help=argparse.SUPPRESS)
+    return argparser.parse_args()
+
+
+def main() -> None:
+    """
+    Main function
+    """
+    opts = parse_args()
+    logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s")
+    with tempfile.TemporaryDirectory() as cache_home:
+        os.environ["XDG_CACHE_HOME"] = cache_home
+        metrics = run(opts, cache_home)
+    for key, value in metrics.items():
+        print(
+            f"{key:<16} {value:>10.2f}"
+            if isinstance(value, float)
+            else f"{key:<16} {value:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,710 @@
+"""
+Local HTTP server emulating the subset of the EC2, GCE, Azure & Nova APIs
+used by cloudview, with fleets of synthetic instances, pagination and
+throttling.
+
+Usage: python -m benchmarks.mock_server [OPTIONS]
+"""
+
+import argparse
+import fnmatch
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Sequence
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlsplit
+
+from libcloud.compute.drivers.ec2 import NAMESPACE as EC2_NAMESPACE
+
+START = datetime(2023, 4, 19, 13, 4, 22, tzinfo=timezone.utc)
+
+EC2_REGIONS = ("us-east-1", "us-west-2", "eu-west-1", "eu-central-1", "ap-south-1")
+
+# Running, stopped & terminated states of each API
+STATES = {
+    "ec2": ("running", "stopped", "terminated"),
+    "gce": ("RUNNING", "TERMINATED", "STOPPING"),
+    "azure": (
+        "PowerState/running",
+        "PowerState/deallocated",
+        "ProvisioningState/deleting",
+    ),
+    "nova": ("ACTIVE", "SHUTOFF", "DELETED"),
+}
+
+FLAVORS = ("m1.tiny", "m1.small", "m1.medium", "m1.large")
+
+GCE_BASE = "https://www.googleapis.com/compute/v1/projects"
+
+AZURE_BASE = "/subscriptions/{}/resourceGroups/mock/providers"
+
+
+def state(api: str, index: int) -> str:
+    """
+    Get state of instance: every 10th is stopped & every 50th terminated
+    """
+    if index % 50 == 49:
+        return STATES[api][2]
+    return STATES[api][index % 10 == 9]
+
+
+def created(index: int) -> datetime:
+    """
+    Get creation time of instance
+    """
+    return START - timedelta(minutes=index)
+
+
+def launch_time(index: int) -> str:
+    """
+    Get creation time of instance as in EC2
+    """
+    return created(index).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def creation_timestamp(index: int) -> str:
+    """
+    Get creation time of instance as in GCE
+    """
+    date = created(index).astimezone(timezone(timedelta(hours=-7)))
+    return date.isoformat(timespec="milliseconds")
+
+
+TIMESTAMPS = {"ec2": launch_time, "gce": creation_timestamp}
+
+
+def select(
+    api: str,
+    indexes: Sequence[int],
+    status: str | None,
+    name: str | None,
+    timestamp: str | None = None,
+) -> Sequence[int]:
+    """
+    Get indexes of instances whose state & creation timestamp fully match
+    the status & timestamp regexes and whose name matches the name regex
+    """
+    if status is None and name is None and timestamp is None:
+        return indexes
+    status_re = re.compile(status or ".*")
+    name_re = re.compile(name or "")
+    timestamp_re = re.compile(timestamp or ".*")
+    return [
+        index
+        for index in indexes
+        if status_re.fullmatch(state(api, index))
+        and name_re.search(f"instance-{index}")
+        and (timestamp is None or timestamp_re.fullmatch(TIMESTAMPS[api](index)))
+    ]
+
+
+def address(index: int) -> str:
+    """
+    Get private IP address of instance
+    """
+    return f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+
+
+def ec2_instance(index: int, zone: str) -> str:
+    """
+    Get instance as in EC2 DescribeInstances
+    """
+    return f"""<item>
+ <reservationId>r-{index:017x}</reservationId>
+ <ownerId>123456789012</ownerId>
+ <instancesSet><item>
+  <instanceId>i-{index:017x}</instanceId>
+  <instanceState><name>{state("ec2", index)}</name></instanceState>
+  <instanceType>t3.micro</instanceType>
+  <launchTime>{launch_time(index)}</launchTime>
+  <placement><availabilityZone>{zone}</availabilityZone></placement>
+  <privateIpAddress>{address(index)}</privateIpAddress>
+  <tagSet><item><key>Name</key><value>instance-{index}</value></item></tagSet>
+ </item></instancesSet>
+</item>"""
+
+
+def gce_instance(index: int, project: str, zone: str) -> dict:
+    """
+    Get instance as in GCE instances list
+    """
+    zone_url = f"{GCE_BASE}/{project}/zones/{zone}"
+    return {
+        "kind": "compute#instance",
+        "id": str(index),
+        "name": f"instance-{index}",
+        "zone": zone_url,
+        "machineType": f"{zone_url}/machineTypes/e2-small",
+        "status": state("gce", index),
+        "creationTimestamp": creation_timestamp(index),
+        "tags": {"fingerprint": "42WmSpB8rSM="},
+        "networkInterfaces": [{"networkIP": address(index)}],
+        "disks": [],
+        "selfLink": f"{zone_url}/instances/instance-{index}",
+    }
+
+
+def azure_vm(index: int, subscription: str) -> dict:
+    """
+    Get VM as in Azure virtualMachines list
+    """
+    base = AZURE_BASE.format(subscription)
+    return {
+        "id": f"{base}/Microsoft.Compute/virtualMachines/instance-{index}",
+        "name": f"instance-{index}",
+        "location": "westeurope",
+        "properties": {
+            "vmId": f"00000000-0000-0000-0000-{index:012d}",
+            "hardwareProfile": {"vmSize": "Standard_B1ms"},
+            "provisioningState": "Succeeded",
+            "timeCreated": created(index).isoformat(timespec="microseconds"),
+            "networkProfile": {
+                "networkInterfaces": [
+                    {"id": f"{base}/Microsoft.Network/networkInterfaces/nic-{index}"}
+                ]
+            },
+        },
+    }
+
+
+def azure_status(index: int, subscription: str) -> dict:
+    """
+    Get VM as in Azure virtualMachines list with statusOnly
+    """
+    base = AZURE_BASE.format(subscription)
+    return {
+        "id": f"{base}/Microsoft.Compute/virtualMachines/instance-{index}",
+        "properties": {
+            "instanceView": {
+                "statuses": [
+                    {"code": "ProvisioningState/succeeded"},
+                    {"code": state("azure", index)},
+                ]
+            }
+        },
+    }
+
+
+def azure_nic(index: int, subscription: str) -> dict:
+    """
+    Get NIC as in Azure networkInterfaces list
+    """
+    base = AZURE_BASE.format(subscription)
+    ip_id = f"{base}/Microsoft.Network/publicIPAddresses/ip-{index}"
+    return {
+        "id": f"{base}/Microsoft.Network/networkInterfaces/nic-{index}",
+        "properties": {
+            "ipConfigurations": [
+                {
+                    "properties": {
+                        "privateIPAddress": address(index),
+                        "publicIPAddress": {"id": ip_id},
+                    }
+                }
+            ]
+        },
+    }
+
+
+def azure_ip(index: int, subscription: str) -> dict:
+    """
+    Get public IP address as in Azure publicIPAddresses list
+    """
+    base = AZURE_BASE.format(subscription)
+    return {
+        "id": f"{base}/Microsoft.Network/publicIPAddresses/ip-{index}",
+        "name": f"ip-{index}",
+        "properties": {"ipAddress": f"192.0.2.{index % 256}"},
+    }
+
+
+def nova_server(index: int, url: str) -> dict:
+    """
+    Get server as in Nova servers detail
+    """
+    server_id = f"00000000-0000-0000-0000-{index:012d}"
+    date = created(index).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {
+        "id": server_id,
+        "name": f"instance-{index}",
+        "status": state("nova", index),
+        "addresses": {"private": [{"addr": address(index), "version": 4}]},
+        "hostId": "",
+        "tenant_id": "mock",
+        "user_id": "mock",
+        "flavor": {"id": f"flavor{index % len(FLAVORS)}"},
+        "image": {"id": "image"},
+        "links": [{"rel": "self", "href": f"{url}/v2.1/servers/{server_id}"}],
+        "metadata": {},
+        "created": date,
+        "updated": date,
+        "OS-EXT-AZ:availability_zone": "nova",
+    }
+
+
+def nova_flavor(index: int) -> dict:
+    """
+    Get flavor as in Nova flavors detail
+    """
+    return {
+        "id": f"flavor{index}",
+        "name": FLAVORS[index],
+        "ram": 512 << index,
+        "disk": 10 << index,
+        "vcpus": 1 << index,
+        "swap": "",
+    }
+
+
+class MockServer(ThreadingHTTPServer):  # pylint: disable=too-many-instance-attributes
+    """
+    Server with a fleet of instances per API spread across EC2 regions and
+    GCE zones.  Requests take latency seconds and a throttle_rate fraction
+    of them get the throttling response of each API
+    """
+
+    daemon_threads = True
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        address_port: tuple[str, int] = ("127.0.0.1", 0),
+        *,
+        instances: int = 1000,
+        regions: int = 4,
+        page_size: int = 500,
+        latency: float = 0,
+        throttle_rate: float = 0,
+    ) -> None:
+        super().__init__(address_port, Handler)
+        self.instances = instances
+        self.regions = EC2_REGIONS[: max(1, min(regions, len(EC2_REGIONS)))]
+        self.zones = [f"zone-{i}" for i in range(max(1, regions))]
+        self.page_size = page_size
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.stats: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """
+        Get URL of server
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def count(self, *keys: str, value: int = 1) -> None:
+        """
+        Update stats
+        """
+        with self._lock:
+            for key in keys:
+                self.stats[key] += value
+
+    def page(
+        self, indexes: Sequence[int], offset: int, limit: int
+    ) -> tuple[Sequence[int], int | None]:
+        """
+        Get page of indexes and the offset of the next page if any
+        """
+        limit = min(limit or self.page_size, self.page_size)
+        end = offset + limit
+        return indexes[offset:end], end if end < len(indexes) else None
+
+    def __enter__(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-server")
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Request handler dispatching to the emulated APIs
+    """
+
+    protocol_version = "HTTP/1.1"
+    server: MockServer
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, *_: Any) -> None:  # pylint: disable=arguments-differ
+        pass
+
+    def send(
+        self, status: int, body: str | dict, headers: dict[str, str] | None = None
+    ) -> None:
+        """
+        Send response
+        """
+        if isinstance(body, dict):
+            content_type = "application/json"
+            body = json.dumps(body)
+        else:
+            content_type = "text/xml"
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.count("bytes", value=len(data))
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Handle GET
+        """
+        self.handle_request()
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """
+        Handle POST
+        """
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8")
+        self.handle_request(dict(parse_qsl(body)))
+
+    def handle_request(self, form: dict[str, str] | None = None) -> None:
+        """
+        Dispatch request to API
+        """
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query)) | (form or {})
+        handler: Callable[[str, dict[str, str]], None]
+        if parts.path.endswith("/oauth2/token"):
+            api, handler = "auth", self.azure_token
+        elif parts.path.startswith("/compute/"):
+            api, handler = "gce", self.gce
+        elif parts.path.startswith("/subscriptions/"):
+            api, handler = "azure", self.azure
+        elif parts.path.startswith("/v2.1/"):
+            api, handler = "nova", self.nova
+        elif "Action" in params:
+            api, handler = "ec2", self.ec2
+        else:
+            self.send(404, {"error": {"code": 404, "message": "Not Found"}})
+            return
+        self.server.count("requests", api)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if api != "auth" and random.random() < self.server.throttle_rate:
+            self.server.count("throttled")
+            self.throttle(api)
+            return
+        handler(parts.path, params)
+
+    def throttle(self, api: str) -> None:
+        """
+        Send throttling response of api
+        """
+        if api == "ec2":
+            self.send(
+                503,
+                "<Response><Errors><Error><Code>RequestLimitExceeded</Code>"
+                "<Message>Request limit exceeded.</Message></Error></Errors>"
+                "<RequestID>mock</RequestID></Response>",
+            )
+        elif api == "gce":
+            self.send(
+                429,
+                {
+                    "error": {
+                        "code": 429,
+                        "message": "Rate Limit Exceeded",
+                        "errors": [{"reason": "rateLimitExceeded"}],
+                    }
+                },
+            )
+        elif api == "azure":
+            self.send(
+                429,
+                {"error": {"code": "TooManyRequests", "message": "Throttled"}},
+                {"Retry-After": "1"},
+            )
+        else:
+            self.send(
+                429,
+                {"overLimit": {"code": 429, "message": "Rate limit exceeded"}},
+                {"Retry-After": "1"},
+            )
+
+    def ec2(self, _: str, params: dict[str, str]) -> None:
+        """
+        Handle EC2 DescribeInstances & DescribeAddresses of the region
+        in the credential scope of the signature
+        """
+        if params["Action"] == "DescribeAddresses":
+            self.send(
+                200,
+                f'<DescribeAddressesResponse xmlns="{EC2_NAMESPACE}">'
+                "<requestId>mock</requestId><addressesSet/>"
+                "</DescribeAddressesResponse>",
+            )
+            return
+        if params["Action"] != "DescribeInstances":
+            self.send(400, "<Response><Errors><Error><Code>InvalidAction</Code>")
+            return
+        match = re.search(
+            r"Credential=[^/]+/\d+/([^/]+)/", self.headers["Authorization"]
+        )
+        region = match.group(1) if match else ""
+        regions = self.server.regions
+        indexes: Sequence[int] = (
+            range(regions.index(region), self.server.instances, len(regions))
+            if region in regions
+            else range(0)
+        )
+        filters: dict[str, list[str]] = {}
+        for key, value in params.items():
+            match = re.fullmatch(r"(Filter\.\d+)\.Value\.\d+", key)
+            if match:
+                filters.setdefault(params[f"{match.group(1)}.Name"], []).append(value)
+        states = filters.get("instance-state-name")
+        names = filters.get("tag:Name")
+        times = filters.get("launch-time")
+        indexes = select(
+            "ec2",
+            indexes,
+            "|".join(map(re.escape, states)) if states else None,
+            (
+                "|".join(f"^{fnmatch.translate(name)}" for name in names)
+                if names
+                else None
+            ),
+            "|".join(map(fnmatch.translate, times)) if times else None,
+        )
+        page, offset = self.server.page(
+            indexes,
+            int(params.get("NextToken", 0)),
+            int(params.get("MaxResults", len(indexes))),
+        )
+        items = "".join(
+            ec2_instance(index, f"{region}{'abc'[index % 3]}") for index in page
+        )
+        token = f"<nextToken>{offset}</nextToken>" if offset else ""
+        self.send(
+            200,
+            f'<DescribeInstancesResponse xmlns="{EC2_NAMESPACE}">'
+            f"<requestId>mock</requestId><reservationSet>{items}</reservationSet>"
+            f"{token}</DescribeInstancesResponse>",
+        )
+
+    def gce(self, path: str, params: dict[str, str]) -> None:
+        """
+        Handle GCE zones, instances & aggregatedList
+        """
+        parts = path.split("/")
+        project, resource = parts[4], "/".join(parts[5:])
+        response: dict[str, Any]
+        if resource == "zones":
+            zones = self.server.zones
+            response = {"items": [self.gce_zone(project, zone) for zone in zones]}
+        elif resource.startswith("zones/") and len(parts) == 7:
+            response = self.gce_zone(project, parts[6])
+        elif resource.startswith("zones/") and resource.endswith("/instances"):
+            response = self.gce_instances(project, parts[6], params)
+        elif resource == "aggregated/instances":
+            response = self.gce_instances(project, "", params)
+        elif resource == "aggregated/disks":
+            response = {"items": {}}
+        else:
+            self.send(404, {"error": {"code": 404, "message": f"{path} not found"}})
+            return
+        self.send(200, response)
+
+    def gce_instances(self, project: str, zone: str, params: dict[str, str]) -> dict:
+        """
+        Get page of instances of zone or of all zones aggregated
+        """
+        zones = self.server.zones
+        indexes: Sequence[int]
+        if not zone:
+            indexes = range(self.server.instances)
+        elif zone in zones:
+            indexes = range(zones.index(zone), self.server.instances, len(zones))
+        else:
+            indexes = range(0)
+        filters = dict(re.findall(r'\((\w+) eq "([^"]*)"\)', params.get("filter", "")))
+        name = filters.get("name")
+        indexes = select(
+            "gce",
+            indexes,
+            filters.get("status"),
+            f"^(?:{name})$" if name else None,
+            filters.get("creationTimestamp"),
+        )
+        page, offset = self.server.page(
+            indexes, int(params.get("pageToken", 0)), int(params.get("maxResults", 0))
+        )
+        response: dict[str, Any]
+        if zone:
+            response = {"items": [gce_instance(index, project, zone) for index in page]}
+        else:
+            items: dict[str, dict[str, list]] = {}
+            for index in page:
+                name = zones[index % len(zones)]
+                scoped = items.setdefault(f"zones/{name}", {"instances": []})
+                scoped["instances"].append(gce_instance(index, project, name))
+            response = {"items": items}
+        if offset:
+            response["nextPageToken"] = str(offset)
+        return response
+
+    @staticmethod
+    def gce_zone(project: str, zone: str) -> dict:
+        """
+        Get zone as in GCE zones list
+        """
+        return {
+            "kind": "compute#zone",
+            "id": zone.rsplit("-", 1)[-1],
+            "name": zone,
+            "status": "UP",
+            "region": f"{GCE_BASE}/{project}/regions/region",
+            "selfLink": f"{GCE_BASE}/{project}/zones/{zone}",
+        }
+
+    def azure_token(self, path: str, _: dict[str, str]) -> None:
+        """
+        Handle Azure AD login
+        """
+        self.send(
+            200,
+            {
+                "token_type": "Bearer",
+                "access_token": f"mock-{path.split('/')[1]}",
+                "expires_on": str(int(time.time()) + 3600),
+            },
+        )
+
+    def azure(self, path: str, params: dict[str, str]) -> None:
+        """
+        Handle Azure virtualMachines, networkInterfaces & publicIPAddresses
+        """
+        subscription = path.split("/")[2]
+        page, offset = self.server.page(
+            range(self.server.instances), int(params.get("$skiptoken", 0)), 0
+        )
+        if path.endswith("/Microsoft.Compute/virtualMachines"):
+            if params.get("statusOnly") == "true":
+                values = [azure_status(i, subscription) for i in page]
+            else:
+                values = [azure_vm(i, subscription) for i in page]
+        elif path.endswith("/Microsoft.Network/networkInterfaces"):
+            values = [azure_nic(i, subscription) for i in page]
+        elif path.endswith("/Microsoft.Network/publicIPAddresses"):
+            values = [azure_ip(i, subscription) for i in page]
+        else:
+            self.send(404, {"error": {"code": "NotFound", "message": path}})
+            return
+        response: dict[str, Any] = {"value": values}
+        if offset:
+            query = urlencode(params | {"$skiptoken": offset})
+            response["nextLink"] = f"https://management.azure.com{path}?{query}"
+        self.send(
+            200, response, {"x-ms-ratelimit-remaining-subscription-reads": "11999"}
+        )
+
+    def nova(self, path: str, params: dict[str, str]) -> None:
+        """
+        Handle Nova servers & flavors
+        """
+        if path == "/v2.1/servers/detail":
+            statuses = parse_qs(urlsplit(self.path).query).get("status")
+            indexes = select(
+                "nova",
+                range(self.server.instances),
+                "|".join(map(re.escape, statuses)) if statuses else None,
+                params.get("name"),
+            )
+            offset = (
+                indexes.index(int(params["marker"].rsplit("-", 1)[-1])) + 1
+                if "marker" in params
+                else 0
+            )
+            page, next_offset = self.server.page(
+                indexes, offset, int(params.get("limit", 0))
+            )
+            servers = [nova_server(index, self.server.url) for index in page]
+            response: dict[str, Any] = {"servers": servers}
+            if next_offset:
+                query = urlencode({"limit": len(page), "marker": servers[-1]["id"]})
+                response["servers_links"] = [
+                    {"rel": "next", "href": f"{self.server.url}{path}?{query}"}
+                ]
+            self.send(200, response)
+        elif path == "/v2.1/flavors/detail":
+            self.send(200, {"flavors": [nova_flavor(i) for i in range(len(FLAVORS))]})
+        elif path.startswith("/v2.1/flavors/flavor"):
+            index = int(path.rsplit("flavor", 1)[-1])
+            if index < len(FLAVORS):
+                self.send(200, {"flavor": nova_flavor(index)})
+            else:
+                self.send(404, {"itemNotFound": {"code": 404, "message": "Not found"}})
+        else:
+            self.send(404, {"itemNotFound": {"code": 404, "message": path}})
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line options
+    """
+    argparser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    argparser.add_argument("--host", default="127.0.0.1")
+    argparser.add_argument("--port", type=int, default=8080)
+    argparser.add_argument(
+        "-n", "--instances", type=int, default=1000, help="per cloud"
+    )
+    argparser.add_argument(
+        "-r", "--regions", type=int, default=4, help="EC2 regions & GCE zones in use"
+    )
+    argparser.add_argument("--page-size", type=int, default=500)
+    argparser.add_argument("--latency", type=float, default=0, help="per call (ms)")
+    argparser.add_argument("--throttle-rate", type=float, default=0, help="per call")
+    return argparser.parse_args()
+
+
+def main() -> None:
+    """
+    Main function
+    """
+    opts = parse_args()
+    server = MockServer(
+        (opts.host, opts.port),
+        instances=opts.instances,
+        regions=opts.regions,
+        page_size=opts.page_size,
+        latency=opts.latency / 1000,
+        throttle_rate=opts.throttle_rate,
+    )
+    print(f"Serving on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    for key, value in sorted(server.stats.items()):
+        print(f"{key:<16} {value:>10}")
+
+
+if __name__ == "__main__":
+    main()
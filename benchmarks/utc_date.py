@@ -0,0 +1,39 @@
+"""
+Measure timestamp parsing with the formats used by each provider.
+
+Usage: python -m benchmarks.utc_date [COUNT]
+"""
+
+import sys
+import timeit
+from functools import partial
+
+from dateutil import parser
+
+from cloudview.utils import utc_date
+
+DATES = {
+    "ec2 launch_time": "2023-04-19T13:04:22.000Z",
+    "gce creationTimestamp": "2023-08-27T04:34:57.302-07:00",
+    "azure timeCreated": "2023-05-02T14:17:18.7574445+00:00",
+    "openstack created": "2023-03-23T15:18:01Z",
+}
+
+
+def main() -> None:
+    """
+    Main function
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"{'format':<24} {'dateutil':>10} {'utc_date':>10}  speedup")
+    for name, date in DATES.items():
+        slow = timeit.timeit(partial(parser.parse, date), number=count)
+        fast = timeit.timeit(partial(utc_date, date), number=count)
+        print(
+            f"{name:<24} {slow / count * 1e6:>8.2f}us {fast / count * 1e6:>8.2f}us"
+            f"  {slow / fast:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
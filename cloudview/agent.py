@@ -0,0 +1,192 @@
+"""
+Per-user agent keeping the clients, with their drivers & tokens, and their
+instances warm for the CLI, which talks to it over a Unix socket
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from cloudview.cache import dump_instance, load_instance
+from cloudview.instance import Instance
+from cloudview.inventory import Inventory
+from cloudview.utils import cache_dir
+
+# Seconds to wait for the agent to accept a connection
+TIMEOUT = 1.0
+
+
+def socket_path() -> str:
+    """
+    Get path of the socket of the agent
+    """
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "cloudview.sock")
+    return os.path.join(cache_dir(), "agent.sock")
+
+
+class Agent:
+    """
+    Serve the instances of the inventory to the CLI
+    """
+
+    def __init__(
+        self, inventory: Inventory, config: str | None, providers: list[str]
+    ) -> None:
+        self.inventory = inventory
+        self.config = config
+        self.providers = providers
+
+    def check(self, request: dict[str, Any]) -> None:
+        """
+        Raise ValueError if the request can't be served
+        """
+        if request.get("config") != self.config:
+            raise ValueError(f"Agent uses another config: {self.config}")
+        if not set(request.get("providers", ())) <= set(self.providers):
+            raise ValueError(f"Agent uses other providers: {self.providers}")
+        if request.get("extra") and not Instance.keep_extra:
+            raise ValueError("Agent doesn't keep extra")
+
+    def results(self, request: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        """
+        Yield the instances of every client followed by its errors, refreshing
+        first if the instances are older than max_age seconds or requested
+        """
+        max_age = request.get("max_age") or self.inventory.interval
+        if request.get("refresh") or time.time() - self.inventory.refreshed > max_age:
+            self.inventory.refresh()
+        providers = request.get("providers")
+        for client, fetch in self.inventory.snapshot().items():
+            if providers and client.provider not in providers:
+                continue
+            key = f"{client.provider}/{client.cloud}"
+            for instance in fetch.instances:
+                yield {"client": key, "instance": dump_instance(instance)}
+            yield {"client": key, "errors": fetch.errors}
+
+
+class AgentHandler(socketserver.StreamRequestHandler):
+    """
+    Handle a request as a JSON line, replying with JSON lines
+    """
+
+    server: AgentServer
+
+    def send(self, item: dict[str, Any]) -> None:
+        """
+        Send item as a JSON line
+        """
+        self.wfile.write(json.dumps(item, default=str).encode("utf-8") + b"\n")
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            self.server.agent.check(request)
+        except ValueError as exc:
+            self.send({"error": f"{exc}"})
+            return
+        self.send({"ok": True})
+        try:
+            for item in self.server.agent.results(request):
+                self.send(item)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logging.error("Agent failed to serve request: %s", exc)
+            self.send({"error": f"{exc}"})
+            return
+        self.send({"end": True})
+
+
+class AgentServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Server of the agent on a Unix socket only accessible by the user
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, agent: Agent) -> None:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        if os.path.exists(path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                if not sock.connect_ex(path):
+                    raise RuntimeError(f"Agent already running on {path}")
+            os.unlink(path)
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, AgentHandler)
+        finally:
+            os.umask(umask)
+        self.agent = agent
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)  # type: ignore
+        except FileNotFoundError:
+            pass
+
+
+def _receive(file: Any) -> list[tuple[str, Instance | None]]:
+    """
+    Receive the results of the agent, raising ValueError if it failed
+    """
+    results: list[tuple[str, Instance | None]] = []
+    errors: dict[str, int] = {}
+    for line in file:
+        item = json.loads(line)
+        if "instance" in item:
+            results.append((item["client"], load_instance(item["instance"])))
+        elif "client" in item:
+            if item["errors"]:
+                errors[item["client"]] = item["errors"]
+            results.append((item["client"], None))
+        elif "error" in item:
+            raise ValueError(item["error"])
+        elif item.get("end"):
+            for client, count in errors.items():
+                logging.error("%s: %d errors in the agent", client, count)
+            return results
+    raise ValueError("Agent closed the connection")
+
+
+def query_agent(
+    request: dict[str, Any], path: str | None = None
+) -> Iterator[tuple[str, Instance | None]] | None:
+    """
+    Yield (client, instance) tuples from the agent and (client, None) when
+    a client is done.  Return None if the agent isn't running or can't serve
+    the request.  The whole reply is received first so the caller can still
+    fetch the instances itself if the agent fails midway
+    """
+    path = path or socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(TIMEOUT)
+        sock.connect(path)
+        sock.settimeout(None)
+        file = sock.makefile("rwb")
+        file.write(json.dumps(request).encode("utf-8") + b"\n")
+        file.flush()
+        reply = json.loads(file.readline() or "{}")
+    except (OSError, ValueError) as exc:
+        logging.debug("Not using agent on %s: %s", path, exc)
+        sock.close()
+        return None
+    with sock, file:
+        if not reply.get("ok"):
+            logging.info("Not using agent on %s: %s", path, reply.get("error"))
+            return None
+        try:
+            results = _receive(file)
+        except (OSError, ValueError) as exc:
+            logging.warning("Not using agent on %s: %s", path, exc)
+            return None
+    return iter(results)
@@ -0,0 +1,176 @@
+"""
+HTTP query API of the inventory
+"""
+
+from __future__ import annotations
+
+import io
+import threading
+import time
+from operator import attrgetter
+from urllib.parse import parse_qs, urlsplit
+
+from cloudview.instance import Instance
+from cloudview.inventory import Inventory
+from cloudview.output import TIME_FORMAT, WRITERS
+from cloudview.query import INDEXED, Index
+from cloudview.server import Handler, Server
+
+# Default port for --serve-api
+PORT = 9878
+
+# Seconds after a refresh during which the refresh parameter is ignored, so
+# clients can't make the server fetch from every cloud on each request
+MIN_REFRESH_INTERVAL = 60
+
+CONTENT_TYPES = {
+    "table": "text/plain; charset=utf-8",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+DEFAULT_FIELDS = "provider,name,size,state,time,location"
+
+FIELDS = "provider,cloud,name,id,size,state,time,location,extra".split(",")
+
+PARAMS = (
+    *INDEXED,
+    "name",
+    "older_than",
+    "newer_than",
+    "sort",
+    "reverse",
+    "fields",
+    "output",
+    "time",
+    "refresh",
+)
+
+
+def get_param(params: dict[str, list[str]], key: str, default: str = "") -> str:
+    """
+    Get last value of query parameter
+    """
+    return params[key][-1] if key in params else default
+
+
+def get_seconds(params: dict[str, list[str]], key: str) -> float | None:
+    """
+    Get query parameter in seconds
+    """
+    if key not in params:
+        return None
+    try:
+        return float(get_param(params, key))
+    except ValueError as exc:
+        raise ValueError(f"Invalid {key}: {get_param(params, key)}") from exc
+
+
+class Api:
+    """
+    Query the instances of the inventory, indexed once per change
+    """
+
+    def __init__(self, inventory: Inventory) -> None:
+        self.inventory = inventory
+        self._index = Index(())
+        self._generation = -1
+        self._lock = threading.Lock()
+
+    def index(self) -> Index:
+        """
+        Get index of the current instances, building it if they changed
+        """
+        with self._lock:
+            generation = self.inventory.generation
+            if generation != self._generation:
+                self._index = Index(self.inventory.instances())
+                self._generation = generation
+            return self._index
+
+    def query(self, params: dict[str, list[str]]) -> tuple[str, str]:
+        """
+        Get the instances matching the query parameters and the content type.
+        Raise ValueError if the parameters are invalid
+        """
+        unknown = set(params) - set(PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        fields = get_param(params, "fields", DEFAULT_FIELDS).split(",")
+        fields = list(dict.fromkeys(fields))
+        if not set(fields) <= set(FIELDS):
+            raise ValueError(f"Invalid fields: {','.join(fields)}")
+        if "extra" in fields and not Instance.keep_extra:
+            raise ValueError("Server doesn't keep extra")
+        output = get_param(params, "output", "json")
+        if output not in WRITERS:
+            raise ValueError(f"Invalid output: {output}")
+        sort = get_param(params, "sort")
+        if sort and (sort not in FIELDS or sort == "extra"):
+            raise ValueError(f"Invalid sort: {sort}")
+        older_than = get_seconds(params, "older_than")
+        newer_than = get_seconds(params, "newer_than")
+
+        age = time.time() - self.inventory.refreshed
+        if not self.inventory.refreshed or (
+            "refresh" in params and age >= MIN_REFRESH_INTERVAL
+        ):
+            self.inventory.refresh()
+        instances = self.index().search(
+            filters={
+                key: [value for values in params[key] for value in values.split(",")]
+                for key in INDEXED
+                if key in params
+            },
+            name=get_param(params, "name"),
+            older_than=older_than,
+            newer_than=newer_than,
+        )
+        if sort:
+            instances.sort(key=attrgetter(sort, "name"), reverse="reverse" in params)
+        elif "reverse" in params:
+            instances.reverse()
+
+        file = io.StringIO()
+        writer = WRITERS[output](file, fields, get_param(params, "time", TIME_FORMAT))
+        writer.header()
+        for instance in instances:
+            writer.write(instance)
+        writer.footer()
+        return file.getvalue(), CONTENT_TYPES[output]
+
+
+class ApiHandler(Handler):
+    """
+    Serve /instances from memory
+    """
+
+    server: ApiServer
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Handle GET
+        """
+        url = urlsplit(self.path)
+        if url.path != "/instances":
+            self.send_error(404)
+            return
+        try:
+            body, content_type = self.server.api.query(
+                parse_qs(url.query, keep_blank_values=True)
+            )
+        except ValueError as exc:
+            self.reply(f"{exc}\n", "text/plain; charset=utf-8", 400)
+            return
+        self.reply(body, content_type)
+
+
+class ApiServer(Server):
+    """
+    HTTP server of the query API
+    """
+
+    def __init__(self, address: tuple[str, int], api: Api) -> None:
+        super().__init__(address, ApiHandler)
+        self.api = api
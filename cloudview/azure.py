@@ -5,16 +5,42 @@ https://libcloud.readthedocs.io/en/stable/compute/drivers/azure_arm.html
 
 import logging
 import os
+from collections.abc import Callable, Iterator
 from functools import cached_property
+from typing import TypeVar
+from urllib.parse import parse_qsl, urlparse
 
+from libcloud.common.exceptions import BaseHTTPError
 from libcloud.compute.base import Node, NodeDriver
+from libcloud.compute.drivers.azure_arm import (
+    IP_API_VERSION,
+    NIC_API_VERSION,
+    VM_API_VERSION,
+)
 from libcloud.compute.providers import get_driver
-from libcloud.compute.types import Provider, LibcloudError
+from libcloud.compute.types import Provider, LibcloudError, NodeState
 from requests.exceptions import RequestException
 
 from cloudview.instance import Instance, CSP
+from cloudview.limits import is_throttled
+from cloudview.stats import stats
+from cloudview.trace import traced, tracer
 from cloudview.utils import utc_date
 
+T = TypeVar("T")
+
+# Same mapping as the driver uses when fetching the instance view of each node
+POWER_STATES = {
+    "ProvisioningState/creating": NodeState.PENDING,
+    "ProvisioningState/deleting": NodeState.TERMINATED,
+    "ProvisioningState/failed": NodeState.ERROR,
+    "ProvisioningState/updating": NodeState.UPDATING,
+    "PowerState/deallocated": NodeState.STOPPED,
+    "PowerState/stopped": NodeState.PAUSED,
+    "PowerState/deallocating": NodeState.PENDING,
+    "PowerState/running": NodeState.RUNNING,
+}
+
 
 def get_creds() -> dict[str, str]:
     """
@@ -40,6 +66,8 @@ class Azure(CSP):
     Class for handling Azure stuff
     """
 
+    provider = Provider.AZURE_ARM
+
     def __init__(self, cloud: str = "", **creds) -> None:
         super().__init__(cloud)
         creds = creds or get_creds()
@@ -60,6 +88,10 @@ class Azure(CSP):
         }
         self._driver: NodeDriver | None = None
 
+    @property
+    def identity(self) -> str:
+        return self._creds[1]
+
     @cached_property
     def driver(self) -> NodeDriver:
         """
@@ -68,15 +100,136 @@ class Azure(CSP):
         if self._driver is None:
             cls = get_driver(Provider.AZURE_ARM)
             try:
-                self._driver = cls(*self._creds, **self.options)
+                with stats.construct(self), tracer.span(
+                    "construct driver", client=self
+                ):
+                    self._driver = cls(*self._creds, **self.options)
             except RequestException as exc:
                 logging.error("Azure: %s: %s", self.cloud, exc)
                 raise LibcloudError(f"{exc}") from exc
         return self._driver
 
+    def _scope(self, provider: str) -> str:
+        scope = f"/subscriptions/{self._creds[1]}"
+        if self.options["ex_resource_group"]:
+            scope += f"/resourceGroups/{self.options['ex_resource_group']}"
+        return f"{scope}/providers/{provider}"
+
+    def _list(self, action: str, **params: str) -> Iterator[dict]:
+        """
+        List resources following nextLink
+        """
+        while True:
+            response = self.driver.connection.request(action, params=params).object
+            yield from response.get("value", [])
+            if not response.get("nextLink"):
+                break
+            params |= dict(parse_qsl(urlparse(response["nextLink"]).query))
+
+    def _get_power_states(self) -> dict[str, NodeState]:
+        """
+        Get the power state of all VMs with the instance view of them all
+        """
+        states = {}
+        for vm in self._list(
+            self._scope("Microsoft.Compute/virtualMachines"),
+            **{"api-version": VM_API_VERSION, "statusOnly": "true"},
+        ):
+            state = NodeState.UNKNOWN
+            statuses = vm.get("properties", {}).get("instanceView", {})
+            for status in statuses.get("statuses", []):
+                code = "/".join(status.get("code", "").split("/")[:2])
+                if code in POWER_STATES:
+                    state = POWER_STATES[code]
+                    break
+            states[vm["id"].lower()] = state
+        return states
+
+    def _get_addresses(self) -> dict[str, tuple[list[str], list[str]]]:
+        """
+        Get the public & private IP addresses of all NICs
+        """
+        public_ips = {
+            ip["id"].lower(): ip["properties"]["ipAddress"]
+            for ip in self._list(
+                self._scope("Microsoft.Network/publicIPAddresses"),
+                **{"api-version": IP_API_VERSION},
+            )
+            if ip.get("properties", {}).get("ipAddress")
+        }
+        addresses: dict[str, tuple[list[str], list[str]]] = {}
+        for nic in self._list(
+            self._scope("Microsoft.Network/networkInterfaces"),
+            **{"api-version": NIC_API_VERSION},
+        ):
+            public: list[str] = []
+            private: list[str] = []
+            for config in nic.get("properties", {}).get("ipConfigurations", []):
+                props = config.get("properties", {})
+                if props.get("privateIPAddress"):
+                    private.append(props["privateIPAddress"])
+                public_ip = props.get("publicIPAddress", {}).get("id", "").lower()
+                if public_ip in public_ips:
+                    public.append(public_ips[public_ip])
+            addresses[nic["id"].lower()] = (public, private)
+        return addresses
+
+    def _bulk(self, func: Callable[[], T]) -> T | None:
+        """
+        Call func doing bulk requests, returning None on errors other than
+        throttling so that nodes keep what the driver set
+        """
+        try:
+            return func()
+        except (BaseHTTPError, LibcloudError, RequestException) as exc:
+            if is_throttled(exc):
+                raise
+            logging.warning("Azure: %s: %s", self.cloud, exc)
+            return None
+
+    def _set_addresses(self, nodes: list[Node]) -> None:
+        """
+        Set the IP addresses of nodes from the bulk lists of NICs & IPs
+        """
+        addresses = self._bulk(self._get_addresses)
+        if addresses is None:
+            return
+        for node in nodes:
+            nics = node.extra["properties"].get("networkProfile", {})
+            for nic in nics.get("networkInterfaces", []):
+                public, private = addresses.get(nic["id"].lower(), ([], []))
+                node.public_ips.extend(public)
+                node.private_ips.extend(private)
+            node.extra["public_ips"] = node.public_ips
+            node.extra["private_ips"] = node.private_ips
+
+    def _iter_instances(self) -> Iterator[Instance]:
+        """
+        Set the power state & IP addresses of nodes with a few bulk requests
+        instead of the driver's requests per node.  The power states come
+        first so that the other lists are skipped if no state matches and
+        only the nodes matching the filters get their addresses
+        """
+        states = self._bulk(self._get_power_states)
+        wanted = self.filters.states
+        if states is not None and wanted is not None:
+            if not any(str(state) in wanted for state in states.values()):
+                return
+        nodes = self.driver.list_nodes(**self.options)
+        if states is not None:
+            for node in nodes:
+                node.state = states.get(str(node.id).lower(), node.state)
+            if self.filters:
+                nodes = [node for node in nodes if self.filters.match(node)]
+            if nodes:
+                self._set_addresses(nodes)
+        for node in nodes:
+            yield self._node_to_instance(node)
+
     def _get_instances(self) -> list[Instance]:
-        return [self._node_to_instance(node) for node in self.driver.list_nodes()]
+        return list(self._iter_instances())
 
+    @traced("node to instance", "convert")
     def _node_to_instance(self, node: Node) -> Instance:
         return Instance(
             provider=Provider.AZURE_ARM,
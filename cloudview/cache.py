@@ -0,0 +1,114 @@
+"""
+Inventory cache
+"""
+
+import hashlib
+import logging
+import threading
+from collections.abc import Iterator
+from dataclasses import fields
+from datetime import datetime
+from typing import Any
+
+from cloudview.instance import Instance, CSP
+from cloudview.scheduler import scheduler
+from cloudview.utils import load_cache, save_cache
+
+
+def cache_name(client: CSP) -> str:
+    """
+    Get name of cache file for client, keyed by its account too
+    """
+    key = f"{client.__class__.__name__}/{client.cloud}".lower()
+    key += f"/{client.identity}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return f"instances-{digest[:16]}.json"
+
+
+def dump_instance(instance: Instance) -> dict[str, Any]:
+    """
+    Get instance as a dict that can be serialized to JSON
+    """
+    item = {field.name: getattr(instance, field.name) for field in fields(instance)}
+    if isinstance(instance.time, datetime):
+        item["time"] = instance.time.isoformat()
+    return item
+
+
+def load_instance(item: dict[str, Any]) -> Instance:
+    """
+    Get instance from dict returned by dump_instance()
+    """
+    item["time"] = datetime.fromisoformat(item["time"])
+    return Instance(**item)
+
+
+def load_instances(client: CSP) -> tuple[list[Instance] | None, float]:
+    """
+    Load cached instances of client and return them with their age in seconds
+    """
+    data, age = load_cache(cache_name(client))
+    if data is None:
+        return None, age
+    try:
+        instances = []
+        for item in data:
+            if Instance.keep_extra and item.get("extra") is None:
+                raise ValueError("no extra")
+            instances.append(load_instance(item))
+    except (KeyError, TypeError, ValueError) as exc:
+        logging.warning("Ignoring cache for %s: %s", client, exc)
+        return None, age
+    return instances, age
+
+
+def save_instances(client: CSP, instances: list[Instance]) -> None:
+    """
+    Save instances of client to cache
+    """
+    save_cache(cache_name(client), [dump_instance(instance) for instance in instances])
+
+
+def refresh_instances(clients: list[CSP]) -> Iterator[tuple[CSP, Instance | None]]:
+    """
+    Yield (client, instance) tuples from providers and save the instances
+    of each client to cache when it's done unless there were errors
+    """
+    errors = {client: client.errors for client in clients}
+    fetched: dict[CSP, list[Instance]] = {client: [] for client in clients}
+    for client, instance in scheduler.run(clients):
+        if instance is not None:
+            fetched[client].append(instance)
+        elif client.errors == errors[client]:
+            save_instances(client, fetched.pop(client))
+        yield client, instance
+
+
+def _refresh(clients: list[CSP]) -> None:
+    for _ in refresh_instances(clients):
+        pass
+
+
+def cached_instances(
+    clients: list[CSP], ttl: float, refresh: bool = False
+) -> Iterator[tuple[CSP, Instance | None]]:
+    """
+    Yield (client, instance) tuples from cache if younger than ttl seconds
+    or from providers otherwise.  Stale instances are yielded at once while
+    a background thread refreshes the cache
+    """
+    fetch, stale = [], []
+    for client in clients:
+        instances, age = (None, 0.0) if refresh else load_instances(client)
+        if instances is None:
+            fetch.append(client)
+            continue
+        if age > ttl:
+            stale.append(client)
+        for instance in instances:
+            yield client, instance
+        yield client, None
+    if stale:
+        logging.debug("Refreshing stale cache for %s", stale)
+        threading.Thread(target=_refresh, args=(stale,), name="refresh").start()
+    yield from refresh_instances(fetch)
@@ -4,52 +4,84 @@ Show all instances created on cloud providers
 """
 
 import argparse
+import heapq
 import os
 import logging
 import sys
-from concurrent.futures import ThreadPoolExecutor
-from operator import itemgetter
+import time
+from collections import defaultdict
+from collections.abc import Collection, Iterator, Mapping
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
 from typing import Any
 
 import yaml
+import libcloud.security
 from libcloud.compute.types import Provider, LibcloudError
 
-from .ec2 import EC2
-from .azure import Azure
-from .gce import GCE
-from .openstack import Openstack
-from .instance import CSP, Instance, STATES
-from .utils import dateit, read_file
+from .agent import Agent, AgentServer, query_agent, socket_path
+from .api import Api, ApiServer, MIN_REFRESH_INTERVAL, PORT as API_PORT
+from .cache import cached_instances
+from .instance import CSP, Filters, Instance, STATES
+from .inventory import Inventory, INTERVAL
+from .limits import RateLimiter
+from .metrics import Metrics, MetricsServer, PORT as METRICS_PORT
+from .output import WRITERS
+from .profiler import profiler
+from .providers import Registry
+from .replay import record_replay
+from .scheduler import scheduler, MAX_WORKERS
+from .server import Server, serve
+from .stats import stats
+from .trace import tracer
+from .utils import parse_address, parse_duration, read_file
 from . import __version__
 
-PROVIDERS: dict[str, Any] = {
-    str(Provider.EC2): EC2,
-    str(Provider.GCE): GCE,
-    str(Provider.AZURE_ARM): Azure,
-    str(Provider.OPENSTACK): Openstack,
-}
+# Set before any driver is created as libcloud passes its own CA bundle to
+# requests, which then ignores REQUESTS_CA_BUNDLE
+libcloud.security.CA_CERTS_PATH = os.getenv("REQUESTS_CA_BUNDLE")
+
+PROVIDERS: Mapping[str, Any] = Registry(
+    {
+        str(Provider.EC2): "cloudview.ec2:EC2",
+        str(Provider.GCE): "cloudview.gce:GCE",
+        str(Provider.AZURE_ARM): "cloudview.azure:Azure",
+        str(Provider.OPENSTACK): "cloudview.openstack:Openstack",
+    }
+)
+
+args: argparse.Namespace
 
 
-def get_clients(
+def get_clients(  # pylint: disable=too-many-locals
     config_file: str,
     provider: str = "",
     cloud: str = "",
+    providers: Collection[str] | None = None,
 ) -> list[CSP]:
     """
-    Get clients for cloud providers
+    Get clients for cloud providers, limited to providers if given.  Only
+    the modules of these providers are imported
     """
-    config = yaml.safe_load(read_file(config_file)) if config_file else {}
-    providers = (
+    with tracer.span("load config", file=config_file):
+        config = yaml.safe_load(read_file(config_file)) if config_file else {}
+    xproviders = (
         (provider,)
         if provider
         else config["providers"].keys() if config else PROVIDERS.keys()
     )
     clients = []
-    for xprovider in providers:
+    for xprovider in xproviders:
         if xprovider not in PROVIDERS:
             logging.error("Unsupported provider %s", xprovider)
             continue
-        if PROVIDERS[xprovider] is None:
+        if providers is not None and xprovider not in providers:
+            continue
+        limits = config.get("limits", {}).get(xprovider) if config else None
+        try:
+            provider_limiter = RateLimiter(**limits) if limits else None
+        except (TypeError, ValueError) as exc:
+            logging.error("Invalid limits for provider %s: %s", xprovider, exc)
             continue
         clouds = (
             (cloud,)
@@ -58,29 +90,148 @@ def get_clients(
         )
         for xcloud in clouds:
             try:
-                creds = config["providers"][xprovider][xcloud] if config else {}
-                clients.append(PROVIDERS[xprovider](cloud=xcloud, **creds))
+                creds = dict(config["providers"][xprovider][xcloud]) if config else {}
             except KeyError:
                 logging.error("Unsupported provider/cloud %s/%s", xprovider, xcloud)
+                continue
+            limits = creds.pop("limits", None)
+            try:
+                limiter = RateLimiter(**limits) if limits else None
+            except (TypeError, ValueError) as exc:
+                logging.error("Invalid limits for %s/%s: %s", xprovider, xcloud, exc)
+                continue
+            started = time.monotonic()
+            try:
+                with tracer.span("construct client", provider=xprovider, cloud=xcloud):
+                    client = PROVIDERS[xprovider](cloud=xcloud, **creds)
             except LibcloudError:
-                pass
+                continue
+            stats.constructed(client, started)
+            if limiter is not None:
+                client.limiter = limiter
+            client.provider_limiter = provider_limiter
+            clients.append(client)
     return clients
 
 
-def get_instances(client: CSP) -> list[Instance]:
+def fetch_instances(clients: list[CSP]) -> Iterator[tuple[CSP, Instance | None]]:
+    """
+    Yield (client, instance) tuples as they arrive and (client, None) when
+    a client is done
+    """
+    if args.cache_ttl:
+        results = cached_instances(clients, args.cache_ttl, args.refresh)
+    else:
+        results = scheduler.run(clients)
+    return stats.observe(results) if stats.enabled else results
+
+
+def merge_instances(
+    results: Iterator[tuple[Any, Instance | None]],
+) -> Iterator[Instance]:
     """
-    Get instances
+    Yield instances from (client, instance) tuples as they arrive or, when
+    sorting, merge the sorted instances of every client in global order
     """
-    instances = [
-        instance
-        for instance in client.get_instances()
-        if str(instance.state) in args.states
-    ]
-    if args.sort:
-        instances.sort(
-            key=itemgetter(args.sort, "name"), reverse=args.reverse  # type: ignore
+    filters = args.filters
+    if filters:
+        results = (
+            (client, instance)
+            for client, instance in results
+            if instance is None or filters.match(instance)
         )
-    return instances
+    if not args.sort:
+        yield from (instance for _, instance in results if instance is not None)
+        return
+    key = attrgetter(args.sort, "name")
+    instances: dict[Any, list[Instance]] = defaultdict(list)
+    for client, instance in results:
+        if instance is not None:
+            instances[client].append(instance)
+        else:
+            instances[client].sort(key=key, reverse=args.reverse)
+    yield from heapq.merge(*instances.values(), key=key, reverse=args.reverse)
+
+
+def get_filters() -> Filters:
+    """
+    Get filters from the command line options
+    """
+    now = datetime.now(timezone.utc)
+    return Filters(
+        states=frozenset(args.states) if args.states else None,
+        name=args.name,
+        created_after=(
+            now - timedelta(seconds=args.newer_than)
+            if args.newer_than is not None
+            else None
+        ),
+        created_before=(
+            now - timedelta(seconds=args.older_than)
+            if args.older_than is not None
+            else None
+        ),
+    )
+
+
+def run_servers() -> None:
+    """
+    Serve the query API and/or the metrics of the inventory of all clients
+    """
+    clients = get_clients(config_file=args.config, providers=args.providers)
+    for client in clients:
+        client.use_cache = not args.refresh
+    inventory = Inventory(clients, args.interval)
+    servers: list[Server] = []
+    if args.serve_api:
+        servers.append(ApiServer(args.serve_api, Api(inventory)))
+    if args.serve_metrics:
+        servers.append(MetricsServer(args.serve_metrics, Metrics(inventory)))
+    serve(inventory, servers)
+
+
+def run_agent() -> None:
+    """
+    Run agent keeping the clients & their instances warm for the CLI
+    """
+    clients = get_clients(config_file=args.config, providers=args.providers)
+    inventory = Inventory(clients, args.interval)
+    with AgentServer(
+        socket_path(), Agent(inventory, args.config, list(args.providers))
+    ) as server:
+        serve(inventory, [server])
+
+
+def fetch_from_agent(fields: list[str]) -> Iterator[tuple[str, Instance | None]] | None:
+    """
+    Get results from the agent unless not running or options need to fetch
+    in-process
+    """
+    if args.no_agent or args.record or args.replay or args.stats:
+        return None
+    if args.trace or args.profile:
+        return None
+    return query_agent(
+        {
+            "config": args.config,
+            "providers": list(args.providers),
+            "extra": "extra" in fields,
+            "max_age": args.cache_ttl,
+            "refresh": args.refresh,
+        }
+    )
+
+
+def parse_interval(value: str) -> int:
+    """
+    Parse seconds between refreshes, which must not hammer the providers
+    """
+    seconds = int(value)
+    if seconds < MIN_REFRESH_INTERVAL:
+        raise argparse.ArgumentTypeError(
+            f"must be at least {MIN_REFRESH_INTERVAL} seconds: {value}"
+        )
+    return seconds
 
 
 def parse_args() -> argparse.Namespace:
@@ -90,9 +241,21 @@ def parse_args() -> argparse.Namespace:
     version = f"cloudview {__version__}"
     argparser = argparse.ArgumentParser(
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-        epilog="output fields for --fields: provider,name,id,size,state,time,location",
+        epilog="output fields for --fields: provider,name,id,size,state,time,location,extra",
     )
     argparser.add_argument("-c", "--config", type=str, help="path to clouds.yaml")
+    argparser.add_argument(
+        "--agent",
+        action="store_true",
+        help="run agent keeping clients & instances warm for the CLI",
+    )
+    argparser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=0,
+        metavar="SECONDS",
+        help="cache instances for this many seconds (0 disables)",
+    )
     argparser.add_argument(
         "-f",
         "--fields",
@@ -106,6 +269,31 @@ def parse_args() -> argparse.Namespace:
         choices=["none", "debug", "info", "warning", "error", "critical"],
         help="logging level",
     )
+    argparser.add_argument(
+        "--newer-than",
+        type=parse_duration,
+        metavar="DURATION",
+        help="filter by creation time newer than NUMBER[s|m|h|d|w]",
+    )
+    argparser.add_argument(
+        "-n", "--name", metavar="PATTERN", help="filter by name with shell wildcards"
+    )
+    argparser.add_argument(
+        "--no-agent", action="store_true", help="don't use the agent if running"
+    )
+    argparser.add_argument(
+        "--older-than",
+        type=parse_duration,
+        metavar="DURATION",
+        help="filter by creation time older than NUMBER[s|m|h|d|w]",
+    )
+    argparser.add_argument(
+        "-o",
+        "--output",
+        default="table",
+        choices=list(WRITERS),
+        help="output format",
+    )
     argparser.add_argument(
         "-p",
         "--providers",
@@ -113,7 +301,61 @@ def parse_args() -> argparse.Namespace:
         choices=list(PROVIDERS.keys()),
         help="list only specified providers",
     )
+    argparser.add_argument(
+        "--profile",
+        nargs="?",
+        const="cloudview",
+        metavar="PREFIX",
+        help="profile all threads to PREFIX.pstats & PREFIX.collapsed",
+    )
+    argparser.add_argument(
+        "--interval",
+        type=parse_interval,
+        default=INTERVAL,
+        metavar="SECONDS",
+        help="seconds between refreshes with --agent, --serve-api & --serve-metrics"
+        f", at least {MIN_REFRESH_INTERVAL}",
+    )
     argparser.add_argument("-r", "--reverse", action="store_true", help="reverse sort")
+    argparser.add_argument(
+        "--record", metavar="FILE", help="record sanitized HTTP exchanges to file"
+    )
+    argparser.add_argument(
+        "--refresh", action="store_true", help="bypass cache and refresh it"
+    )
+    argparser.add_argument(
+        "--replay", metavar="FILE", help="replay HTTP exchanges recorded to file"
+    )
+    argparser.add_argument(
+        "--replay-scale",
+        type=float,
+        default=1.0,
+        metavar="FACTOR",
+        help="multiply recorded response times by this factor",
+    )
+    argparser.add_argument(
+        "--stats",
+        nargs="?",
+        const="table",
+        choices=["table", "json"],
+        help="report timing & API calls per client & region to stderr",
+    )
+    argparser.add_argument(
+        "--serve-api",
+        nargs="?",
+        const=("", API_PORT),
+        type=parse_address,
+        metavar="[HOST:]PORT",
+        help=f"serve query API on port {API_PORT} or [HOST:]PORT",
+    )
+    argparser.add_argument(
+        "--serve-metrics",
+        nargs="?",
+        const=("", METRICS_PORT),
+        type=parse_address,
+        metavar="[HOST:]PORT",
+        help=f"serve Prometheus metrics on port {METRICS_PORT} or [HOST:]PORT",
+    )
     argparser.add_argument(
         "-s", "--sort", choices=["name", "state", "time"], help="sort type"
     )
@@ -131,12 +373,24 @@ def parse_args() -> argparse.Namespace:
         metavar="TIME_FORMAT",
         help="strftime format or age|timeago",
     )
+    argparser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="write spans to file in Chrome trace event format",
+    )
     argparser.add_argument("-v", "--verbose", action="count", help="be verbose")
+    argparser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=0,
+        help="maximum number of concurrent requests, 0 for min(32, 4 * CPUs)",
+    )
     argparser.add_argument("--version", action="version", version=version)
     return argparser.parse_args()
 
 
-def main() -> None:
+def main() -> None:  # pylint: disable=too-many-branches
     """
     Main function
     """
@@ -146,40 +400,62 @@ def main() -> None:
                 args.config = file
     elif not os.path.isfile(args.config):
         sys.exit(f"ERROR: No such file: {args.config}")
+    if args.config:
+        args.config = os.path.abspath(args.config)
 
     if not args.providers:
-        args.providers = PROVIDERS.keys()
-    for provider in PROVIDERS:
-        if provider not in args.providers:
-            PROVIDERS[provider] = None
-
-    if not args.states:
-        args.states = STATES
-    args.states = set(args.states)
-
-    keys = {
-        "provider": "<15",
-        "name": "<50",
-        "size": ">20",
-        "state": ">10",
-        "time": "<15" if args.time in {"age", "timeago"} else "<30",
-        "location": "<15",
-    }
-    keys = {key: keys.get(key, "") for key in args.fields.split(",")}
-    if args.verbose:
-        keys |= {"id": ""}
-    output_format = "  ".join(f"{{{key}:{align}}}" for key, align in keys.items())
-    print(output_format.format_map({key: key.upper() for key in keys}))
-
-    clients = get_clients(config_file=args.config)
-    if len(clients) > 0:
-        with ThreadPoolExecutor(max_workers=len(clients)) as executor:
-            for instances in executor.map(get_instances, clients):
-                for instance in instances:
-                    instance.provider = f"{instance.provider}/{instance.cloud}"
-                    assert not isinstance(instance.time, str)
-                    instance.time = dateit(instance.time, args.time)
-                    print(output_format.format_map(instance.__dict__))
+        args.providers = list(PROVIDERS)
+
+    if args.stats:
+        stats.enable()
+    if args.trace:
+        tracer.enable()
+    if args.profile:
+        profiler.enable()
+
+    args.filters = get_filters()
+    scheduler.max_workers = args.workers or MAX_WORKERS
+
+    fields = list(dict.fromkeys(args.fields.split(",")))
+    if args.verbose and "id" not in fields:
+        fields.append("id")
+    Instance.keep_extra = "extra" in fields
+
+    if args.agent:
+        run_agent()
+        return
+    if args.serve_api or args.serve_metrics:
+        run_servers()
+        return
+
+    writer = WRITERS[args.output](sys.stdout, fields, args.time)
+    writer.header()
+
+    with record_replay(args.record, args.replay, args.replay_scale), tracer.span(
+        "main"
+    ):
+        results: Iterator[tuple[Any, Instance | None]] | None
+        results = fetch_from_agent(fields)
+        if results is None:
+            clients = get_clients(config_file=args.config, providers=args.providers)
+            for client in clients:
+                client.use_cache = not args.refresh
+                # Cached instances are filtered only client-side
+                if not args.cache_ttl:
+                    client.filters = args.filters
+            results = fetch_instances(clients) if clients else iter(())
+        for instance in merge_instances(results):
+            with tracer.span("render", "output"):
+                writer.write(instance)
+        with tracer.span("render", "output"):
+            writer.footer()
+    if args.profile:
+        profiler.disable()
+        profiler.save(args.profile)
+    if args.stats:
+        stats.report(sys.stderr, args.stats)
+    if args.trace:
+        tracer.save(args.trace)
 
 
 if __name__ == "__main__":
@@ -3,16 +3,35 @@ Reference:
 https://libcloud.readthedocs.io/en/stable/compute/drivers/ec2.html
 """
 
+import hashlib
 import logging
 import os
-import concurrent.futures
+import threading
+import time
+from collections.abc import Callable, Iterable
+from functools import partial
+from typing import Any
 
 from libcloud.compute.base import Node, NodeDriver
+from libcloud.compute.drivers.ec2 import EC2NodeDriver
 from libcloud.compute.providers import get_driver
 from libcloud.compute.types import Provider, LibcloudError, InvalidCredsError
 
 from cloudview.instance import Instance, CSP
-from cloudview.utils import utc_date
+from cloudview.limits import is_throttled
+from cloudview.scheduler import ERRORS, Task
+from cloudview.stats import region_stats, stats
+from cloudview.trace import traced, tracer
+from cloudview.utils import utc_date, load_cache, save_cache
+
+# Seconds before probing again regions that are disabled or never had instances
+PROBE_INTERVALS = {"disabled": 7 * 24 * 3600, "empty": 24 * 3600}
+
+# Characters of instance ids, used as names of instances without a Name tag
+INSTANCE_ID_CHARS = frozenset("i-0123456789abcdef")
+
+# Maximum number of values of a filter of DescribeInstances
+MAX_FILTER_VALUES = 200
 
 
 def get_creds() -> dict[str, str]:
@@ -27,11 +46,13 @@ def get_creds() -> dict[str, str]:
     return creds
 
 
-class EC2(CSP):  # pylint: disable=too-few-public-methods
+class EC2(CSP):  # pylint: disable=too-few-public-methods,too-many-instance-attributes
     """
     Class for handling EC2 stuff
     """
 
+    provider = Provider.EC2
+
     def __init__(self, cloud: str = "", **creds) -> None:
         super().__init__(cloud)
         creds = creds or get_creds()
@@ -40,35 +61,142 @@ class EC2(CSP):  # pylint: disable=too-few-public-methods
         except KeyError as exc:
             logging.error("EC2: %s: %s", self.cloud, exc)
             raise LibcloudError(f"{exc}") from exc
-        cls = get_driver(Provider.EC2)
-        self.regions = cls.list_regions()
-        self._drivers: dict[str, NodeDriver] = {
-            region: cls(*key_secret, region=region) for region in self.regions
-        }
+        self._key_secret = key_secret
+        self.regions = get_driver(Provider.EC2).list_regions()
+        self._drivers: dict[str, NodeDriver] = {}
+        self._lock = threading.Lock()
+        self._record: dict[str, list] = {}
+        self._probed: dict[str, str] = {}
+        self._pending: set[str] = set()
+        digest = hashlib.sha256(key_secret[0].encode("utf-8")).hexdigest()
+        self._cache_name = f"ec2-regions-{digest[:16]}.json"
+
+    @property
+    def identity(self) -> str:
+        return self._key_secret[0]
+
+    def _get_driver(self, region: str) -> NodeDriver:
+        """
+        Get driver for region, creating it on first use
+        """
+        with self._lock:
+            if region not in self._drivers:
+                cls = get_driver(Provider.EC2)
+                with stats.construct(self), tracer.span(
+                    "construct driver", client=self, region=region
+                ):
+                    self._drivers[region] = cls(*self._key_secret, region=region)
+            return self._drivers[region]
 
+    def _ex_filters(self) -> dict[str, Any] | None:
+        """
+        Get the DescribeInstances filters for the filters of the client or
+        None if no instance can match
+        """
+        ex_filters: dict[str, Any] = {}
+        statuses = self.filters.statuses(EC2NodeDriver.NODE_STATE_MAP)
+        if statuses is not None:
+            if not statuses:
+                return None
+            ex_filters["instance-state-name"] = statuses
+        globs = self.filters.date_globs()
+        if globs is not None:
+            if not globs:
+                return None
+            if len(globs) <= MAX_FILTER_VALUES:
+                ex_filters["launch-time"] = globs
+        pattern = self.filters.name_pattern()
+        # Instances without a Name tag are named after their id
+        if pattern is not None and not set(pattern) - {"*", "?"} <= INSTANCE_ID_CHARS:
+            ex_filters["tag:Name"] = pattern
+        return ex_filters
+
+    @region_stats
     def _list_instances_in_region(self, region: str) -> list[Instance]:
+        ex_filters = self._ex_filters() or {}
         try:
-            return [
+            instances = [
                 self._node_to_instance(node)
-                for node in self._drivers[region].list_nodes(ex_filters=None)
+                for node in self._get_driver(region).list_nodes(
+                    ex_filters=ex_filters or None
+                )
             ]
         except InvalidCredsError:
-            pass
-        return []
+            self._learn(region, "disabled")
+            return []
+        except Exception as exc:
+            # Throttled listings are retried so the region reports later
+            if not (isinstance(exc, ERRORS) and is_throttled(exc)):
+                self._learn(region, None)
+            raise
+        status = "active" if instances else "empty"
+        # Filtered listings don't tell whether the region is empty
+        self._learn(region, status if instances or not ex_filters else None)
+        return instances
+
+    def _active_regions(self) -> list[str]:
+        """
+        Get regions to query, skipping those recently found disabled or empty
+        """
+        record, _ = load_cache(self._cache_name) if self.use_cache else (None, 0)
+        self._record = record if isinstance(record, dict) else {}
+        now = time.time()
+        regions = []
+        for region in self.regions:
+            try:
+                status, checked = self._record[region]
+                if now - checked < PROBE_INTERVALS.get(status, 0):
+                    continue
+            except (KeyError, TypeError, ValueError):
+                pass
+            regions.append(region)
+        if len(regions) < len(self.regions):
+            logging.debug(
+                "EC2: %s: skipping %d regions",
+                self.cloud,
+                len(self.regions) - len(regions),
+            )
+        return regions
+
+    def _learn(self, region: str, status: str | None) -> None:
+        """
+        Record status of region and save the record once every region has
+        reported
+        """
+        with self._lock:
+            if region not in self._pending:
+                return
+            if status is not None:
+                self._probed[region] = status
+            self._pending.remove(region)
+            if self._pending:
+                return
+            probed, self._probed = self._probed, {}
+        # All regions failing authentication means invalid credentials
+        if set(probed.values()) == {"disabled"}:
+            return
+        now = time.time()
+        for name, learned in probed.items():
+            # Regions that ever had instances stay probed on every run
+            previous = self._record.get(name)
+            if learned == "empty" and isinstance(previous, list):
+                learned = "active" if previous[:1] == ["active"] else learned
+            self._record[name] = [learned, now]
+        save_cache(self._cache_name, self._record)
+
+    def tasks(self) -> list[Callable[[], Iterable[Instance | Task]]]:
+        if self._ex_filters() is None:
+            return []
+        regions = self._active_regions()
+        with self._lock:
+            self._probed = {}
+            self._pending = set(regions)
+        return [partial(self._list_instances_in_region, region) for region in regions]
 
     def _get_instances(self) -> list[Instance]:
-        instances = []
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=len(self.regions)
-        ) as executor:
-            future_to_region = {
-                executor.submit(self._list_instances_in_region, region): region
-                for region in self.regions
-            }
-            for future in concurrent.futures.as_completed(future_to_region):
-                instances.extend(future.result())
-        return instances
+        return self._run_tasks()
 
+    @traced("node to instance", "convert")
     def _node_to_instance(self, node: Node) -> Instance:
         return Instance(
             provider=Provider.EC2,
@@ -3,20 +3,38 @@ Reference:
 https://libcloud.readthedocs.io/en/stable/compute/drivers/gce.html
 """
 
+import hashlib
+import itertools
 import json
 import logging
 import os
-import concurrent.futures
-from functools import cached_property
+from collections.abc import Callable, Iterable, Iterator
+from datetime import timedelta
+from functools import cached_property, partial
 
+from libcloud.common.exceptions import BaseHTTPError
+from libcloud.common.google import ResourceNotFoundError
 from libcloud.compute.base import Node, NodeDriver
-from libcloud.compute.drivers.gce import GCEZone
+from libcloud.compute.drivers.gce import GCENodeDriver, GCEZone
 from libcloud.compute.providers import get_driver
 from libcloud.compute.types import Provider, LibcloudError
 from requests.exceptions import RequestException
 
-from cloudview.instance import Instance, CSP
-from cloudview.utils import utc_date, read_file
+from cloudview.instance import Instance, CSP, glob_to_regex
+from cloudview.scheduler import Task
+from cloudview.limits import is_throttled
+from cloudview.stats import region_stats, stats
+from cloudview.trace import traced, tracer
+from cloudview.utils import utc_date, read_file, load_cache, save_cache
+
+# Seconds to keep the zone list on disk
+ZONES_TTL = 24 * 3600
+
+# Maximum number of instances per page of aggregated list
+PAGE_SIZE = 500
+
+# Creation timestamps are in the timezone of the zone
+TIMEZONE_MARGIN = timedelta(days=1)
 
 
 def get_creds(creds: dict) -> dict[str, str]:
@@ -43,8 +61,11 @@ class GCE(CSP):
     Class for handling GCE stuff
     """
 
+    provider = Provider.GCE
+
     def __init__(self, cloud: str = "", **creds) -> None:
         super().__init__(cloud)
+        self.aggregated = creds.pop("aggregated", True)
         try:
             creds = get_creds(creds)
             self.user_id = creds.pop("user_id")
@@ -54,6 +75,10 @@ class GCE(CSP):
         self._creds = creds
         self._driver: NodeDriver | None = None
 
+    @property
+    def identity(self) -> str:
+        return f"{self._creds.get('project', '')}/{self.user_id}"
+
     @cached_property
     def driver(self) -> NodeDriver:
         """
@@ -62,12 +87,16 @@ class GCE(CSP):
         if self._driver is None:
             cls = get_driver(Provider.GCE)
             try:
-                self._driver = cls(self.user_id, **self._creds)
+                with stats.construct(self), tracer.span(
+                    "construct driver", client=self
+                ):
+                    self._driver = cls(self.user_id, **self._creds)
             except (LibcloudError, RequestException) as exc:
                 logging.error("GCE: %s: %s", self.cloud, exc)
                 raise LibcloudError(f"{exc}") from exc
         return self._driver
 
+    @region_stats
     def _list_instances_in_zone(self, zone: GCEZone) -> list[Instance]:
         if zone.status != "UP":
             logging.debug("GCE: %s status is %s", zone.name, zone.status)
@@ -78,21 +107,122 @@ class GCE(CSP):
                 for node in self.driver.list_nodes(ex_zone=zone)
             ]
         except (LibcloudError, RequestException) as exc:
+            if is_throttled(exc):
+                raise
             logging.error("GCE: %s: %s", self.cloud, exc)
             return []
 
+    def _get_zones(self) -> list[GCEZone]:
+        """
+        Get zones from disk cache or API and seed the zone cache of the driver
+        """
+        digest = hashlib.sha256(self._creds.get("project", "").encode("utf-8"))
+        name = f"gce-zones-{digest.hexdigest()[:16]}.json"
+        data, age = load_cache(name) if self.use_cache else (None, 0)
+        try:
+            if data is None or age > ZONES_TTL:
+                raise ValueError
+            zones = [
+                GCEZone(
+                    id=zone["id"],
+                    name=zone["name"],
+                    status=zone["status"],
+                    maintenance_windows=None,
+                    deprecated=None,
+                    driver=self.driver,
+                )
+                for zone in data
+            ]
+        except (KeyError, TypeError, ValueError):
+            zones = self.driver.ex_list_zones()
+            save_cache(
+                name,
+                [{"id": z.id, "name": z.name, "status": z.status} for z in zones],
+            )
+        # pylint: disable=protected-access
+        self.driver._zone_dict = {zone.name: zone for zone in zones}
+        return zones
+
+    def _list_instances(self) -> Iterator[Instance | Task]:
+        """
+        List instances in all zones with the aggregated list, streaming each
+        page.  Yield per-zone tasks instead if the aggregated list fails
+        """
+        try:
+            self._get_zones()
+            items = self._aggregated_items()
+            first = next(items, None)
+        except (BaseHTTPError, LibcloudError) as exc:
+            if is_throttled(exc):
+                raise
+            logging.warning("GCE: %s: using per-zone listing: %s", self.cloud, exc)
+            for zone in self._get_zones():
+                yield Task(self._list_instances_in_zone, zone)
+            return
+        if first is None:
+            return
+        for item in itertools.chain((first,), items):
+            # Skip the lookup of boot disks done by _to_node() for every node
+            disks = item.get("disks", [])
+            try:
+                # pylint: disable=protected-access
+                node = self.driver._to_node({**item, "disks": []})
+            except ResourceNotFoundError:
+                continue
+            node.extra["disks"] = disks
+            yield self._node_to_instance(node)
+
+    def _filter(self) -> str | None:
+        """
+        Get the filter expression of the list for the filters of the client
+        """
+        expressions = []
+        statuses = self.filters.statuses(GCENodeDriver.NODE_STATE_MAP)
+        if statuses is not None:
+            expressions.append(f'(status eq "{"|".join(statuses)}")')
+        regex = self.filters.name_regex()
+        if regex is not None:
+            expressions.append(f'(name eq "{regex}")')
+        globs = self.filters.date_globs(TIMEZONE_MARGIN)
+        if globs is not None:
+            regex = "|".join(glob_to_regex(glob) for glob in globs)
+            expressions.append(f'(creationTimestamp eq "{regex}")')
+        return " ".join(expressions) or None
+
+    def _aggregated_items(self) -> Iterator[dict]:
+        """
+        Yield instances from each page of the aggregated list as it arrives
+        """
+        params: dict[str, str | int] = {"maxResults": PAGE_SIZE}
+        expression = self._filter()
+        if expression is not None:
+            params["filter"] = expression
+        while True:
+            response = self.driver.connection.request(
+                "/aggregated/instances", method="GET", params=dict(params)
+            ).object
+            for scoped in response.get("items", {}).values():
+                yield from scoped.get("instances", [])
+            if "nextPageToken" not in response:
+                break
+            params["pageToken"] = response["nextPageToken"]
+
+    def tasks(self) -> list[Callable[[], Iterable[Instance | Task]]]:
+        if (
+            self.filters.statuses(GCENodeDriver.NODE_STATE_MAP) == []
+            or self.filters.date_globs(TIMEZONE_MARGIN) == []
+        ):
+            return []
+        if self.aggregated:
+            return [self._list_instances]
+        return [
+            partial(self._list_instances_in_zone, zone) for zone in self._get_zones()
+        ]
+
     def _get_instances(self) -> list[Instance]:
-        zones = self.driver.ex_list_zones()
-        instances = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(zones)) as executor:
-            future_to_zone = {
-                executor.submit(self._list_instances_in_zone, zone): zone
-                for zone in zones
-            }
-            for future in concurrent.futures.as_completed(future_to_zone):
-                instances.extend(future.result())
-        return instances
+        return self._run_tasks()
 
+    @traced("node to instance", "convert")
     def _node_to_instance(self, node: Node) -> Instance:
         return Instance(
             provider=Provider.GCE,
@@ -3,19 +3,62 @@ Instance class
 """
 
 import logging
-from dataclasses import dataclass
-from datetime import datetime
+import re
+import sys
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta, timezone
+from fnmatch import fnmatchcase
+from typing import Any, ClassVar
 
-from libcloud.compute.types import NodeState, LibcloudError
-from requests.exceptions import RequestException
+from libcloud.compute.base import Node
+from libcloud.compute.types import NodeState
+
+from cloudview.limits import RateLimiter
+from cloudview.scheduler import scheduler, Task
 
 STATES = [str(getattr(NodeState, _)) for _ in dir(NodeState) if _.isupper()]
 
+# Name patterns that translate to the same regex & wildcards on every provider
+SIMPLE_PATTERN = re.compile(r"[A-Za-z0-9_.*?-]+")
+
+# No instance was created before EC2 was launched
+EPOCH = date(2006, 8, 25)
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translate simple pattern to a regex without backslashes
+    """
+    return "".join({"*": ".*", "?": ".", ".": "[.]"}.get(c, c) for c in pattern)
+
 
-@dataclass(kw_only=True)
+def iso_date_globs(start: date, end: date) -> list[str]:
+    """
+    Get the fewest patterns like 2023-*, 2023-04-* & 2023-04-19* matching
+    ISO 8601 timestamps from start to end dates inclusive
+    """
+    globs = []
+    day = start
+    while day <= end:
+        next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if day.month == day.day == 1 and date(day.year, 12, 31) <= end:
+            globs.append(f"{day.year}-*")
+            day = date(day.year + 1, 1, 1)
+        elif day.day == 1 and next_month - timedelta(days=1) <= end:
+            globs.append(f"{day:%Y-%m}-*")
+            day = next_month
+        else:
+            globs.append(f"{day:%Y-%m-%d}*")
+            day += timedelta(days=1)
+    return globs
+
+
+@dataclass(kw_only=True, slots=True)
 class Instance:  # pylint: disable=too-many-instance-attributes
     """
-    Instance class
+    Instance class.  The provider specific extra is dropped unless
+    keep_extra is set, as it's the bulk of the memory used
     """
 
     provider: str
@@ -26,7 +69,98 @@ class Instance:  # pylint: disable=too-many-instance-attributes
     time: str | datetime
     state: str
     location: str
-    extra: dict
+    extra: dict | None = None
+    keep_extra: ClassVar[bool] = False
+
+    def __post_init__(self) -> None:
+        # These are repeated in most instances
+        for key in ("provider", "cloud", "size", "state", "location"):
+            value = getattr(self, key)
+            if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+                setattr(self, key, sys.intern(value))
+        if not self.keep_extra:
+            self.extra = None
+
+    def __getitem__(self, key: str) -> Any:
+        """
+        Make it usable with str.format_map()
+        """
+        return getattr(self, key)
+
+
+@dataclass(frozen=True)
+class Filters:
+    """
+    Filters on the instances listed.  Providers push them down to their APIs
+    where possible, fetching a superset of the matching instances, so match()
+    is always applied to what they return
+    """
+
+    states: frozenset[str] | None = None
+    name: str | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+    def __bool__(self) -> bool:
+        return any(getattr(self, field.name) is not None for field in fields(self))
+
+    def match(self, instance: Instance | Node) -> bool:
+        """
+        Check whether instance, or the node it's converted from, passes
+        the filters
+        """
+        if self.states is not None and str(instance.state) not in self.states:
+            return False
+        if self.name is not None and not fnmatchcase(instance.name, self.name):
+            return False
+        # Nodes have no time yet
+        created = getattr(instance, "time", None)
+        if isinstance(created, datetime):
+            if self.created_after is not None and created < self.created_after:
+                return False
+            if self.created_before is not None and created > self.created_before:
+                return False
+        return True
+
+    def statuses(self, state_map: Mapping[str, Any]) -> list[str] | None:
+        """
+        Get the provider statuses mapped to the states filtered by, or None if
+        not filtering by state or if unmapped statuses may match as unknown
+        """
+        if self.states is None or str(NodeState.UNKNOWN) in self.states:
+            return None
+        return sorted(
+            status for status, state in state_map.items() if str(state) in self.states
+        )
+
+    def name_pattern(self) -> str | None:
+        """
+        Get the name pattern if it only uses wildcards every provider supports
+        """
+        if self.name is None or not SIMPLE_PATTERN.fullmatch(self.name):
+            return None
+        return self.name
+
+    def name_regex(self) -> str | None:
+        """
+        Get the name pattern as a regex without backslashes
+        """
+        pattern = self.name_pattern()
+        return None if pattern is None else glob_to_regex(pattern)
+
+    def date_globs(self, margin: timedelta = timedelta()) -> list[str] | None:
+        """
+        Get the patterns matching the UTC creation timestamps in the window,
+        widened by margin, or None if not filtering by creation time
+        """
+        if self.created_after is None and self.created_before is None:
+            return None
+        start, end = EPOCH, datetime.now(timezone.utc) + margin
+        if self.created_after is not None:
+            start = (self.created_after - margin).astimezone(timezone.utc).date()
+        if self.created_before is not None:
+            end = min(end, self.created_before + margin)
+        return iso_date_globs(start, end.astimezone(timezone.utc).date())
 
 
 class CSP:
@@ -34,21 +168,72 @@ class CSP:
     Cloud Service Provider class
     """
 
+    # Name of the provider as in clouds.yaml
+    provider = ""
+
     def __init__(self, cloud: str = "") -> None:
         self.cloud = cloud or "_"
+        self.errors = 0
+        self.filters = Filters()
+        self.use_cache = True
+        self.limiter = RateLimiter()
+        self.provider_limiter: RateLimiter | None = None
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(cloud='{self.cloud}')"
 
+    @property
+    def identity(self) -> str:
+        """
+        Get identity of the account of the client, as clouds of different
+        accounts may have the same name
+        """
+        return ""
+
     def _get_instances(self) -> list[Instance]:
         raise NotImplementedError("CSP._get_instances needs to be overridden")
 
+    def _iter_instances(self) -> Iterator[Instance]:
+        yield from self._get_instances()
+
+    def tasks(self) -> list[Callable[[], Iterable[Instance | Task]]]:
+        """
+        Get tasks listing instances, usually one per region or zone.
+        Tasks may also yield more tasks
+        """
+        return [self._iter_instances]
+
+    def _run_tasks(self) -> list[Instance]:
+        """
+        Run tasks sequentially without handling errors
+        """
+        instances = []
+        tasks = self.tasks()
+        while tasks:
+            for item in tasks.pop(0)():
+                if isinstance(item, Task):
+                    tasks.append(item)
+                else:
+                    instances.append(item)
+        return instances
+
+    def log_error(self, exc: Exception) -> None:
+        """
+        Log error
+        """
+        logging.error("%s: %s: %s", self.__class__.__name__, self.cloud, exc)
+        self.errors += 1
+
+    def iter_instances(self) -> Iterator[Instance]:
+        """
+        Iterate over instances as they arrive
+        """
+        for _, instance in scheduler.run([self]):
+            if instance is not None:
+                yield instance
+
     def get_instances(self) -> list[Instance]:
         """
         Get instances
         """
-        try:
-            return self._get_instances()
-        except (LibcloudError, RequestException) as exc:
-            logging.error("%s: %s: %s", self.__class__.__name__, self.cloud, exc)
-            return []
+        return list(self.iter_instances())
@@ -0,0 +1,131 @@
+"""
+In-memory inventory of all clients refreshed in the background
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+from cloudview.instance import Instance, CSP
+from cloudview.scheduler import scheduler
+
+# Default seconds between refreshes
+INTERVAL = 300
+
+
+@dataclass
+class Fetch:
+    """
+    Result of the last fetch of a client.  The instances of the previous
+    fetch are kept if this one had errors
+    """
+
+    instances: list[Instance] = field(default_factory=list)
+    finished: float = 0.0
+    duration: float = 0.0
+    errors: int = 0
+
+
+class Inventory:  # pylint: disable=too-many-instance-attributes
+    """
+    Instances of all clients, kept in memory & refreshed in the background
+    """
+
+    def __init__(self, clients: list[CSP], interval: float = INTERVAL) -> None:
+        self.clients = clients
+        self.interval = interval
+        self.fetches: dict[CSP, Fetch] = {client: Fetch() for client in clients}
+        self.refreshed = 0.0
+        self.generation = 0
+        self._inflight: threading.Event | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def refresh(self) -> None:
+        """
+        Fetch the instances of all clients.  Callers arriving while a fetch
+        is in flight wait for it instead of starting another
+        """
+        done = threading.Event()
+        with self._lock:
+            inflight = self._inflight
+            if inflight is None:
+                self._inflight = done
+        if inflight is not None:
+            inflight.wait()
+            return
+        try:
+            self._refresh()
+        finally:
+            with self._lock:
+                self._inflight = None
+            done.set()
+
+    def _refresh(self) -> None:
+        started = time.monotonic()
+        errors = {client: client.errors for client in self.clients}
+        fetched: dict[CSP, list[Instance]] = {client: [] for client in self.clients}
+        for client, instance in scheduler.run(self.clients):
+            if instance is not None:
+                fetched[client].append(instance)
+                continue
+            instances = fetched.pop(client)
+            fetch = Fetch(
+                instances=instances,
+                finished=time.time(),
+                duration=time.monotonic() - started,
+                errors=client.errors - errors[client],
+            )
+            with self._lock:
+                if fetch.errors and self.fetches[client].finished:
+                    fetch.instances = self.fetches[client].instances
+                self.fetches[client] = fetch
+                self.generation += 1
+        with self._lock:
+            self.refreshed = time.time()
+        logging.info("Refreshed inventory in %.3fs", time.monotonic() - started)
+
+    def snapshot(self) -> dict[CSP, Fetch]:
+        """
+        Get the last fetch of every client
+        """
+        with self._lock:
+            return dict(self.fetches)
+
+    def instances(self) -> Iterator[Instance]:
+        """
+        Yield the instances of all clients
+        """
+        for fetch in self.snapshot().values():
+            yield from fetch.instances
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                logging.error("Refreshing inventory: %s", exc)
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """
+        Start refreshing every interval seconds in a background thread
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="inventory")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """
+        Stop refreshing, waiting for the current refresh unless wait is False
+        """
+        self._stop.set()
+        if self._thread is not None and wait:
+            self._thread.join()
+        self._thread = None
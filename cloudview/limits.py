@@ -0,0 +1,171 @@
+"""
+Rate limiting of requests
+"""
+
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+from typing import Any
+
+import requests
+from libcloud.common.exceptions import BaseHTTPError
+
+from cloudview.session import add_middleware
+
+# Backoff delays in seconds
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+# Back off when Azure reports fewer remaining requests than this
+LOW_QUOTA = 10
+
+# HTTP status codes signaling throttling
+THROTTLE_CODES = {429, 503}
+
+# Error codes signaling throttling
+THROTTLE_ERRORS = ("requestlimitexceeded", "throttling", "ratelimitexceeded")
+
+
+def is_throttled(exc: Exception) -> bool:
+    """
+    Check if exception signals throttling
+    """
+    if isinstance(exc, BaseHTTPError) and exc.code in THROTTLE_CODES:
+        return True
+    return any(error in str(exc).lower() for error in THROTTLE_ERRORS)
+
+
+class RateLimiter:  # pylint: disable=too-many-instance-attributes
+    """
+    Token bucket limiting requests per second with an optional cap on
+    requests in flight.  Requests are paused when the provider throttles
+    """
+
+    def __init__(self, rate: float = 0, burst: int = 0, concurrency: int = 0):
+        if rate < 0 or burst < 0 or concurrency < 0:
+            raise ValueError("rate, burst & concurrency must not be negative")
+        self.rate = float(rate)
+        self.burst = burst or max(1, int(rate))
+        self.concurrency = concurrency
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._semaphore = (
+            threading.BoundedSemaphore(concurrency) if concurrency else None
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(rate={self.rate}, burst={self.burst}, "
+            f"concurrency={self.concurrency})"
+        )
+
+    def _wait_time(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if self._paused_until > now:
+                return self._paused_until - now
+            if not self.rate:
+                return 0
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """
+        Wait until a request may be made
+        """
+        if self._semaphore is not None:
+            self._semaphore.acquire()  # pylint: disable=consider-using-with
+        while delay := self._wait_time():
+            time.sleep(delay)
+
+    def release(self) -> None:
+        """
+        Release request slot
+        """
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def __enter__(self) -> "RateLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.release()
+
+    @property
+    def paused(self) -> bool:
+        """
+        Check if requests are paused
+        """
+        return self._paused_until > time.monotonic()
+
+    def backoff(self, delay: float = 0) -> None:
+        """
+        Pause requests for delay seconds or with exponential backoff
+        """
+        with self._lock:
+            self._failures += 1
+            if not delay:
+                delay = min(MAX_DELAY, BASE_DELAY * 2 ** (self._failures - 1))
+                delay *= random.uniform(0.5, 1.5)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logging.debug("Backing off for %.1f seconds", delay)
+
+    def observe(self, response: requests.Response) -> None:
+        """
+        Back off when response signals throttling or a low quota
+        """
+        if response.status_code in THROTTLE_CODES or (
+            response.status_code == 403
+            and b"ratelimitexceeded" in response.content[:1024].lower()
+        ):
+            try:
+                self.backoff(float(response.headers.get("Retry-After", 0)))
+            except ValueError:
+                self.backoff()
+            return
+        remaining = [
+            int(value)
+            for key, value in response.headers.items()
+            if key.lower().startswith("x-ms-ratelimit-remaining-") and value.isdigit()
+        ]
+        if remaining and min(remaining) < LOW_QUOTA:
+            self.backoff(BASE_DELAY)
+        elif response.ok:
+            with self._lock:
+                self._failures = 0
+
+
+def limit_requests(send, client: Any, request, **kwargs) -> requests.Response:
+    """
+    Middleware enforcing the rate limits of client
+    """
+    limiters = [
+        limiter
+        for limiter in (
+            getattr(client, "limiter", None),
+            getattr(client, "provider_limiter", None),
+        )
+        if limiter is not None
+    ]
+    with ExitStack() as stack:
+        for limiter in limiters:
+            stack.enter_context(limiter)
+        response = send(request, **kwargs)
+    if limiters:
+        limiters[0].observe(response)
+    return response
+
+
+add_middleware(limit_requests)
@@ -0,0 +1,131 @@
+"""
+Prometheus exporter of the inventory
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+
+from cloudview.instance import CSP
+from cloudview.inventory import Fetch, Inventory
+from cloudview.server import Handler, Server
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default port for --serve-metrics
+PORT = 9877
+
+METRICS = (
+    ("cloudview_instances", "gauge", "Number of instances"),
+    ("cloudview_oldest_instance_age_seconds", "gauge", "Age of the oldest instance"),
+    ("cloudview_fetch_duration_seconds", "gauge", "Seconds taken by the last fetch"),
+    ("cloudview_fetch_errors", "gauge", "Errors in the last fetch"),
+    ("cloudview_errors_total", "counter", "Errors in all fetches"),
+    ("cloudview_last_fetch_timestamp_seconds", "gauge", "Time of the last fetch"),
+)
+
+
+def escape(value: Any) -> str:
+    """
+    Escape label value
+    """
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def labels(**kwargs: Any) -> str:
+    """
+    Format labels
+    """
+    return ",".join(f'{key}="{escape(value)}"' for key, value in kwargs.items())
+
+
+class Metrics:
+    """
+    Render the metrics of the inventory, aggregating the instances of a
+    client only once per fetch
+    """
+
+    def __init__(self, inventory: Inventory) -> None:
+        self.inventory = inventory
+        self._aggregates: dict[CSP, tuple[Fetch, Counter, float | None]] = {}
+
+    def _aggregate(self, client: CSP, fetch: Fetch) -> tuple[Counter, float | None]:
+        cached = self._aggregates.get(client)
+        if cached is not None and cached[0] is fetch:
+            return cached[1], cached[2]
+        counts: Counter[tuple[str, str, str]] = Counter()
+        oldest = None
+        for instance in fetch.instances:
+            counts[(instance.state, instance.size, instance.location)] += 1
+            if isinstance(instance.time, datetime):
+                created = instance.time.timestamp()
+                if oldest is None or created < oldest:
+                    oldest = created
+        self._aggregates[client] = (fetch, counts, oldest)
+        return counts, oldest
+
+    def samples(self, now: float) -> Iterator[tuple[str, str, Any]]:
+        """
+        Yield (name, labels, value) of every sample
+        """
+        for client, fetch in self.inventory.snapshot().items():
+            if not fetch.finished:
+                continue
+            counts, oldest = self._aggregate(client, fetch)
+            cloud = labels(provider=client.provider, cloud=client.cloud)
+            for (state, size, location), count in sorted(counts.items()):
+                extra = labels(state=state, size=size, location=location)
+                yield "cloudview_instances", f"{cloud},{extra}", count
+            if oldest is not None:
+                yield "cloudview_oldest_instance_age_seconds", cloud, round(
+                    now - oldest
+                )
+            yield "cloudview_fetch_duration_seconds", cloud, round(fetch.duration, 3)
+            yield "cloudview_fetch_errors", cloud, fetch.errors
+            yield "cloudview_errors_total", cloud, client.errors
+            yield "cloudview_last_fetch_timestamp_seconds", cloud, round(fetch.finished)
+
+    def render(self, now: float | None = None) -> str:
+        """
+        Render metrics in the Prometheus text format
+        """
+        samples: dict[str, list[str]] = {name: [] for name, _, _ in METRICS}
+        for name, xlabels, value in self.samples(time.time() if now is None else now):
+            samples[name].append(f"{name}{{{xlabels}}} {value}")
+        lines = []
+        for name, kind, text in METRICS:
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples[name])
+        return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(Handler):
+    """
+    Serve /metrics from memory
+    """
+
+    server: MetricsServer
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Handle GET
+        """
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        self.reply(self.server.metrics.render(), CONTENT_TYPE)
+
+
+class MetricsServer(Server):
+    """
+    HTTP server of the metrics
+    """
+
+    def __init__(self, address: tuple[str, int], metrics: Metrics) -> None:
+        super().__init__(address, MetricsHandler)
+        self.metrics = metrics
@@ -4,21 +4,58 @@ https://libcloud.readthedocs.io/en/stable/compute/drivers/openstack.html
 https://docs.openstack.org/python-openstackclient/latest/cli/man/openstack.html
 """
 
+import hashlib
 import logging
 import os
+import threading
+from collections import defaultdict
+from collections.abc import Iterator
 from functools import cached_property
+from typing import Any
 from urllib.parse import urlparse
 
-import libcloud.security
+from libcloud.common.exceptions import BaseHTTPError
 from libcloud.compute.base import Node, NodeDriver, NodeSize
+from libcloud.compute.drivers.openstack import OpenStackNodeDriver
 from libcloud.compute.providers import get_driver
 from libcloud.compute.types import Provider, LibcloudError
 from requests.exceptions import RequestException
 
 from cloudview.instance import Instance, CSP
-from cloudview.utils import utc_date
+from cloudview.stats import stats
+from cloudview.trace import traced, tracer
+from cloudview.utils import utc_date, load_cache, save_cache
 
-libcloud.security.CA_CERTS_PATH = os.getenv("REQUESTS_CA_BUNDLE")
+# Flavors rarely change so keep them on disk for a week
+FLAVORS_TTL = 7 * 24 * 3600
+
+# Statuses accepted by the status filter of the servers list.  Deleted
+# servers aren't listed unless admin so DELETED is left out
+SERVER_STATUSES = frozenset(
+    {
+        "ACTIVE",
+        "BUILD",
+        "ERROR",
+        "HARD_REBOOT",
+        "MIGRATING",
+        "PASSWORD",
+        "PAUSED",
+        "REBOOT",
+        "REBUILD",
+        "RESCUE",
+        "RESIZE",
+        "REVERT_RESIZE",
+        "SHELVED",
+        "SHELVED_OFFLOADED",
+        "SHUTOFF",
+        "SUSPENDED",
+        "VERIFY_RESIZE",
+    }
+)
+
+# Flavor id to name index shared by all clouds using the same endpoint
+_flavors: dict[str, dict[str, str]] = {}
+_flavors_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
 
 
 def get_creds() -> dict:
@@ -59,6 +96,8 @@ class Openstack(CSP):
     Class for handling Openstack stuff
     """
 
+    provider = Provider.OPENSTACK
+
     def __init__(self, cloud: str = "", **creds) -> None:
         super().__init__(cloud)
         creds = creds or get_creds()
@@ -70,6 +109,17 @@ class Openstack(CSP):
         self._creds = creds
         self._driver: NodeDriver | None = None
         self.options = {"ex_all_tenants": False}
+        self._endpoint = (
+            creds.get("ex_force_base_url")
+            or creds.get("ex_force_auth_url")
+            or self.cloud
+        )
+
+    @property
+    def identity(self) -> str:
+        domain = self._creds.get("ex_domain_name", "")
+        project = self._creds.get("ex_tenant_name", "")
+        return f"{self._endpoint}/{domain}/{project}/{self.key}"
 
     @cached_property
     def driver(self) -> NodeDriver:
@@ -79,7 +129,10 @@ class Openstack(CSP):
         if self._driver is None:
             cls = get_driver(Provider.OPENSTACK)
             try:
-                self._driver = cls(self.key, **self._creds)
+                with stats.construct(self), tracer.span(
+                    "construct driver", client=self
+                ):
+                    self._driver = cls(self.key, **self._creds)
             except LibcloudError as exc:
                 logging.error("Openstack: %s: %s", self.cloud, exc)
                 raise
@@ -89,10 +142,49 @@ class Openstack(CSP):
         return self._driver
 
     def _get_size(self, size_id: str) -> str:
-        for size in self._get_sizes():
-            if size.id == size_id:
-                return size.name
-        return "unknown"
+        flavors = _flavors.get(self._endpoint, {})
+        if size_id in flavors:
+            return flavors[size_id]
+        with _flavors_locks[self._endpoint]:
+            flavors = self._get_flavors()
+            if size_id not in flavors:
+                flavors[size_id] = self._fetch_flavor(size_id)
+                self._save_flavors(flavors)
+        return flavors[size_id]
+
+    def _get_flavors(self) -> dict[str, str]:
+        """
+        Get flavor index, loading it from disk or listing all flavors once
+        """
+        if self._endpoint in _flavors:
+            return _flavors[self._endpoint]
+        flavors, age = load_cache(self._cache_name) if self.use_cache else (None, 0)
+        if not isinstance(flavors, dict) or age > FLAVORS_TTL:
+            flavors = {size.id: size.name for size in self._get_sizes()}
+            self._save_flavors(flavors)
+        _flavors[self._endpoint] = flavors
+        return flavors
+
+    def _fetch_flavor(self, size_id: str) -> str:
+        """
+        Fetch a single flavor missing from the index
+        """
+        try:
+            return self.driver.ex_get_size(size_id).name
+        except (BaseHTTPError, LibcloudError, RequestException) as exc:
+            logging.debug("Openstack: %s: flavor %s: %s", self.cloud, size_id, exc)
+            return "unknown"
+
+    def _save_flavors(self, flavors: dict[str, str]) -> None:
+        save_cache(
+            self._cache_name,
+            {key: value for key, value in flavors.items() if value != "unknown"},
+        )
+
+    @cached_property
+    def _cache_name(self) -> str:
+        digest = hashlib.sha256(self._endpoint.encode("utf-8")).hexdigest()
+        return f"flavors-{digest[:16]}.json"
 
     def _get_sizes(self) -> list[NodeSize]:
         try:
@@ -101,12 +193,45 @@ class Openstack(CSP):
             logging.error("Openstack: %s: %s", self.cloud, exc)
             raise
 
+    def _params(self) -> dict[str, Any] | None:
+        """
+        Get the query parameters of the servers list for the filters of the
+        client or None if no instance can match
+        """
+        params: dict[str, Any] = {}
+        statuses = self.filters.statuses(OpenStackNodeDriver.NODE_STATE_MAP)
+        if statuses is not None:
+            params["status"] = [s for s in statuses if s in SERVER_STATUSES]
+            if not params["status"]:
+                return None
+        regex = self.filters.name_regex()
+        if regex is not None:
+            params["name"] = f"^{regex}$"
+        return params
+
+    def _list_nodes(self) -> list[Node]:
+        params = self._params()
+        if params is None:
+            return []
+        if not params:
+            return self.driver.list_nodes(**self.options)
+        if self.options["ex_all_tenants"]:
+            params["all_tenants"] = 1
+        # pylint: disable=protected-access
+        return self.driver._to_nodes(
+            self.driver._paginated_request(
+                "/servers/detail", "servers", self.driver.connection, params=params
+            )
+        )
+
+    def _iter_instances(self) -> Iterator[Instance]:
+        for node in self._list_nodes():
+            yield self._node_to_instance(node)
+
     def _get_instances(self) -> list[Instance]:
-        return [
-            self._node_to_instance(node)
-            for node in self.driver.list_nodes(**self.options)
-        ]
+        return list(self._iter_instances())
 
+    @traced("node to instance", "convert")
     def _node_to_instance(self, node: Node) -> Instance:
         return Instance(
             provider=Provider.OPENSTACK,
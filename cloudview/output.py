@@ -0,0 +1,166 @@
+"""
+Output writers
+"""
+
+import csv
+import json
+from datetime import datetime
+from typing import Any, TextIO
+
+from cloudview.instance import Instance
+from cloudview.utils import DateRenderer
+
+TIME_FORMAT = "%a %b %d %H:%M:%S %Z %Y"
+
+
+class Writer:
+    """
+    Base class for writers of instances
+    """
+
+    def __init__(
+        self, file: TextIO, fields: list[str], time_format: str = TIME_FORMAT
+    ) -> None:
+        self.file = file
+        self.fields = fields
+        self.time_format = time_format
+
+    def header(self) -> None:
+        """
+        Write header
+        """
+
+    def write(self, instance: Instance) -> None:
+        """
+        Write instance
+        """
+        raise NotImplementedError("Writer.write needs to be overridden")
+
+    def footer(self) -> None:
+        """
+        Write footer
+        """
+
+
+class TableWriter(Writer):
+    """
+    Write instances as a table for humans
+    """
+
+    ALIGN = {
+        "provider": "<15",
+        "name": "<50",
+        "size": ">20",
+        "state": ">10",
+        "time": "<30",
+        "location": "<15",
+    }
+
+    def __init__(
+        self, file: TextIO, fields: list[str], time_format: str = TIME_FORMAT
+    ) -> None:
+        super().__init__(file, fields, time_format)
+        align = dict(self.ALIGN)
+        if time_format in {"age", "timeago"}:
+            align["time"] = "<15"
+        self.format = "  ".join(f"{{{key}:{align.get(key, '')}}}" for key in fields)
+        self.render = DateRenderer(time_format)
+
+    def header(self) -> None:
+        self.file.write(
+            self.format.format_map({key: key.upper() for key in self.fields}) + "\n"
+        )
+
+    def write(self, instance: Instance) -> None:
+        row = {key: getattr(instance, key) for key in self.fields}
+        if "provider" in row:
+            row["provider"] = f"{instance.provider}/{instance.cloud}"
+        if isinstance(instance.time, datetime):
+            row["time"] = self.render(instance.time)
+        self.file.write(self.format.format_map(row) + "\n")
+
+
+class MachineWriter(Writer):  # pylint: disable=abstract-method
+    """
+    Base class for machine readable writers.  Timestamps are in ISO 8601
+    and the cloud is added after the provider
+    """
+
+    def __init__(
+        self, file: TextIO, fields: list[str], time_format: str = TIME_FORMAT
+    ) -> None:
+        if "provider" in fields and "cloud" not in fields:
+            index = fields.index("provider") + 1
+            fields = fields[:index] + ["cloud"] + fields[index:]
+        super().__init__(file, fields, time_format)
+
+    def to_dict(self, instance: Instance) -> dict[str, Any]:
+        """
+        Get the fields of instance
+        """
+        item = {key: getattr(instance, key) for key in self.fields}
+        if isinstance(item.get("time"), datetime):
+            item["time"] = item["time"].isoformat()
+        return item
+
+
+class NDJSONWriter(MachineWriter):
+    """
+    Write instances as newline delimited JSON
+    """
+
+    def write(self, instance: Instance) -> None:
+        self.file.write(json.dumps(self.to_dict(instance), default=str) + "\n")
+
+
+class JSONWriter(MachineWriter):
+    """
+    Write instances as a JSON array
+    """
+
+    def __init__(
+        self, file: TextIO, fields: list[str], time_format: str = TIME_FORMAT
+    ) -> None:
+        super().__init__(file, fields, time_format)
+        self.separator = "\n"
+
+    def header(self) -> None:
+        self.file.write("[")
+
+    def write(self, instance: Instance) -> None:
+        self.file.write(
+            self.separator + json.dumps(self.to_dict(instance), default=str)
+        )
+        self.separator = ",\n"
+
+    def footer(self) -> None:
+        self.file.write("\n]\n")
+
+
+class CSVWriter(MachineWriter):
+    """
+    Write instances as CSV
+    """
+
+    def __init__(
+        self, file: TextIO, fields: list[str], time_format: str = TIME_FORMAT
+    ) -> None:
+        super().__init__(file, fields, time_format)
+        self.writer = csv.DictWriter(file, fieldnames=self.fields)
+
+    def header(self) -> None:
+        self.writer.writeheader()
+
+    def write(self, instance: Instance) -> None:
+        item = self.to_dict(instance)
+        if item.get("extra") is not None:
+            item["extra"] = json.dumps(item["extra"], default=str)
+        self.writer.writerow(item)
+
+
+WRITERS: dict[str, type[Writer]] = {
+    "table": TableWriter,
+    "json": JSONWriter,
+    "ndjson": NDJSONWriter,
+    "csv": CSVWriter,
+}
@@ -0,0 +1,148 @@
+"""
+Profile the main thread & the workers running tasks, saving pstats and
+collapsed stacks for flamegraphs
+"""
+
+import cProfile
+import logging
+import pstats
+import sys
+import threading
+from collections import Counter
+from collections.abc import Callable
+from functools import wraps
+from types import FrameType
+from typing import Any
+
+# Seconds between samples of the stacks
+INTERVAL = 0.005
+
+# Since Python 3.12 cProfile uses sys.monitoring, which profiles every thread
+# and allows a single active profiler per interpreter
+SHARED_PROFILE = sys.version_info >= (3, 12)
+
+
+def collapse(frame: FrameType | None, root: str) -> str:
+    """
+    Get stack of frame as root;caller;...;callee
+    """
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    stack.append(root)
+    return ";".join(reversed(stack))
+
+
+class Profiler:  # pylint: disable=too-many-instance-attributes
+    """
+    Profile each thread with cProfile, or all threads with the profile of the
+    main thread where cProfile uses sys.monitoring, and sample the stacks of
+    the busy threads for flamegraphs
+    """
+
+    def __init__(self, interval: float = INTERVAL) -> None:
+        self.enabled = False
+        self.interval = interval
+        self.profiles: list[cProfile.Profile] = []
+        self.samples: Counter[str] = Counter()
+        self._busy: dict[int, str] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def _profile(self) -> cProfile.Profile:
+        """
+        Get profile of the current thread, creating it on first use
+        """
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self.profiles.append(profile)
+        return profile
+
+    def enable(self) -> None:
+        """
+        Start profiling the current thread & the tasks run by wrap()
+        """
+        self.enabled = True
+        self.profiles.clear()
+        self.samples.clear()
+        self._stop.clear()
+        self._local = threading.local()
+        self._busy[threading.get_ident()] = threading.current_thread().name
+        self._sampler = threading.Thread(target=self._sample, name="profiler")
+        self._sampler.daemon = True
+        self._sampler.start()
+        self._profile().enable()
+
+    def disable(self) -> None:
+        """
+        Stop profiling
+        """
+        self._profile().disable()
+        self.enabled = False
+        self._busy.pop(threading.get_ident(), None)
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def wrap(self, func: Callable) -> Callable:
+        """
+        Wrap func to profile it in the thread that runs it
+        """
+        if not self.enabled:
+            return func
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            ident = threading.get_ident()
+            self._busy[ident] = threading.current_thread().name
+            profile = None if SHARED_PROFILE else self._profile()
+            try:
+                if profile is not None:
+                    profile.enable()
+                return func(*args, **kwargs)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                self._busy.pop(ident, None)
+
+        return wrapper
+
+    def _sample(self) -> None:
+        """
+        Sample the stacks of busy threads until stopped
+        """
+        # pylint: disable=protected-access
+        while not self._stop.wait(self.interval):
+            busy = dict(self._busy)
+            for ident, frame in sys._current_frames().items():
+                if ident in busy:
+                    self.samples[collapse(frame, busy[ident])] += 1
+
+    def save(self, prefix: str) -> None:
+        """
+        Save pstats to prefix.pstats & collapsed stacks to prefix.collapsed
+        """
+        stats = pstats.Stats()
+        for profile in self.profiles:
+            if profile.getstats():
+                stats.add(profile)
+        stats.dump_stats(f"{prefix}.pstats")
+        with open(f"{prefix}.collapsed", "w", encoding="utf-8") as file:
+            for stack, count in sorted(self.samples.items()):
+                file.write(f"{stack} {count}\n")
+        logging.info(
+            "Saved profile of %d threads to %s.pstats & %s.collapsed",
+            len(self.profiles),
+            prefix,
+            prefix,
+        )
+
+
+profiler = Profiler()
@@ -0,0 +1,36 @@
+"""
+Registry of providers importing the module of each on first use, as the
+drivers they pull in take long to import
+"""
+
+from collections.abc import Iterator, Mapping
+from importlib import import_module
+
+from cloudview.instance import CSP
+
+
+class Registry(Mapping[str, type[CSP]]):
+    """
+    Map provider names to their classes, given as "module:class"
+    """
+
+    def __init__(self, classes: dict[str, str]) -> None:
+        self._classes = classes
+        self._loaded: dict[str, type[CSP]] = {}
+
+    def __getitem__(self, name: str) -> type[CSP]:
+        try:
+            return self._loaded[name]
+        except KeyError:
+            module, _, cls = self._classes[name].partition(":")
+            self._loaded[name] = getattr(import_module(module), cls)
+            return self._loaded[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._classes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._classes)
+
+    def __len__(self) -> int:
+        return len(self._classes)
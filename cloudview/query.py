@@ -0,0 +1,84 @@
+"""
+Indexed queries of instances
+"""
+
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime
+from fnmatch import fnmatchcase
+
+from cloudview.instance import Instance
+
+# Fields with a secondary index
+INDEXED = ("provider", "cloud", "state", "location", "size")
+
+
+class Index:
+    """
+    Instances with secondary indexes on the INDEXED fields and on time
+    """
+
+    def __init__(self, instances: Iterable[Instance]) -> None:
+        self.instances = list(instances)
+        self.values: dict[str, dict[str, list[int]]] = {
+            key: defaultdict(list) for key in INDEXED
+        }
+        dated = []
+        for pos, instance in enumerate(self.instances):
+            for key, values in self.values.items():
+                values[getattr(instance, key)].append(pos)
+            if isinstance(instance.time, datetime):
+                dated.append((instance.time.timestamp(), pos))
+        dated.sort()
+        self.times = [stamp for stamp, _ in dated]
+        self.by_time = [pos for _, pos in dated]
+
+    def __len__(self) -> int:
+        return len(self.instances)
+
+    def _created(self, after: float | None, before: float | None) -> set[int]:
+        """
+        Get positions of instances created between after & before
+        """
+        low = 0 if after is None else bisect_left(self.times, after)
+        high = len(self.times) if before is None else bisect_right(self.times, before)
+        return set(self.by_time[low:high])
+
+    def search(  # pylint: disable=too-many-arguments
+        self,
+        filters: dict[str, list[str]] | None = None,
+        name: str | None = None,
+        older_than: float | None = None,
+        newer_than: float | None = None,
+        now: float | None = None,
+    ) -> list[Instance]:
+        """
+        Get instances matching any of the values of every field in filters,
+        whose name matches the shell-style pattern and whose age in seconds
+        is within older_than & newer_than
+        """
+        matches = [
+            set().union(*(self.values[key].get(value, ()) for value in values))
+            for key, values in (filters or {}).items()
+        ]
+        if older_than is not None or newer_than is not None:
+            now = time.time() if now is None else now
+            matches.append(
+                self._created(
+                    None if newer_than is None else now - newer_than,
+                    None if older_than is None else now - older_than,
+                )
+            )
+        if matches:
+            matches.sort(key=len)
+            positions = matches[0].intersection(*matches[1:])
+            instances = [self.instances[pos] for pos in sorted(positions)]
+        else:
+            instances = list(self.instances)
+        if name:
+            instances = [
+                instance for instance in instances if fnmatchcase(instance.name, name)
+            ]
+        return instances
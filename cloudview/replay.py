@@ -0,0 +1,247 @@
+"""
+Record HTTP exchanges of a run to a file and replay them offline
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import defaultdict, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from cloudview.session import add_middleware, remove_middleware
+
+REDACTED = "REDACTED"
+
+# Query parameters, JSON keys, XML elements, headers & the values of metadata
+# items or tags named with any of these are redacted.  The "-script" suffix
+# matches startup & shutdown scripts in GCE metadata
+SECRETS = (
+    "key",
+    "secret",
+    "token",
+    "password",
+    "signature",
+    "credential",
+    "-script",
+    "user-data",
+    "userdata",
+    "customdata",
+)
+
+# Except for these used for pagination
+NOT_SECRETS = {"pagetoken", "nextpagetoken", "nexttoken", "$skiptoken"}
+
+# Response headers not worth recording or wrong once the body is decoded
+SKIP_HEADERS = {"content-encoding", "content-length", "set-cookie", "transfer-encoding"}
+
+
+def _is_secret(name: str) -> bool:
+    name = name.lower()
+    return name not in NOT_SECRETS and any(secret in name for secret in SECRETS)
+
+
+def sanitize_url(url: str) -> str:
+    """
+    Redact secrets in query string of URL
+    """
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [
+        (key, REDACTED if _is_secret(key) else value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _pair_name(item: dict) -> str | None:
+    """
+    Get name of metadata item or tag given as {"key": name, "value": value}
+    """
+    fields = {str(key).lower(): value for key, value in item.items()}
+    name = fields.get("key")
+    return name if isinstance(name, str) and "value" in fields else None
+
+
+def sanitize_json(data: Any) -> Any:
+    """
+    Redact secrets in JSON data
+    """
+    if isinstance(data, list):
+        return [sanitize_json(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    name = _pair_name(data)
+    sanitized = {}
+    for key, value in data.items():
+        if name is not None and key.lower() in {"key", "value"}:
+            # The value is secret if its name is, not the harmless name itself
+            secret = key.lower() == "value" and _is_secret(name)
+        else:
+            secret = _is_secret(key)
+        sanitized[key] = (
+            REDACTED if secret and isinstance(value, str) else sanitize_json(value)
+        )
+    return sanitized
+
+
+def sanitize_xml(element: ET.Element) -> bool:
+    """
+    Redact secrets in children of XML element, returning whether any was
+    """
+    children = {child.tag.rpartition("}")[2].lower(): child for child in element}
+    name, value = children.get("key"), children.get("value")
+    if name is not None and value is not None:
+        if not _is_secret(name.text or "") or not value.text or len(value):
+            return False
+        value.text = REDACTED
+        return True
+    redacted = False
+    for child in element:
+        if len(child):
+            redacted |= sanitize_xml(child)
+        elif child.text and _is_secret(child.tag.rpartition("}")[2]):
+            child.text = REDACTED
+            redacted = True
+    return redacted
+
+
+def sanitize_body(body: str) -> str:
+    """
+    Redact secrets in body if it's JSON or XML
+    """
+    try:
+        return json.dumps(sanitize_json(json.loads(body)))
+    except ValueError:
+        pass
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return body
+    # Keep the body as is unless something was redacted
+    return ET.tostring(root, encoding="unicode") if sanitize_xml(root) else body
+
+
+class Recorder:
+    """
+    Middleware recording sanitized HTTP exchanges
+    """
+
+    def __init__(self) -> None:
+        self.start = time.monotonic()
+        self.exchanges: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, send, client: Any, request, **kwargs) -> requests.Response:
+        started = time.monotonic()
+        response = send(request, **kwargs)
+        elapsed = time.monotonic() - started
+        exchange = {
+            "client": repr(client),
+            "method": request.method,
+            "url": sanitize_url(request.url),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                key: REDACTED if _is_secret(key) else value
+                for key, value in response.headers.items()
+                if key.lower() not in SKIP_HEADERS
+            },
+            "body": sanitize_body(response.content.decode("utf-8", errors="replace")),
+            "started": started - self.start,
+            "elapsed": elapsed,
+        }
+        with self._lock:
+            self.exchanges.append(exchange)
+        return response
+
+    def save(self, path: str) -> None:
+        """
+        Save recording to path
+        """
+        with self._lock:
+            exchanges = sorted(self.exchanges, key=lambda e: e["started"])
+        with open(
+            os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600),
+            "w",
+            encoding="utf-8",
+        ) as file:
+            json.dump({"version": 1, "exchanges": exchanges}, file, indent=1)
+        logging.info("Recorded %d HTTP exchanges to %s", len(exchanges), path)
+
+
+class Replayer:  # pylint: disable=too-few-public-methods
+    """
+    Middleware serving recorded responses instead of sending requests.
+    Each response takes its recorded time multiplied by scale
+    """
+
+    def __init__(self, path: str, scale: float = 1.0) -> None:
+        with open(path, encoding="utf-8") as file:
+            exchanges = json.load(file)["exchanges"]
+        self.scale = scale
+        self._responses: dict[tuple[str, str], deque[dict]] = defaultdict(deque)
+        for exchange in exchanges:
+            self._responses[exchange["method"], exchange["url"]].append(exchange)
+        self._lock = threading.Lock()
+
+    def _get(self, method: str, url: str) -> dict | None:
+        with self._lock:
+            responses = self._responses.get((method, sanitize_url(url)))
+            if not responses:
+                return None
+            # Keep the last response for requests made more times than recorded
+            return responses.popleft() if len(responses) > 1 else responses[0]
+
+    def __call__(self, send, client: Any, request, **kwargs) -> requests.Response:
+        exchange = self._get(request.method, request.url)
+        if exchange is None:
+            raise requests.exceptions.ConnectionError(
+                f"No recording for {request.method} {sanitize_url(request.url)}",
+                request=request,
+            )
+        time.sleep(exchange["elapsed"] * self.scale)
+        response = requests.Response()
+        response.status_code = exchange["status"]
+        response.reason = exchange["reason"]
+        response.headers = CaseInsensitiveDict(exchange["headers"])
+        response._content = exchange["body"].encode(
+            "utf-8"
+        )  # pylint: disable=protected-access
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+
+@contextmanager
+def record_replay(
+    record: str | None = None, replay: str | None = None, scale: float = 1.0
+) -> Iterator[None]:
+    """
+    Record HTTP exchanges to file and/or replay them from file
+    """
+    middlewares: list[Recorder | Replayer] = []
+    if replay:
+        middlewares.append(Replayer(replay, scale))
+    recorder = Recorder()
+    if record:
+        middlewares.append(recorder)
+    for middleware in middlewares:
+        add_middleware(middleware)
+    try:
+        yield
+    finally:
+        for middleware in middlewares:
+            remove_middleware(middleware)
+        if record:
+            recorder.save(record)
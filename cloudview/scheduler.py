@@ -0,0 +1,221 @@
+"""
+Scheduler running the tasks of all clients on a single bounded thread pool
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from libcloud.common.exceptions import BaseHTTPError
+from libcloud.compute.types import LibcloudError
+from requests.exceptions import RequestException
+
+from cloudview.limits import is_throttled
+from cloudview.profiler import profiler
+from cloudview.session import client_context
+from cloudview.trace import tracer
+
+if TYPE_CHECKING:
+    from cloudview.instance import Instance, CSP
+
+# Global limit of concurrent tasks
+MAX_WORKERS = min(32, 4 * (os.cpu_count() or 1))
+
+# Maximum number of results buffered before workers block
+QUEUE_SIZE = 1024
+
+# Maximum number of times a throttled task is retried
+MAX_RETRIES = 5
+
+ERRORS = (BaseHTTPError, LibcloudError, RequestException)
+
+
+class Task(partial):  # pylint: disable=too-few-public-methods
+    """
+    Task yielded by another task to be run separately
+    """
+
+
+def task_name(task: Callable) -> str:
+    """
+    Get name of task with the arguments of a partial, like a region or zone
+    """
+    func = getattr(task, "func", task)
+    name = getattr(func, "__qualname__", repr(func))
+    args = ", ".join(
+        getattr(arg, "name", str(arg)) for arg in getattr(task, "args", ())
+    )
+    return f"{name}({args})"
+
+
+class Scheduler:
+    """
+    Run the tasks of every client on a single bounded thread pool.  Tasks
+    never wait on other tasks so the pool can be shared without deadlocks
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, maxsize: int = QUEUE_SIZE):
+        self.max_workers = max_workers
+        self.maxsize = maxsize
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(max_workers={self.max_workers})"
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Get thread pool, creating it on first use
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="cloudview"
+                )
+            return self._executor
+
+    def submit(self, func: Callable, *args: Any) -> Future:
+        """
+        Submit task to the thread pool
+        """
+        return self.executor.submit(profiler.wrap(func), *args)
+
+    def run(self, clients: list[CSP]) -> Iterator[tuple[CSP, Instance | None]]:
+        """
+        Yield (client, instance) tuples as they arrive and (client, None)
+        when all tasks of a client are done.  Workers block while the
+        bounded queue is full and stop early if the iterator is closed
+        """
+        if not clients:
+            return iter(())
+        return iter(_Run(self, clients))
+
+
+class _Run:
+    """
+    State of a single Scheduler.run()
+    """
+
+    def __init__(self, parent: Scheduler, clients: list[CSP]) -> None:
+        self.scheduler = parent
+        self.clients = clients
+        self.results: queue.Queue = queue.Queue(maxsize=parent.maxsize)
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.pending = {client: 1 for client in clients}
+
+    def __iter__(self) -> Iterator[tuple[CSP, Instance | None]]:
+        for client in self.clients:
+            self.start(client, self.plan)
+        try:
+            remaining = len(self.clients)
+            while remaining:
+                client, item = self.results.get()
+                if isinstance(item, BaseException):
+                    raise item
+                if item is None:
+                    remaining -= 1
+                yield client, item
+        finally:
+            self.stop.set()
+
+    def put(self, item: tuple[CSP, Any]) -> bool:
+        """
+        Put item in queue unless stopped
+        """
+        while not self.stop.is_set():
+            try:
+                self.results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def start(self, client: CSP, func: Callable, *args: Any) -> None:
+        """
+        Submit task of client already counted as pending
+        """
+        future = self.scheduler.submit(func, client, *args)
+        future.add_done_callback(partial(self.finish, client))
+
+    def submit(self, client: CSP, func: Callable, *args: Any) -> None:
+        """
+        Submit task of client
+        """
+        with self.lock:
+            self.pending[client] += 1
+        self.start(client, func, *args)
+
+    def finish(self, client: CSP, future: Future) -> None:
+        """
+        Mark task of client as finished, passing on any exception it raised
+        """
+        exc = None if future.cancelled() else future.exception()
+        if exc is not None:
+            self.put((client, exc))
+        with self.lock:
+            self.pending[client] -= 1
+            done = not self.pending[client]
+        if done:
+            self.put((client, None))
+
+    def retry(self, client: CSP, func: Callable, attempt: int, exc: Exception) -> bool:
+        """
+        Retry throttled task after backing off
+        """
+        if attempt >= MAX_RETRIES or not is_throttled(exc):
+            return False
+        logging.warning("%s: throttled, retrying: %s", client, exc)
+        if not client.limiter.paused:
+            client.limiter.backoff()
+        self.submit(client, func, attempt + 1)
+        return True
+
+    def plan(self, client: CSP, attempt: int = 0) -> None:
+        """
+        Submit the tasks of client
+        """
+        try:
+            if not self.stop.is_set():
+                with client_context(client), tracer.span(
+                    "plan", "scheduler", client=client
+                ):
+                    tasks = client.tasks()
+                for task in tasks:
+                    self.submit(client, partial(self.execute, task=task))
+        except ERRORS as exc:
+            if not self.retry(client, self.plan, attempt, exc):
+                client.log_error(exc)
+
+    def execute(self, client: CSP, attempt: int = 0, *, task: Callable) -> None:
+        """
+        Run task of client, submitting the tasks it may yield
+        """
+        started = False
+        try:
+            if self.stop.is_set():
+                return
+            with client_context(client), tracer.span(
+                task_name(task), "scheduler", client=client, attempt=attempt
+            ):
+                for item in task():
+                    started = True
+                    if isinstance(item, Task):
+                        self.submit(client, partial(self.execute, task=item))
+                    elif not self.put((client, item)):
+                        return
+        except ERRORS as exc:
+            func = partial(self.execute, task=task)
+            if started or not self.retry(client, func, attempt, exc):
+                client.log_error(exc)
+
+
+scheduler = Scheduler()
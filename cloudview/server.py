@@ -0,0 +1,66 @@
+"""
+Servers of the inventory
+"""
+
+import logging
+import threading
+from collections.abc import Sequence
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import BaseServer
+from typing import Any
+
+from cloudview.inventory import Inventory
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Base class for handlers
+    """
+
+    def reply(self, body: str, content_type: str, status: int = 200) -> None:
+        """
+        Send response with body
+        """
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # pylint: disable=redefined-builtin
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug("%s: %s", self.address_string(), format % args)
+
+
+class Server(ThreadingHTTPServer):
+    """
+    Base class for servers
+    """
+
+    daemon_threads = True
+
+
+def serve(inventory: Inventory, servers: Sequence[BaseServer]) -> None:
+    """
+    Refresh inventory in the background and run servers until interrupted
+    """
+    for server in servers:
+        logging.info(
+            "Serving %s on %s", server.__class__.__name__, server.server_address
+        )
+    for server in servers[1:]:
+        thread = threading.Thread(
+            target=server.serve_forever, name=server.__class__.__name__
+        )
+        thread.daemon = True
+        thread.start()
+    inventory.start()
+    try:
+        servers[0].serve_forever()
+    finally:
+        inventory.stop(wait=False)
+        for server in servers[1:]:
+            server.shutdown()
+        for server in servers:
+            server.server_close()
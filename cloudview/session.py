@@ -0,0 +1,76 @@
+"""
+HTTP session used by every libcloud connection.  Middlewares wrap each
+request and know which client is making it
+"""
+
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import partial
+from typing import Any
+
+import requests
+from libcloud.http import LibcloudBaseConnection
+
+# A middleware is called as middleware(send, client, request, **kwargs) and
+# must return the response of send(request, **kwargs)
+Middleware = Callable[..., requests.Response]
+
+_local = threading.local()
+_middlewares: list[Middleware] = []
+
+
+def current_client() -> Any:
+    """
+    Get client making requests in this thread
+    """
+    return getattr(_local, "client", None)
+
+
+@contextmanager
+def client_context(client: Any) -> Iterator[None]:
+    """
+    Attribute requests made in this thread to client
+    """
+    previous = current_client()
+    _local.client = client
+    try:
+        yield
+    finally:
+        _local.client = previous
+
+
+def add_middleware(middleware: Middleware) -> None:
+    """
+    Add middleware
+    """
+    if middleware not in _middlewares:
+        _middlewares.append(middleware)
+
+
+def remove_middleware(middleware: Middleware) -> None:
+    """
+    Remove middleware
+    """
+    if middleware in _middlewares:
+        _middlewares.remove(middleware)
+
+
+class Session(requests.Session):
+    """
+    Session passing every request through the middlewares
+    """
+
+    def send(self, request, **kwargs) -> requests.Response:  # type: ignore
+        send = super().send
+        client = current_client()
+        for middleware in reversed(_middlewares):
+            send = partial(middleware, send, client)
+        return send(request, **kwargs)
+
+
+def _init(self: LibcloudBaseConnection) -> None:
+    self.session = Session()  # type: ignore
+
+
+LibcloudBaseConnection.__init__ = _init  # type: ignore
@@ -0,0 +1,229 @@
+"""
+Timing & API call accounting per client and region or zone
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import wraps
+from typing import TYPE_CHECKING, Any, TextIO
+
+import requests
+
+from cloudview.session import add_middleware, remove_middleware
+
+if TYPE_CHECKING:
+    from cloudview.instance import Instance, CSP
+
+FIELDS = ("construct", "first_byte", "total", "calls", "bytes", "nodes", "errors")
+
+
+@dataclass
+class Record:  # pylint: disable=too-many-instance-attributes
+    """
+    Stats of a client or of one of its regions.  Times are in seconds and
+    first_byte & total are relative to the start
+    """
+
+    construct: float | None = None
+    first_byte: float | None = None
+    total: float | None = None
+    calls: int = 0
+    bytes: int = 0
+    nodes: int = 0
+    errors: int = 0
+
+
+class Stats:
+    """
+    Collect stats of clients and of their regions or zones
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.start = time.monotonic()
+        self.records: dict[tuple[CSP, str], Record] = {}
+        self._local = threading.local()
+        self.lock = threading.Lock()
+
+    def enable(self) -> None:
+        """
+        Start collecting stats
+        """
+        self.enabled = True
+        self.start = time.monotonic()
+        self.records.clear()
+        add_middleware(self.middleware)
+
+    def disable(self) -> None:
+        """
+        Stop collecting stats
+        """
+        self.enabled = False
+        remove_middleware(self.middleware)
+
+    def elapsed(self) -> float:
+        """
+        Get seconds since the start
+        """
+        return time.monotonic() - self.start
+
+    def record(self, client: CSP, region: str = "") -> Record:
+        """
+        Get record of client or of its region
+        """
+        with self.lock:
+            return self.records.setdefault((client, region), Record())
+
+    def _records(self, client: CSP) -> list[Record]:
+        region = getattr(self._local, "region", "")
+        records = [self.record(client)]
+        if region:
+            records.append(self.record(client, region))
+        return records
+
+    def constructed(self, client: CSP, started: float) -> None:
+        """
+        Add time since started, as returned by time.monotonic(), to the
+        construction time of client
+        """
+        if not self.enabled:
+            return
+        record = self.record(client)
+        with self.lock:
+            record.construct = (record.construct or 0) + time.monotonic() - started
+
+    @contextmanager
+    def construct(self, client: CSP) -> Iterator[None]:
+        """
+        Time construction of the drivers of client
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.constructed(client, started)
+
+    @contextmanager
+    def region(self, client: CSP, region: str) -> Iterator[Record]:
+        """
+        Attribute requests made in this thread to region of client
+        """
+        record = self.record(client, region)
+        previous = getattr(self._local, "region", "")
+        self._local.region = region
+        try:
+            yield record
+        except Exception:
+            with self.lock:
+                record.errors += 1
+            raise
+        finally:
+            self._local.region = previous
+            with self.lock:
+                record.total = self.elapsed()
+
+    def middleware(self, send, client: Any, request, **kwargs) -> requests.Response:
+        """
+        Middleware counting requests & bytes received
+        """
+        started = self.elapsed()
+        response = send(request, **kwargs)
+        if client is None:
+            return response
+        first_byte = started + response.elapsed.total_seconds()
+        size = len(response.content)
+        records = self._records(client)
+        with self.lock:
+            for record in records:
+                record.calls += 1
+                record.bytes += size
+                if record.first_byte is None or first_byte < record.first_byte:
+                    record.first_byte = first_byte
+        return response
+
+    def observe(
+        self, results: Iterator[tuple[CSP, Instance | None]]
+    ) -> Iterator[tuple[CSP, Instance | None]]:
+        """
+        Count instances of each client and time when it's done
+        """
+        for client, instance in results:
+            record = self.record(client)
+            with self.lock:
+                if instance is None:
+                    record.total = self.elapsed()
+                else:
+                    record.nodes += 1
+            yield client, instance
+
+    def rows(self) -> list[dict[str, Any]]:
+        """
+        Get stats of each client followed by those of its regions
+        """
+        with self.lock:
+            records = sorted(
+                self.records.items(),
+                key=lambda item: (repr(item[0][0]), item[0][1]),
+            )
+        rows = []
+        for (client, region), record in records:
+            row = {
+                "client": f"{client.__class__.__name__}/{client.cloud}",
+                "region": region,
+                **asdict(record),
+            }
+            if not region:
+                row["errors"] += client.errors
+            rows.append(row)
+        return rows
+
+    def report(self, file: TextIO, output: str = "table") -> None:
+        """
+        Write stats as a table or JSON
+        """
+        rows = self.rows()
+        if output == "json":
+            json.dump(rows, file, indent=2)
+            file.write("\n")
+            return
+        fmt = (
+            "{client:<30} {region:<20} {construct:>9} {first_byte:>10} {total:>9}"
+            " {calls:>6} {bytes:>10} {nodes:>7} {errors:>6}"
+        )
+        header = {
+            key: key.upper().replace("_", " ") for key in ("client", "region", *FIELDS)
+        }
+        file.write(fmt.format_map(header) + "\n")
+        for row in rows:
+            for key in ("construct", "first_byte", "total"):
+                row[key] = "-" if row[key] is None else f"{row[key]:.3f}"
+            row["region"] = row["region"] or "-"
+            file.write(fmt.format_map(row) + "\n")
+
+
+def region_stats(func: Callable) -> Callable:
+    """
+    Decorator collecting the stats of a method listing the instances of a
+    region or zone
+    """
+
+    @wraps(func)
+    def wrapper(client: CSP, region: Any, *args: Any, **kwargs: Any) -> Any:
+        if not stats.enabled:
+            return func(client, region, *args, **kwargs)
+        with stats.region(client, getattr(region, "name", region)) as record:
+            instances = func(client, region, *args, **kwargs)
+            with stats.lock:
+                record.nodes += len(instances)
+            return instances
+
+    return wrapper
+
+
+stats = Stats()
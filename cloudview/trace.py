@@ -0,0 +1,141 @@
+"""
+Trace spans of a run in the Chrome trace event format, as used by
+chrome://tracing & https://ui.perfetto.dev
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import wraps
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+
+from cloudview.session import add_middleware, remove_middleware
+
+
+class Tracer:
+    """
+    Record spans with the thread running them
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.start = time.perf_counter()
+        self.events: list[dict[str, Any]] = []
+        self._threads: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """
+        Start tracing
+        """
+        self.enabled = True
+        self.start = time.perf_counter()
+        self.events.clear()
+        self._threads.clear()
+        add_middleware(self.middleware)
+
+    def disable(self) -> None:
+        """
+        Stop tracing
+        """
+        self.enabled = False
+        remove_middleware(self.middleware)
+
+    def span(
+        self, name: str, cat: str = "cloudview", **args: Any
+    ) -> AbstractContextManager:
+        """
+        Context manager recording a span if tracing
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._span(name, cat, args)
+
+    @contextmanager
+    def _span(self, name: str, cat: str, args: dict[str, Any]) -> Iterator[dict]:
+        started = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add(name, cat, started, time.perf_counter(), args)
+
+    def add(
+        self, name: str, cat: str, started: float, ended: float, args: dict[str, Any]
+    ) -> None:
+        """
+        Add span from started to ended, as returned by time.perf_counter()
+        """
+        tid = threading.get_native_id()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (started - self.start) * 1e6,
+            "dur": (ended - started) * 1e6,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": {key: str(value) for key, value in args.items()},
+        }
+        with self._lock:
+            self.events.append(event)
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+
+    def middleware(self, send, client: Any, request, **kwargs) -> requests.Response:
+        """
+        Middleware recording a span for every request
+        """
+        url = urlsplit(request.url)
+        with self.span(f"{request.method} {url.path}", "http", host=url.netloc) as args:
+            args["client"] = client
+            response = send(request, **kwargs)
+            args["status"] = response.status_code
+        return response
+
+    def save(self, path: str) -> None:
+        """
+        Save trace to path
+        """
+        pid = os.getpid()
+        with self._lock:
+            events = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in self._threads.items()
+            ] + self.events
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        logging.info("Saved %d trace events to %s", len(events), path)
+
+
+def traced(name: str, cat: str = "cloudview") -> Callable[[Callable], Callable]:
+    """
+    Decorator recording a span for every call if tracing
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name, cat):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+tracer = Tracer()
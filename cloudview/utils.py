@@ -2,8 +2,13 @@
 Helper functions
 """
 
+import json
+import logging
 import os
+import tempfile
+import time
 from datetime import datetime
+from typing import Any
 
 from dateutil import parser
 from dateutil.relativedelta import relativedelta
@@ -20,11 +25,77 @@ def read_file(path: str) -> str:
         return file.read()
 
 
-def get_age(date: datetime) -> str:
+def parse_address(address: str) -> tuple[str, int]:
+    """
+    Parse [HOST:]PORT into (host, port).  An empty host means all addresses
+    """
+    host, _, port = address.rpartition(":")
+    return host.strip("[]"), int(port)
+
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_duration(duration: str) -> float:
+    """
+    Parse NUMBER[s|m|h|d|w] into seconds.  Seconds without unit
+    """
+    number, unit = duration, "s"
+    if duration[-1:] in DURATION_UNITS:
+        number, unit = duration[:-1], duration[-1]
+    seconds = float(number) * DURATION_UNITS[unit]
+    if not 0 <= seconds < float("inf"):
+        raise ValueError(f"Invalid duration: {duration}")
+    return seconds
+
+
+def cache_dir() -> str:
+    """
+    Get cache directory
+    """
+    base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "cloudview")
+
+
+def load_cache(name: str) -> tuple[Any, float]:
+    """
+    Load JSON data from cache file and return it with its age in seconds
+    """
+    path = os.path.join(cache_dir(), name)
+    try:
+        age = time.time() - os.stat(path).st_mtime
+        return json.loads(read_file(path)), age
+    except FileNotFoundError:
+        pass
+    except (OSError, RuntimeError, ValueError) as exc:
+        logging.warning("Ignoring cache %s: %s", path, exc)
+    return None, float("inf")
+
+
+def save_cache(name: str, data: Any) -> None:
+    """
+    Atomically save JSON data to cache file with secure permissions
+    """
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(data, file, default=str)
+            os.replace(tmp, os.path.join(directory, name))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except (OSError, TypeError, ValueError) as exc:
+        logging.warning("Cannot save cache %s: %s", name, exc)
+
+
+def get_age(date: datetime, now: datetime | None = None) -> str:
     """
     Get age
     """
-    age = relativedelta(datetime.now(tz=utc), date)
+    age = relativedelta(now or datetime.now(tz=utc), date)
     string = "".join(
         [
             f"{age.years}y" if age.years else "",
@@ -40,11 +111,11 @@ def get_age(date: datetime) -> str:
     return string
 
 
-def timeago(date: datetime) -> str:
+def timeago(date: datetime, now: datetime | None = None) -> str:
     """
     Time ago
     """
-    diff = datetime.now(tz=utc) - date
+    diff = (now or datetime.now(tz=utc)) - date
     seconds = int(diff.total_seconds())
     ago = "ago"
     if seconds < 0:
@@ -68,27 +139,59 @@ def timeago(date: datetime) -> str:
     return f"{years} year{'s' if years != 1 else ''} {ago}"
 
 
-def dateit(date: datetime, time_format: str = "%a %b %d %H:%M:%S %Z %Y") -> str:
+def dateit(
+    date: datetime,
+    time_format: str = "%a %b %d %H:%M:%S %Z %Y",
+    now: datetime | None = None,
+) -> str:
     """
     Return date in desired format
     """
     date = date.astimezone()
     if time_format == "timeago":
-        return timeago(date)
+        return timeago(date, now)
     if time_format == "age":
-        return get_age(date)
+        return get_age(date, now)
     return date.strftime(time_format)
 
 
+class DateRenderer:  # pylint: disable=too-few-public-methods
+    """
+    Render dates in the same format relative to the same "now",
+    reusing the output of repeated dates
+    """
+
+    def __init__(
+        self,
+        time_format: str = "%a %b %d %H:%M:%S %Z %Y",
+        now: datetime | None = None,
+    ) -> None:
+        self.time_format = time_format
+        self.now = now or datetime.now(tz=utc)
+        self._cache: dict[datetime, str] = {}
+
+    def __call__(self, date: datetime) -> str:
+        try:
+            return self._cache[date]
+        except KeyError:
+            string = self._cache[date] = dateit(date, self.time_format, self.now)
+            return string
+
+
 def utc_date(date: str | datetime) -> datetime:
     """
     Return UTC normalized datetime object from date
     """
     if isinstance(date, str):
-        if date.isdigit():
-            date = datetime.fromtimestamp(int(date))
+        string = date
+        if string.isdigit():
+            date = datetime.fromtimestamp(int(string))
         else:
-            date = parser.parse(date)
+            # All providers use ISO 8601 so dateutil is seldom needed
+            try:
+                date = datetime.fromisoformat(string)
+            except ValueError:
+                date = parser.parse(string)
     if date.tzinfo is not None:
         date = date.astimezone(utc)
     else:
@@ -0,0 +1,81 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+
+import time
+from datetime import datetime, timedelta
+from threading import Event
+from typing import Any
+
+import pytest
+from libcloud.compute.types import LibcloudError
+from pytz import utc
+from cloudview.instance import CSP, Instance
+
+
+def make_instance(name: str, days: int = 0, **kwargs: Any) -> Instance:
+    """
+    Get instance created days after 2023-01-01 with fields overridden by kwargs
+    """
+    fields: dict[str, Any] = {
+        "provider": "mock",
+        "cloud": "cloud",
+        "id": name,
+        "size": "small",
+        "time": datetime(2023, 1, 1, tzinfo=utc) + timedelta(days=days),
+        "state": "running",
+        "location": "zone",
+    }
+    return Instance(name=name, **(fields | kwargs))
+
+
+class MockCSP(CSP):
+    """
+    Client returning instances or, if None, a new instance named after the
+    number of calls, with fields, after waiting for event & delay seconds.
+    Raises LibcloudError if fail is set
+    """
+
+    provider = "mock"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        cloud: str = "cloud",
+        instances: list[Instance] | None = None,
+        *,
+        delay: float = 0,
+        event: Event | None = None,
+        **fields: Any,
+    ) -> None:
+        super().__init__(cloud)
+        self.instances = instances
+        self.delay = delay
+        self.event = event
+        self.fields = fields
+        self.calls = 0
+        self.fail = False
+
+    def _get_instances(self) -> list[Instance]:
+        self.calls += 1
+        if self.event is not None:
+            assert self.event.wait(timeout=5)
+        time.sleep(self.delay)
+        if self.fail:
+            raise LibcloudError("failed")
+        if self.instances is not None:
+            return self.instances
+        return [make_instance(f"name{self.calls}", cloud=self.cloud, **self.fields)]
+
+
+@pytest.fixture(autouse=True)
+def cache_home(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def keep_extra(monkeypatch):
+    monkeypatch.setattr(Instance, "keep_extra", True)
+
+
+@pytest.fixture
+def client():
+    return MockCSP("cloud")
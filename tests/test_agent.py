@@ -0,0 +1,123 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access
+
+import os
+import socket
+import stat
+import threading
+from datetime import datetime
+
+import pytest
+from pytz import utc
+from cloudview.agent import Agent, AgentServer, query_agent, socket_path
+from cloudview.inventory import Inventory
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "agent.sock")
+
+
+@pytest.fixture
+def server(client, path):
+    agent = Agent(Inventory([client]), "/clouds.yaml", ["mock"])
+    with AgentServer(path, agent) as server:
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+
+
+def request(**kwargs):
+    return {"config": "/clouds.yaml", "providers": ["mock"], **kwargs}
+
+
+def test_socket_path(monkeypatch, cache_home):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1000")
+    assert socket_path() == "/run/user/1000/cloudview.sock"
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert socket_path() == str(cache_home / "cloudview" / "agent.sock")
+
+
+def test_not_running(path):
+    assert query_agent(request(), path) is None
+
+
+@pytest.mark.usefixtures("server")
+def test_query_agent(client, path):
+    results = list(query_agent(request(), path))
+    assert [(key, instance.name) for key, instance in results[:1]] == [
+        ("mock/cloud", "name1")
+    ]
+    assert results[0][1].time == datetime(2023, 1, 1, tzinfo=utc)
+    assert results[1] == ("mock/cloud", None)
+
+    list(query_agent(request(), path))
+    assert client.calls == 1
+    results = list(query_agent(request(refresh=True), path))
+    assert results[0][1].name == "name2"
+    assert client.calls == 2
+
+
+@pytest.mark.usefixtures("server")
+def test_query_agent_max_age(client, path):
+    list(query_agent(request(), path))
+    list(query_agent(request(max_age=1e-9), path))
+    assert client.calls == 2
+
+
+@pytest.mark.usefixtures("server")
+def test_query_agent_errors(client, path, caplog):
+    list(query_agent(request(), path))
+    client.fail = True
+    results = list(query_agent(request(refresh=True), path))
+    assert results[0][1].name == "name1"
+    assert "mock/cloud: 1 errors in the agent" in caplog.text
+
+
+def test_query_agent_refresh_fails(server, path, mocker, caplog):
+    mocker.patch.object(
+        server.agent.inventory, "refresh", side_effect=RuntimeError("boom")
+    )
+    assert query_agent(request(refresh=True), path) is None
+    assert "Not using agent" in caplog.text
+    assert "boom" in caplog.text
+
+
+@pytest.mark.usefixtures("server")
+def test_query_agent_fails_midway(client, path, mocker):
+    list(query_agent(request(), path))
+    mocker.patch("cloudview.agent.dump_instance", side_effect=TypeError("bad"))
+    assert query_agent(request(), path) is None
+    assert client.calls == 1
+
+
+@pytest.mark.usefixtures("server")
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"config": "/other.yaml"},
+        {"config": None},
+        {"providers": ["mock", "ec2"]},
+        {"extra": True},
+    ],
+)
+def test_query_agent_unsupported(client, path, kwargs):
+    assert query_agent(request(**kwargs), path) is None
+    assert client.calls == 0
+
+
+def test_server_socket(server, path):
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    with pytest.raises(RuntimeError):
+        AgentServer(path, server.agent)
+    server.server_close()
+    assert not os.path.exists(path)
+
+
+def test_server_stale_socket(client, path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+    with AgentServer(path, Agent(Inventory([client]), None, [])):
+        assert os.path.exists(path)
+    assert not os.path.exists(path)
@@ -0,0 +1,146 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access
+
+import csv
+import io
+import json
+import threading
+import time
+from datetime import datetime
+
+import pytest
+import requests
+from pytz import utc
+from cloudview.api import MIN_REFRESH_INTERVAL, Api, ApiServer
+from cloudview.instance import Instance
+from cloudview.inventory import Inventory
+from tests.conftest import MockCSP, make_instance
+
+INSTANCES = [
+    make_instance("b"),
+    make_instance("a", 1),
+    make_instance("c", 2, state="stopped"),
+]
+
+
+@pytest.fixture
+def client():
+    return MockCSP("cloud", INSTANCES)
+
+
+@pytest.fixture
+def api(client):
+    return Api(Inventory([client]))
+
+
+def query(api, **params):
+    body, _ = api.query({key: [value] for key, value in params.items()})
+    return body
+
+
+def test_query_refreshes_once(api, client):
+    items = json.loads(query(api))
+    assert [item["name"] for item in items] == ["b", "a", "c"]
+    assert ",".join(items[0]) == "provider,cloud,name,size,state,time,location"
+    assert client.calls == 1
+    query(api)
+    assert client.calls == 1
+    query(api, refresh="")
+    assert client.calls == 1
+    api.inventory.refreshed -= MIN_REFRESH_INTERVAL
+    query(api, refresh="")
+    assert client.calls == 2
+
+
+def test_query_filters(api):
+    items = json.loads(query(api, state="running", sort="name"))
+    assert [item["name"] for item in items] == ["a", "b"]
+    items = json.loads(query(api, state="running,stopped", sort="time", reverse=""))
+    assert [item["name"] for item in items] == ["c", "a", "b"]
+    items = json.loads(query(api, provider="other"))
+    assert not items
+    items = json.loads(query(api, name="[ab]", fields="name,id"))
+    assert items == [{"name": "b", "id": "b"}, {"name": "a", "id": "a"}]
+
+
+def test_query_age(api):
+    age = time.time() - datetime(2023, 1, 2, 12, tzinfo=utc).timestamp()
+    items = json.loads(query(api, older_than=str(age)))
+    assert [item["name"] for item in items] == ["b", "a"]
+    items = json.loads(query(api, newer_than=str(age)))
+    assert [item["name"] for item in items] == ["c"]
+
+
+def test_query_output(api):
+    body, content_type = api.query({"output": ["csv"], "fields": ["name,state"]})
+    assert content_type.startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert rows[0] == {"name": "b", "state": "running"}
+    body, content_type = api.query({"output": ["ndjson"]})
+    assert content_type == "application/x-ndjson"
+    assert len(body.splitlines()) == 3
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"bogus": ["1"]},
+        {"fields": ["name,bogus"]},
+        {"output": ["xml"]},
+        {"sort": ["extra"]},
+        {"older_than": ["1d"]},
+    ],
+)
+def test_query_invalid(api, params):
+    with pytest.raises(ValueError):
+        api.query(params)
+
+
+def test_query_extra(api, monkeypatch):
+    with pytest.raises(ValueError, match="extra"):
+        api.query({"fields": ["name,extra"]})
+    monkeypatch.setattr(Instance, "keep_extra", True)
+    assert json.loads(query(api, fields="name,extra"))[0] == {
+        "name": "b",
+        "extra": None,
+    }
+
+
+def test_index_rebuilt_on_change(api):
+    query(api)
+    index = api.index()
+    assert api.index() is index
+    api.inventory.refreshed -= MIN_REFRESH_INTERVAL
+    query(api, refresh="")
+    assert api.index() is not index
+
+
+def test_concurrent_queries_share_fetch():
+    client = MockCSP("cloud", INSTANCES, delay=0.2)
+    api = Api(Inventory([client]))
+    threads = [threading.Thread(target=query, args=(api,)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.calls == 1
+
+
+def test_server(api):
+    with ApiServer(("127.0.0.1", 0), api) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            response = requests.get(
+                f"{url}/instances", params={"state": "stopped"}, timeout=5
+            )
+            assert response.status_code == 200
+            assert response.headers["Content-Type"] == "application/json"
+            assert [item["name"] for item in response.json()] == ["c"]
+            response = requests.get(f"{url}/instances?bogus=1", timeout=5)
+            assert response.status_code == 400
+            assert "bogus" in response.text
+            assert requests.get(f"{url}/", timeout=5).status_code == 404
+        finally:
+            server.shutdown()
+            thread.join()
@@ -2,9 +2,10 @@
 
 import os
 import pytest
-from libcloud.compute.types import LibcloudError
+from libcloud.common.exceptions import BaseHTTPError
+from libcloud.compute.types import LibcloudError, NodeState
 from cloudview.azure import get_creds, Azure
-from cloudview.instance import Instance
+from cloudview.instance import Filters, Instance
 
 for var in os.environ:
     if var.startswith(("AZURE_", "ARM_")):
@@ -131,6 +132,7 @@ def test_azure_init_with_missing_creds(mocker, mock_get_driver):
 
 def test_azure_get_instances(mock_driver, mock_instance, valid_creds):
     mock_driver.list_nodes.return_value = [mock_instance]
+    mock_driver.connection.request.return_value.object = {"value": []}
     azure = Azure(cloud="test_cloud", **valid_creds)
     azure._driver = mock_driver
 
@@ -151,3 +153,157 @@ def test_azure_get_instances_with_driver_exception(mock_driver):
         azure._driver = mock_driver
         result = azure._get_instances()
         assert len(result) == 0
+
+
+VM_ID = "/subscriptions/test_subscription/resourceGroups/RG/providers/Microsoft.Compute/virtualMachines/test_instance"
+NIC_ID = "/subscriptions/test_subscription/resourceGroups/RG/providers/Microsoft.Network/networkInterfaces/nic"
+IP_ID = "/subscriptions/test_subscription/resourceGroups/RG/providers/Microsoft.Network/publicIPAddresses/ip"
+
+
+@pytest.fixture
+def mock_node(mock_instance):
+    mock_instance.id = VM_ID
+    mock_instance.state = NodeState.RUNNING
+    mock_instance.public_ips = []
+    mock_instance.private_ips = []
+    mock_instance.extra["properties"]["networkProfile"] = {
+        "networkInterfaces": [{"id": NIC_ID.upper()}]
+    }
+    return mock_instance
+
+
+def fake_request(mocker, responses):
+    def request(action, params):
+        page = params.get("page", "0")
+        return mocker.Mock(object=responses[action.rsplit("/", 1)[-1]][int(page)])
+
+    return request
+
+
+@pytest.mark.usefixtures("keep_extra")
+def test_azure_enrich(mocker, mock_driver, mock_node, valid_creds):
+    responses = {
+        "virtualMachines": [
+            {
+                "value": [],
+                "nextLink": "https://management.azure.com/x?page=1&statusOnly=true",
+            },
+            {
+                "value": [
+                    {
+                        "id": VM_ID.lower(),
+                        "properties": {
+                            "instanceView": {
+                                "statuses": [
+                                    {"code": "ProvisioningState/succeeded"},
+                                    {"code": "PowerState/deallocated"},
+                                ]
+                            }
+                        },
+                    }
+                ]
+            },
+        ],
+        "publicIPAddresses": [
+            {"value": [{"id": IP_ID, "properties": {"ipAddress": "1.2.3.4"}}]}
+        ],
+        "networkInterfaces": [
+            {
+                "value": [
+                    {
+                        "id": NIC_ID,
+                        "properties": {
+                            "ipConfigurations": [
+                                {
+                                    "properties": {
+                                        "privateIPAddress": "10.0.0.4",
+                                        "publicIPAddress": {"id": IP_ID},
+                                    }
+                                }
+                            ]
+                        },
+                    }
+                ]
+            }
+        ],
+    }
+    mock_driver.list_nodes.return_value = [mock_node]
+    mock_driver.connection.request.side_effect = fake_request(mocker, responses)
+    azure = Azure(cloud="test_cloud", **valid_creds)
+    azure._driver = mock_driver
+
+    result = azure._get_instances()
+
+    assert result[0].state == NodeState.STOPPED
+    assert result[0].extra["public_ips"] == ["1.2.3.4"]
+    assert result[0].extra["private_ips"] == ["10.0.0.4"]
+    mock_driver.list_nodes.assert_called_once_with(**azure.options)
+    assert mock_driver.connection.request.call_count == 4
+
+
+@pytest.mark.usefixtures("keep_extra")
+def test_azure_enrich_error(mock_driver, mock_node, valid_creds):
+    mock_driver.list_nodes.return_value = [mock_node]
+    mock_driver.connection.request.side_effect = BaseHTTPError(403, "Forbidden")
+    azure = Azure(cloud="test_cloud", **valid_creds)
+    azure._driver = mock_driver
+
+    result = azure._get_instances()
+
+    assert result[0].state == NodeState.RUNNING
+    assert "public_ips" not in result[0].extra
+
+
+def test_azure_enrich_throttled(mock_driver, mock_node, valid_creds):
+    mock_driver.list_nodes.return_value = [mock_node]
+    mock_driver.connection.request.side_effect = BaseHTTPError(429, "Too Many")
+    azure = Azure(cloud="test_cloud", **valid_creds)
+    azure._driver = mock_driver
+
+    with pytest.raises(BaseHTTPError):
+        azure._get_instances()
+
+
+def status_response(code):
+    return {
+        "value": [
+            {
+                "id": VM_ID,
+                "properties": {"instanceView": {"statuses": [{"code": code}]}},
+            }
+        ]
+    }
+
+
+def test_azure_filtered_by_state(mocker, mock_driver, mock_node, valid_creds):
+    mock_driver.list_nodes.return_value = [mock_node]
+    mock_driver.connection.request.return_value = mocker.Mock(
+        object=status_response("PowerState/deallocated")
+    )
+    azure = Azure(cloud="test_cloud", **valid_creds)
+    azure._driver = mock_driver
+    azure.filters = Filters(states=frozenset({"running"}))
+
+    assert not azure._get_instances()
+    mock_driver.list_nodes.assert_not_called()
+    assert mock_driver.connection.request.call_count == 1
+
+
+def test_azure_filtered_by_name(mocker, mock_driver, mock_node, valid_creds):
+    mock_driver.list_nodes.return_value = [mock_node]
+    mock_driver.connection.request.return_value = mocker.Mock(
+        object=status_response("PowerState/running")
+    )
+    azure = Azure(cloud="test_cloud", **valid_creds)
+    azure._driver = mock_driver
+    azure.filters = Filters(states=frozenset({"running"}), name="other*")
+    mock_node.name = "test_instance"
+
+    assert not azure._get_instances()
+    mock_driver.list_nodes.assert_called_once()
+    # No NIC & IP lists for no nodes
+    assert mock_driver.connection.request.call_count == 1
+
+    azure.filters = Filters(name="test_*")
+    assert len(azure._get_instances()) == 1
+    assert mock_driver.connection.request.call_count == 4
@@ -0,0 +1,124 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access,too-few-public-methods
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from libcloud.compute.types import LibcloudError
+from pytz import utc
+from cloudview.azure import Azure
+from cloudview.cache import cache_name, cached_instances, load_instances
+from cloudview.ec2 import EC2
+from cloudview.gce import GCE
+from cloudview.instance import Instance
+from cloudview.openstack import Openstack
+from tests.conftest import MockCSP
+
+
+@pytest.fixture
+def client():
+    return MockCSP("cloud", extra={"key": "value"})
+
+
+@pytest.mark.parametrize(
+    "cls, creds",
+    [
+        (EC2, [{"key": "AKIA_A", "secret": "s"}, {"key": "AKIA_B", "secret": "s"}]),
+        (
+            Azure,
+            [
+                {"tenant_id": "t", "subscription_id": sub, "key": "k", "secret": "s"}
+                for sub in ("sub-a", "sub-b")
+            ],
+        ),
+        (GCE, [{"project": project, "user_id": "u"} for project in ("a", "b")]),
+        (
+            Openstack,
+            [
+                {"key": "user", "ex_force_auth_url": url}
+                for url in ("https://a:5000", "https://b:5000")
+            ],
+        ),
+    ],
+)
+def test_cache_name_per_account(cls, creds):
+    names = {cache_name(cls("cloud", **account)) for account in creds}
+    assert len(names) == 2
+    assert cache_name(cls("cloud", **creds[0])) in names
+
+
+def age_cache(cache_home, client, seconds):
+    path = cache_home / "cloudview" / cache_name(client)
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def wait_for_refresh():
+    for thread in threading.enumerate():
+        if thread.name == "refresh":
+            thread.join()
+
+
+def get_names(client, **kwargs):
+    return [
+        instance.name
+        for _, instance in cached_instances([client], ttl=60, **kwargs)
+        if instance is not None
+    ]
+
+
+@pytest.mark.usefixtures("keep_extra")
+def test_cached_instances_fresh(client):
+    assert get_names(client) == ["name1"]
+    assert client.calls == 1
+
+    results = list(cached_instances([client], ttl=60))
+    assert results[-1] == (client, None)
+    instance = results[0][1]
+    assert instance.name == "name1"
+    assert instance.time == datetime(2023, 1, 1, tzinfo=utc)
+    assert instance.extra == {"key": "value"}
+    assert client.calls == 1
+
+
+def test_cached_instances_stale_while_revalidate(cache_home, client):
+    get_names(client)
+    age_cache(cache_home, client, 120)
+
+    assert get_names(client) == ["name1"]
+    wait_for_refresh()
+    assert client.calls == 2
+
+    instances, age = load_instances(client)
+    assert instances is not None
+    assert instances[0].name == "name2"
+    assert age < 60
+
+
+def test_cached_instances_refresh(client):
+    get_names(client)
+    assert get_names(client, refresh=True) == ["name2"]
+    assert client.calls == 2
+
+
+def test_cached_instances_errors_not_saved(mocker, client):
+    mocker.patch.object(MockCSP, "_get_instances", side_effect=LibcloudError("error"))
+    assert not get_names(client)
+    assert load_instances(client) == (None, float("inf"))
+
+
+def test_load_instances_insecure_permissions(cache_home, client):
+    get_names(client)
+    (cache_home / "cloudview" / cache_name(client)).chmod(0o644)
+    assert load_instances(client) == (None, float("inf"))
+
+
+def test_cached_instances_without_extra(client, monkeypatch):
+    assert get_names(client) == ["name1"]
+    assert load_instances(client)[0][0].extra is None
+
+    monkeypatch.setattr(Instance, "keep_extra", True)
+    assert load_instances(client)[0] is None
+    assert get_names(client) == ["name2"]
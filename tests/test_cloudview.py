@@ -0,0 +1,17 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring
+
+import argparse
+
+import pytest
+from cloudview.api import MIN_REFRESH_INTERVAL
+from cloudview.cloudview import parse_interval
+
+
+def test_parse_interval():
+    assert parse_interval("300") == 300
+    assert parse_interval(str(MIN_REFRESH_INTERVAL)) == MIN_REFRESH_INTERVAL
+    for value in ("0", "-1", str(MIN_REFRESH_INTERVAL - 1)):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_interval(value)
+    with pytest.raises(ValueError):
+        parse_interval("1m")
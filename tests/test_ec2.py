@@ -1,14 +1,24 @@
 # pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access
 
 import os
+from datetime import datetime, timezone
+
 import pytest
+from libcloud.common.exceptions import BaseHTTPError
+from libcloud.compute.types import InvalidCredsError
+from cloudview import limits
 from cloudview.ec2 import get_creds, EC2
-from cloudview.instance import Instance
+from cloudview.instance import Filters, Instance
+from cloudview.scheduler import Scheduler
+from cloudview.utils import load_cache
 
 for var in os.environ:
     if var.startswith("AWS_"):
         os.environ.pop(var)
 
+# The tests use instances as nodes
+pytestmark = pytest.mark.usefixtures("keep_extra")
+
 
 def test_get_creds(monkeypatch):
     monkeypatch.setenv("AWS_ACCESS_KEY_ID", "access_key")
@@ -91,3 +101,150 @@ def test_get_instances(mock_ec2_driver, mock_ec2_instance, mocker, valid_creds):
     assert instances[0].id == "instance-id-123"
     assert instances[0].name == "test-instance"
     assert instances[0].size == "t2.micro"
+
+
+@pytest.fixture
+def mock_get_driver(mocker):
+    cls = mocker.Mock()
+    cls.list_regions.return_value = ["r1", "r2", "r3"]
+    mocker.patch("cloudview.ec2.get_driver", return_value=cls)
+    return cls
+
+
+def test_drivers_created_lazily(mock_get_driver, mock_ec2_instance, valid_creds):
+    mock_get_driver.return_value.list_nodes.return_value = [mock_ec2_instance]
+
+    ec2 = EC2(**valid_creds)
+    mock_get_driver.assert_not_called()
+
+    ec2._list_instances_in_region("r1")
+    ec2._list_instances_in_region("r1")
+    mock_get_driver.assert_called_once_with(
+        "your_access_key", "your_secret_key", region="r1"
+    )
+
+
+def test_regions_skipped(mocker, mock_get_driver, mock_ec2_instance, valid_creds):
+    drivers = {region: mocker.Mock() for region in ("r1", "r2", "r3")}
+    drivers["r1"].list_nodes.return_value = [mock_ec2_instance]
+    drivers["r2"].list_nodes.return_value = []
+    drivers["r3"].list_nodes.side_effect = InvalidCredsError("AuthFailure")
+    mock_get_driver.side_effect = lambda *_, region: drivers[region]
+
+    ec2 = EC2(**valid_creds)
+    assert len(ec2._get_instances()) == 1
+    assert len(ec2.tasks()) == 1
+
+    ec2 = EC2(**valid_creds)
+    ec2.use_cache = False
+    assert len(ec2.tasks()) == 3
+
+
+def test_regions_probed_again(mocker, mock_get_driver, valid_creds):
+    mock_get_driver.return_value.list_nodes.return_value = []
+    mocker.patch.dict("cloudview.ec2.PROBE_INTERVALS", {"empty": -1})
+
+    ec2 = EC2(**valid_creds)
+    ec2._get_instances()
+    assert len(ec2.tasks()) == 3
+
+
+def test_regions_once_active_probed_again(
+    mocker, mock_get_driver, mock_ec2_instance, valid_creds
+):
+    drivers = {region: mocker.Mock() for region in ("r1", "r2", "r3")}
+    drivers["r1"].list_nodes.return_value = [mock_ec2_instance]
+    drivers["r2"].list_nodes.return_value = []
+    drivers["r3"].list_nodes.return_value = []
+    mock_get_driver.side_effect = lambda *_, region: drivers[region]
+    assert len(EC2(**valid_creds)._get_instances()) == 1
+
+    # The only instance of r1 is terminated
+    drivers["r1"].list_nodes.return_value = []
+    assert not EC2(**valid_creds)._get_instances()
+
+    # r1 is still probed while r2 & r3 are skipped
+    ec2 = EC2(**valid_creds)
+    assert [task.args for task in ec2.tasks()] == [("r1",)]
+
+
+def test_regions_learned_after_retries(
+    mocker, monkeypatch, mock_get_driver, mock_ec2_instance, valid_creds
+):
+    monkeypatch.setattr(limits, "BASE_DELAY", 0.01)
+    drivers = {region: mocker.Mock() for region in ("r1", "r2", "r3")}
+    drivers["r1"].list_nodes.side_effect = [
+        BaseHTTPError(503, "RequestLimitExceeded"),
+        [mock_ec2_instance],
+    ]
+    drivers["r2"].list_nodes.return_value = []
+    drivers["r3"].list_nodes.return_value = []
+    mock_get_driver.side_effect = lambda *_, region: drivers[region]
+
+    ec2 = EC2(**valid_creds)
+    results = list(Scheduler(max_workers=3).run([ec2]))
+    assert [instance.id for _, instance in results if instance] == ["instance-id-123"]
+
+    record, _ = load_cache(ec2._cache_name)
+    assert {region: status for region, (status, _) in record.items()} == {
+        "r1": "active",
+        "r2": "empty",
+        "r3": "empty",
+    }
+
+
+def test_regions_not_skipped_with_invalid_creds(mock_get_driver, valid_creds):
+    mock_get_driver.return_value.list_nodes.side_effect = InvalidCredsError(
+        "AuthFailure"
+    )
+
+    ec2 = EC2(**valid_creds)
+    assert not ec2._get_instances()
+    assert len(ec2.tasks()) == 3
+
+
+@pytest.mark.parametrize(
+    "filters, ex_filters",
+    [
+        (Filters(), None),
+        (
+            Filters(states=frozenset({"running", "stopped"}), name="web-*"),
+            {"instance-state-name": ["running", "stopped"], "tag:Name": "web-*"},
+        ),
+        # Might match instances without a Name tag, named after their id
+        (Filters(name="i-0*"), None),
+        (Filters(name="web[12]"), None),
+        (
+            Filters(
+                created_after=datetime(2023, 4, 30, tzinfo=timezone.utc),
+                created_before=datetime(2023, 5, 1, 12, tzinfo=timezone.utc),
+            ),
+            {"launch-time": ["2023-04-30*", "2023-05-01*"]},
+        ),
+    ],
+)
+def test_list_instances_filtered(
+    mock_ec2_driver, mock_ec2_instance, valid_creds, filters, ex_filters
+):
+    mock_ec2_driver.list_nodes.return_value = [mock_ec2_instance]
+    ec2 = EC2(**valid_creds)
+    ec2._drivers = {"us-east-1": mock_ec2_driver}
+    ec2.filters = filters
+
+    ec2._list_instances_in_region("us-east-1")
+    mock_ec2_driver.list_nodes.assert_called_once_with(ex_filters=ex_filters)
+
+
+def test_list_instances_filtered_empty(mock_get_driver, valid_creds):
+    mock_get_driver.return_value.list_nodes.return_value = []
+    ec2 = EC2(**valid_creds)
+    ec2.filters = Filters(states=frozenset({"running"}))
+
+    assert not ec2._get_instances()
+    ec2.filters = Filters()
+    assert len(ec2.tasks()) == 3
+
+    ec2.filters = Filters(states=frozenset({"updating"}))
+    assert not ec2.tasks()
+    ec2.filters = Filters(created_before=datetime(2000, 1, 1, tzinfo=timezone.utc))
+    assert not ec2.tasks()
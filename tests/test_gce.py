@@ -2,9 +2,13 @@
 
 import json
 import os
+from datetime import datetime, timezone
+
 import pytest
+from libcloud.common.exceptions import BaseHTTPError
 from libcloud.compute.types import LibcloudError
 from cloudview.gce import get_creds, GCE
+from cloudview.instance import Filters
 
 os.environ.pop("GOOGLE_APPLICATION_CREDENTIALS", "")
 
@@ -178,6 +182,15 @@ def test_gce_list_instances_in_zone(
     assert result[0].state == "running"
 
 
+def test_gce_list_instances_in_zone_throttled(mock_driver, valid_creds, mock_zone):
+    mock_driver.list_nodes.side_effect = BaseHTTPError(429, "Too many")
+    gce = GCE(cloud="test_cloud", **valid_creds)
+    gce._driver = mock_driver
+
+    with pytest.raises(BaseHTTPError):
+        gce._list_instances_in_zone(mock_zone)
+
+
 def test_gce_get_instances(mocker, mock_driver, mock_zone, mock_instance, valid_creds):
     mock_zone.name = "test_zone"  # Set the name attribute of the mock_zone
     mock_instance.name = "test_instance"  # Set the name attribute of the mock_instance
@@ -185,7 +198,7 @@ def test_gce_get_instances(mocker, mock_driver, mock_zone, mock_instance, valid_
     mock_driver.list_nodes.return_value = [mock_instance]
     mocker.patch.object(GCE, "_list_instances_in_zone", return_value=[mock_instance])
 
-    gce = GCE(cloud="test_cloud", **valid_creds)
+    gce = GCE(cloud="test_cloud", aggregated=False, **valid_creds)
     gce._driver = mock_driver
 
     result = gce._get_instances()
@@ -195,3 +208,140 @@ def test_gce_get_instances(mocker, mock_driver, mock_zone, mock_instance, valid_
     assert result[0].name == "test_instance"
     assert result[0].id == "test_instance_id"
     assert result[0].state == "running"
+
+
+def make_item(name, zone="test_zone"):
+    return {
+        "id": name,
+        "name": name,
+        "status": "RUNNING",
+        "zone": f"https://www.googleapis.com/compute/v1/projects/p/zones/{zone}",
+        "machineType": "projects/p/zones/test_zone/machineTypes/e2-small",
+        "creationTimestamp": "2023-08-28T10:05:47.723-07:00",
+        "tags": {"fingerprint": "x"},
+        "disks": [{"boot": True, "type": "PERSISTENT", "source": "disk"}],
+    }
+
+
+@pytest.fixture
+def gce_driver(mocker, mock_zone):
+    driver = mocker.Mock()
+    mock_zone.id = "1"
+    mock_zone.name = "test_zone"
+    driver.ex_list_zones.return_value = [mock_zone]
+    driver._to_node.side_effect = lambda item: mocker.Mock(
+        id=item["id"],
+        state="running",
+        extra={
+            "machineType": item["machineType"],
+            "creationTimestamp": item["creationTimestamp"],
+            "zone": mock_zone,
+        },
+    )
+    return driver
+
+
+@pytest.mark.usefixtures("keep_extra")
+def test_gce_aggregated_list(mocker, gce_driver, valid_creds):
+    pages = [
+        {
+            "items": {
+                "zones/a": {"instances": [make_item("i1"), make_item("i2")]},
+                "zones/b": {"warning": {}},
+            },
+            "nextPageToken": "token",
+        },
+        {"items": {"zones/a": {"instances": [make_item("i3")]}}},
+    ]
+    gce_driver.connection.request.side_effect = [
+        mocker.Mock(object=page) for page in pages
+    ]
+    gce = GCE(cloud="test_cloud", **valid_creds)
+    gce._driver = gce_driver
+
+    result = gce._get_instances()
+
+    assert [instance.id for instance in result] == ["i1", "i2", "i3"]
+    assert result[0].size == "e2-small"
+    assert result[0].location == "test_zone"
+    assert result[0].extra["disks"] == make_item("i1")["disks"]
+    params = [
+        call.kwargs["params"] for call in gce_driver.connection.request.mock_calls
+    ]
+    assert params == [{"maxResults": 500}, {"maxResults": 500, "pageToken": "token"}]
+    gce_driver._to_node.assert_any_call({**make_item("i1"), "disks": []})
+
+
+def test_gce_aggregated_list_fallback(mocker, gce_driver, valid_creds):
+    gce_driver.connection.request.side_effect = BaseHTTPError(400, "Bad request")
+    gce = GCE(cloud="test_cloud", **valid_creds)
+    gce._driver = gce_driver
+    mocker.patch.object(GCE, "_list_instances_in_zone", return_value=["instance"])
+
+    assert gce._get_instances() == ["instance"]
+
+
+def test_gce_aggregated_list_throttled(gce_driver, valid_creds):
+    gce_driver.connection.request.side_effect = BaseHTTPError(429, "Too many")
+    gce = GCE(cloud="test_cloud", **valid_creds)
+    gce._driver = gce_driver
+
+    with pytest.raises(BaseHTTPError):
+        gce._get_instances()
+
+
+def test_gce_zones_cached(mocker, gce_driver, valid_creds):
+    gce = GCE(cloud="test_cloud", **valid_creds)
+    gce._driver = gce_driver
+
+    zones = gce._get_zones()
+    assert [zone.name for zone in zones] == ["test_zone"]
+
+    gce = GCE(cloud="test_cloud", **valid_creds)
+    gce._driver = mocker.Mock()
+    zones = gce._get_zones()
+    assert [zone.name for zone in zones] == ["test_zone"]
+    gce._driver.ex_list_zones.assert_not_called()
+    assert gce._driver._zone_dict == {"test_zone": zones[0]}
+
+    gce.use_cache = False
+    gce._driver.ex_list_zones.return_value = []
+    assert not gce._get_zones()
+    gce._driver.ex_list_zones.assert_called_once()
+
+
+def test_gce_aggregated_list_filtered(mocker, gce_driver, valid_creds):
+    gce_driver.connection.request.return_value = mocker.Mock(object={})
+    gce = GCE(cloud="test_cloud", **valid_creds)
+    gce._driver = gce_driver
+    gce.filters = Filters(states=frozenset({"pending"}), name="web-*")
+
+    assert not gce._get_instances()
+    gce_driver.connection.request.assert_called_once_with(
+        "/aggregated/instances",
+        method="GET",
+        params={
+            "maxResults": 500,
+            "filter": '(status eq "PROVISIONING|STAGING|STOPPING") (name eq "web-.*")',
+        },
+    )
+
+    gce.filters = Filters(states=frozenset({"error"}))
+    assert not gce.tasks()
+
+
+def test_gce_aggregated_list_filtered_by_time(mocker, gce_driver, valid_creds):
+    gce_driver.connection.request.return_value = mocker.Mock(object={})
+    gce = GCE(cloud="test_cloud", **valid_creds)
+    gce._driver = gce_driver
+    gce.filters = Filters(
+        created_after=datetime(2023, 4, 30, 12, tzinfo=timezone.utc),
+        created_before=datetime(2023, 5, 1, 12, tzinfo=timezone.utc),
+    )
+
+    assert not gce._get_instances()
+    params = gce_driver.connection.request.call_args.kwargs["params"]
+    # Widened by a day as timestamps are in the timezone of the zone
+    assert params["filter"] == (
+        '(creationTimestamp eq "2023-04-29.*|2023-04-30.*|2023-05-01.*|2023-05-02.*")'
+    )
@@ -104,3 +104,52 @@ def test_get_clients_unsupported_provider_no_config(
 
     assert len(clients) == 0
     assert "Unsupported provider" in caplog.text
+
+
+def test_get_clients_limits(mock_read_file, mock_yaml, mocker):
+    provider = mocker.MagicMock()
+    mocker.patch("cloudview.cloudview.PROVIDERS", {str(Provider.EC2): provider})
+
+    mock_yaml.return_value = {
+        "limits": {"ec2": {"rate": 10, "concurrency": 8}},
+        "providers": {"ec2": {"cloud1": {"key": "k", "limits": {"rate": 2}}}},
+    }
+
+    clients = get_clients("/path/to/config_file.yaml")
+
+    assert len(clients) == 1
+    assert clients[0].limiter.rate == 2
+    assert clients[0].provider_limiter.concurrency == 8
+    provider.assert_called_once_with(cloud="cloud1", key="k")
+
+
+def test_get_clients_invalid_limits(mock_read_file, mock_yaml, mocker, caplog):
+    mocker.patch(
+        "cloudview.cloudview.PROVIDERS",
+        {str(Provider.EC2): mocker.MagicMock()},
+    )
+
+    mock_yaml.return_value = {
+        "providers": {"ec2": {"cloud1": {"limits": {"rate": -1}}}},
+    }
+
+    clients = get_clients("/path/to/config_file.yaml")
+
+    assert len(clients) == 0
+    assert "Invalid limits" in caplog.text
+
+
+def test_get_clients_selected_providers(mock_read_file, mock_yaml, mocker):
+    providers = mocker.MagicMock()
+    providers.__contains__.return_value = True
+    providers.__getitem__.return_value = mocker.MagicMock()
+    mocker.patch("cloudview.cloudview.PROVIDERS", providers)
+
+    mock_yaml.return_value = {
+        "providers": {"ec2": {"cloud1": {}}, "gce": {"cloud2": {}}},
+    }
+
+    clients = get_clients("/path/to/config_file.yaml", providers=["gce"])
+
+    assert len(clients) == 1
+    providers.__getitem__.assert_called_once_with("gce")
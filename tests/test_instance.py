@@ -1,6 +1,9 @@
 # pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,no-member,eval-used,too-few-public-methods
+from datetime import date, datetime, timedelta, timezone
+
 import pytest
-from cloudview.instance import Instance, CSP
+from libcloud.compute.types import LibcloudError
+from cloudview.instance import Filters, Instance, CSP, iso_date_globs
 
 
 def test_instance_repr():
@@ -17,7 +20,7 @@ def test_instance_repr():
     )
     repr_string = repr(item)
     recreated_item = eval(repr_string)
-    assert item.__dict__ == recreated_item.__dict__
+    assert item == recreated_item
 
 
 def test_instance_creation():
@@ -36,6 +39,41 @@ def test_instance_creation():
     assert instance.state == "Running"
 
 
+def make_instance(**kwargs):
+    return Instance(
+        **{
+            "name": "Example",
+            "provider": "P",
+            "cloud": "C",
+            "id": "id",
+            "size": "".join(["s", "1"]),
+            "time": "T",
+            "state": "running",
+            "location": "L",
+            "extra": {"key": "value"},
+        }
+        | kwargs
+    )
+
+
+def test_instance_compact():
+    instance = make_instance()
+    assert instance.extra is None
+    assert instance.size is make_instance().size
+    assert not hasattr(instance, "__dict__")
+    with pytest.raises(AttributeError):
+        instance.unknown_attribute = "value"
+
+
+def test_instance_keep_extra(monkeypatch):
+    monkeypatch.setattr(Instance, "keep_extra", True)
+    assert make_instance().extra == {"key": "value"}
+
+
+def test_instance_format_map():
+    assert "{name} {state:>8}".format_map(make_instance()) == "Example  running"
+
+
 def test_instance_unknown_attribute():
     instance = Instance(
         name="name",
@@ -91,3 +129,115 @@ def test_csp_get_instances():
     assert len(instances) == 2
     assert instances[0].name == "Instance1"
     assert instances[1].id == "id2"
+
+
+def test_csp_iter_instances():
+    csp = MockCSP()
+    instances = csp.iter_instances()
+    assert next(instances).name == "Instance1"
+    assert next(instances).name == "Instance2"
+
+
+class FailingCSP(CSP):
+    def _get_instances(self):
+        raise LibcloudError("error")
+
+
+def test_csp_get_instances_error():
+    csp = FailingCSP()
+    assert not csp.get_instances()
+    assert csp.errors == 1
+
+
+def test_filters_match():
+    instance = Instance(
+        provider="P",
+        cloud="C",
+        name="web-1",
+        id="id",
+        size="s",
+        time="T",
+        state="running",
+        location="L",
+    )
+    assert not Filters()
+    assert Filters().match(instance)
+    assert Filters(states=frozenset({"running"}), name="web-?").match(instance)
+    assert not Filters(states=frozenset({"stopped"})).match(instance)
+    assert not Filters(name="db*").match(instance)
+
+
+def test_filters_statuses():
+    state_map = {"A": "running", "B": "running", "C": "stopped"}
+    assert Filters().statuses(state_map) is None
+    assert Filters(states=frozenset({"running"})).statuses(state_map) == ["A", "B"]
+    assert Filters(states=frozenset({"error"})).statuses(state_map) == []
+    assert Filters(states=frozenset({"running", "unknown"})).statuses(state_map) is None
+
+
+@pytest.mark.parametrize(
+    "name, pattern, regex",
+    [
+        (None, None, None),
+        ("web-*", "web-*", "web-.*"),
+        ("db?.example", "db?.example", "db.[.]example"),
+        ("web[12]", None, None),
+        ("a b", None, None),
+    ],
+)
+def test_filters_name(name, pattern, regex):
+    assert Filters(name=name).name_pattern() == pattern
+    assert Filters(name=name).name_regex() == regex
+
+
+def test_filters_match_time():
+    instance = Instance(
+        provider="P",
+        cloud="C",
+        name="web-1",
+        id="id",
+        size="s",
+        time=datetime(2023, 1, 2, tzinfo=timezone.utc),
+        state="running",
+        location="L",
+    )
+    after = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    before = datetime(2023, 1, 3, tzinfo=timezone.utc)
+    assert Filters(created_after=after, created_before=before).match(instance)
+    assert not Filters(created_after=before).match(instance)
+    assert not Filters(created_before=after).match(instance)
+
+
+def test_iso_date_globs():
+    assert iso_date_globs(date(2023, 4, 29), date(2025, 2, 2)) == [
+        "2023-04-29*",
+        "2023-04-30*",
+        "2023-05-*",
+        "2023-06-*",
+        "2023-07-*",
+        "2023-08-*",
+        "2023-09-*",
+        "2023-10-*",
+        "2023-11-*",
+        "2023-12-*",
+        "2024-*",
+        "2025-01-*",
+        "2025-02-01*",
+        "2025-02-02*",
+    ]
+    assert iso_date_globs(date(2023, 2, 1), date(2023, 2, 28)) == ["2023-02-*"]
+    assert not iso_date_globs(date(2023, 2, 2), date(2023, 2, 1))
+
+
+def test_filters_date_globs():
+    assert Filters().date_globs() is None
+    now = datetime.now(timezone.utc)
+    filters = Filters(created_after=now - timedelta(hours=1))
+    assert filters.date_globs() in (
+        [f"{now - timedelta(hours=1):%Y-%m-%d}*", f"{now:%Y-%m-%d}*"],
+        [f"{now:%Y-%m-%d}*"],
+    )
+    filters = Filters(created_before=datetime(2006, 9, 1, tzinfo=timezone.utc))
+    assert filters.date_globs(timedelta(days=1))[-2:] == ["2006-09-01*", "2006-09-02*"]
+    filters = Filters(created_after=now + timedelta(days=2))
+    assert filters.date_globs() == []
@@ -0,0 +1,79 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access,too-few-public-methods
+
+import threading
+import time
+
+from cloudview.inventory import Inventory
+from tests.conftest import MockCSP
+
+
+def test_refresh(client):
+    inventory = Inventory([client])
+    assert not list(inventory.instances())
+    assert not inventory.refreshed
+
+    inventory.refresh()
+    assert [instance.name for instance in inventory.instances()] == ["name1"]
+    fetch = inventory.snapshot()[client]
+    assert fetch.errors == 0
+    assert fetch.finished and fetch.duration >= 0
+    assert inventory.refreshed
+
+    inventory.refresh()
+    assert [instance.name for instance in inventory.instances()] == ["name2"]
+
+
+def test_refresh_errors_keep_instances(client):
+    inventory = Inventory([client])
+    inventory.refresh()
+    client.fail = True
+    inventory.refresh()
+    fetch = inventory.snapshot()[client]
+    assert fetch.errors == 1
+    assert [instance.name for instance in fetch.instances] == ["name1"]
+
+
+def test_start_stop(client, mocker):
+    inventory = Inventory([client], interval=3600)
+    refresh = mocker.spy(inventory, "refresh")
+    inventory.start()
+    inventory.stop()
+    assert refresh.call_count == 1
+    assert [instance.name for instance in inventory.instances()] == ["name1"]
+
+
+def test_start_survives_exceptions(client, mocker):
+    inventory = Inventory([client], interval=3600)
+    mocker.patch.object(inventory, "refresh", side_effect=RuntimeError("boom"))
+    error = mocker.patch("logging.error")
+    inventory.start()
+    inventory.stop()
+    error.assert_called_once()
+
+
+def test_refresh_single_flight(mocker):
+    client = MockCSP("cloud")
+    inventory = Inventory([client])
+    started, release = threading.Event(), threading.Event()
+
+    def get_instances():
+        started.set()
+        release.wait()
+        return []
+
+    mock = mocker.patch.object(client, "_get_instances", side_effect=get_instances)
+    leader = threading.Thread(target=inventory.refresh)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=inventory.refresh) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+    assert mock.call_count == 1
+    assert inventory.generation == 1
+
+    inventory.refresh()
+    assert mock.call_count == 2
@@ -0,0 +1,158 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access
+
+import threading
+import time
+
+import pytest
+import requests
+from libcloud.common.exceptions import BaseHTTPError, RateLimitReachedError
+from cloudview import limits
+from cloudview.limits import RateLimiter, is_throttled, limit_requests
+from cloudview.session import Session, add_middleware, client_context, remove_middleware
+
+
+@pytest.fixture(autouse=True)
+def short_delays(monkeypatch):
+    monkeypatch.setattr(limits, "BASE_DELAY", 0.01)
+
+
+def make_response(status_code=200, headers=None, content=b""):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = content
+    return response
+
+
+def test_rate_limiter_invalid():
+    with pytest.raises(ValueError):
+        RateLimiter(rate=-1)
+
+
+def test_rate_limiter_unlimited():
+    limiter = RateLimiter()
+    start = time.monotonic()
+    for _ in range(100):
+        with limiter:
+            pass
+    assert time.monotonic() - start < 0.1
+
+
+def test_rate_limiter_rate():
+    limiter = RateLimiter(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        with limiter:
+            pass
+    assert time.monotonic() - start >= 0.09
+
+
+def test_rate_limiter_concurrency():
+    limiter = RateLimiter(concurrency=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with limiter:
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
+
+
+def test_rate_limiter_backoff():
+    limiter = RateLimiter()
+    limiter.backoff(0.05)
+    assert limiter.paused
+    start = time.monotonic()
+    with limiter:
+        pass
+    assert time.monotonic() - start >= 0.04
+    assert not limiter.paused
+
+
+def test_rate_limiter_observe_throttled():
+    limiter = RateLimiter()
+    limiter.observe(make_response(429, {"Retry-After": "0.05"}))
+    assert limiter.paused
+    assert limiter._failures == 1
+
+
+def test_rate_limiter_observe_gce_rate_limit():
+    limiter = RateLimiter()
+    limiter.observe(make_response(403, content=b'{"reason": "rateLimitExceeded"}'))
+    assert limiter.paused
+
+
+def test_rate_limiter_observe_azure_quota():
+    limiter = RateLimiter()
+    limiter.observe(
+        make_response(200, {"x-ms-ratelimit-remaining-subscription-reads": "11999"})
+    )
+    assert not limiter.paused
+    limiter.observe(
+        make_response(200, {"x-ms-ratelimit-remaining-subscription-reads": "3"})
+    )
+    assert limiter.paused
+
+
+def test_rate_limiter_observe_success_resets_failures():
+    limiter = RateLimiter()
+    limiter.observe(make_response(503))
+    limiter.observe(make_response(200))
+    assert limiter._failures == 0
+
+
+@pytest.mark.parametrize(
+    "exc,expected",
+    [
+        (RateLimitReachedError(headers={}), True),
+        (BaseHTTPError(503, "RequestLimitExceeded: Request limit exceeded."), True),
+        (BaseHTTPError(404, "Not found"), False),
+        (Exception("Throttling: Rate exceeded"), True),
+        (Exception("error"), False),
+    ],
+)
+def test_is_throttled(exc, expected):
+    assert is_throttled(exc) is expected
+
+
+def test_limit_requests(mocker):
+    client = mocker.Mock(limiter=RateLimiter(), provider_limiter=RateLimiter())
+    send = mocker.Mock(return_value=make_response(429))
+
+    response = limit_requests(send, client, "request", timeout=1)
+
+    assert response.status_code == 429
+    send.assert_called_once_with("request", timeout=1)
+    assert client.limiter.paused
+    assert not client.provider_limiter.paused
+
+
+def test_session_middleware(mocker):
+    mocker.patch.object(requests.Session, "send", return_value=make_response())
+    calls = []
+
+    def middleware(send, client, request, **kwargs):
+        calls.append((client, request))
+        return send(request, **kwargs)
+
+    add_middleware(middleware)
+    try:
+        with client_context("client"):
+            Session().send("request")
+    finally:
+        remove_middleware(middleware)
+    Session().send("request")
+
+    assert calls == [("client", "request")]
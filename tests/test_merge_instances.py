@@ -0,0 +1,87 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,too-few-public-methods
+
+import argparse
+import threading
+from datetime import datetime
+
+import pytest
+from pytz import utc
+from cloudview import cloudview
+from cloudview.instance import Filters
+from tests.conftest import MockCSP, make_instance
+
+
+@pytest.fixture
+def set_args(monkeypatch):
+    def _set_args(**kwargs):
+        namespace = argparse.Namespace(
+            filters=Filters(), sort=None, reverse=False, cache_ttl=0, refresh=False
+        )
+        for key, value in kwargs.items():
+            setattr(namespace, key, value)
+        monkeypatch.setattr(cloudview, "args", namespace, raising=False)
+
+    return _set_args
+
+
+@pytest.mark.parametrize("sort", ["name", "time"])
+@pytest.mark.parametrize("reverse", [False, True])
+def test_merge_instances_sorted(set_args, sort, reverse):
+    set_args(sort=sort, reverse=reverse)
+    clients = [
+        MockCSP("c1", [make_instance("b", 2), make_instance("e", 5)]),
+        MockCSP("c2", [make_instance("a", 1), make_instance("d", 4)]),
+        MockCSP("c3", [make_instance("c", 3)]),
+    ]
+
+    names = [
+        instance.name
+        for instance in cloudview.merge_instances(cloudview.fetch_instances(clients))
+    ]
+
+    expected = ["a", "b", "c", "d", "e"]
+    assert names == (expected[::-1] if reverse else expected)
+
+
+def test_merge_instances_unsorted_no_head_of_line_blocking(set_args):
+    set_args()
+    event = threading.Event()
+    clients = [
+        MockCSP("slow", [make_instance("slow", 1)], event=event),
+        MockCSP("fast", [make_instance("fast", 2)]),
+    ]
+
+    instances = cloudview.merge_instances(cloudview.fetch_instances(clients))
+    assert next(instances).name == "fast"
+    event.set()
+    assert [instance.name for instance in instances] == ["slow"]
+
+
+def test_merge_instances_filters_states(set_args):
+    set_args(filters=Filters(states=frozenset({"stopped"})))
+    clients = [MockCSP("c1", [make_instance("a", 1)])]
+
+    assert not list(cloudview.merge_instances(cloudview.fetch_instances(clients)))
+
+
+def test_merge_instances_filters_name(set_args):
+    set_args(filters=Filters(name="[ab]*"))
+    clients = [MockCSP("c1", [make_instance("abc", 1), make_instance("cab", 2)])]
+
+    instances = cloudview.merge_instances(cloudview.fetch_instances(clients))
+    assert [instance.name for instance in instances] == ["abc"]
+
+
+def test_merge_instances_filters_time(set_args):
+    set_args(
+        filters=Filters(
+            created_after=datetime(2023, 1, 2, tzinfo=utc),
+            created_before=datetime(2023, 1, 4, tzinfo=utc),
+        )
+    )
+    clients = [
+        MockCSP("c1", [make_instance(name, day) for day, name in enumerate("abcde")])
+    ]
+
+    instances = cloudview.merge_instances(cloudview.fetch_instances(clients))
+    assert [instance.name for instance in instances] == ["b", "c", "d"]
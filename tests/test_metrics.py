@@ -0,0 +1,90 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access
+
+import threading
+from datetime import datetime
+
+import pytest
+import requests
+from pytz import utc
+from cloudview.inventory import Inventory
+from cloudview.metrics import Metrics, MetricsServer, escape, labels
+from tests.conftest import MockCSP, make_instance
+
+
+@pytest.fixture
+def client():
+    cloud = 'cl"oud'
+    return MockCSP(
+        cloud,
+        [
+            make_instance("a", cloud=cloud),
+            make_instance("b", 1, cloud=cloud),
+            make_instance("c", 2, cloud=cloud, state="stopped"),
+        ],
+    )
+
+
+@pytest.fixture
+def inventory(client):
+    inventory = Inventory([client])
+    inventory.refresh()
+    return inventory
+
+
+def test_escape():
+    assert escape('a\\b"c\nd') == 'a\\\\b\\"c\\nd'
+    assert labels(a=1, b="x") == 'a="1",b="x"'
+
+
+def test_render_empty(client):
+    text = Metrics(Inventory([client])).render()
+    assert "# TYPE cloudview_instances gauge" in text
+    assert "{" not in text
+
+
+def test_render(inventory):
+    now = datetime(2023, 1, 2, tzinfo=utc).timestamp()
+    lines = Metrics(inventory).render(now=now).splitlines()
+    cloud = 'provider="mock",cloud="cl\\"oud"'
+    assert (
+        f'cloudview_instances{{{cloud},state="running",size="small",location="zone"}} 2'
+        in lines
+    )
+    assert (
+        f'cloudview_instances{{{cloud},state="stopped",size="small",location="zone"}} 1'
+        in lines
+    )
+    assert f"cloudview_oldest_instance_age_seconds{{{cloud}}} 86400" in lines
+    assert f"cloudview_fetch_errors{{{cloud}}} 0" in lines
+    assert f"cloudview_errors_total{{{cloud}}} 0" in lines
+    assert "# TYPE cloudview_errors_total counter" in lines
+
+
+def test_render_aggregates_once(inventory, client, mocker):
+    metrics = Metrics(inventory)
+    aggregate = mocker.spy(metrics, "_aggregate")
+    metrics.render()
+    first = metrics._aggregates[client]
+    metrics.render()
+    assert metrics._aggregates[client] is first
+    inventory.refresh()
+    metrics.render()
+    assert metrics._aggregates[client] is not first
+    assert aggregate.call_count == 3
+
+
+def test_server(inventory, client):
+    with MetricsServer(("127.0.0.1", 0), Metrics(inventory)) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            response = requests.get(f"{url}/metrics", timeout=5)
+            assert response.status_code == 200
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "cloudview_instances{" in response.text
+            assert requests.get(f"{url}/", timeout=5).status_code == 404
+        finally:
+            server.shutdown()
+            thread.join()
+    assert client.calls == 1
@@ -2,15 +2,22 @@
 
 import os
 import pytest
+from libcloud.common.exceptions import BaseHTTPError
 from libcloud.compute.types import LibcloudError
+from cloudview import openstack as openstack_module
 from cloudview.openstack import get_creds, Openstack
-from cloudview.instance import Instance
+from cloudview.instance import Filters, Instance
 
 for k in os.environ:
     if k.startswith("OS_"):
         os.environ.pop(k)
 
 
+@pytest.fixture(autouse=True)
+def clear_flavors():
+    openstack_module._flavors.clear()
+
+
 @pytest.fixture
 def mock_openstack_env(monkeypatch):
     env_vars = {
@@ -122,6 +129,7 @@ def test_openstack_get_size(mocker, mock_driver, valid_creds):
     mock_size_2 = mocker.Mock(id="size_id_2")
     mock_size_2.name = "size_name_2"
     mock_driver.list_sizes.return_value = [mock_size_1, mock_size_2]
+    mock_driver.ex_get_size.side_effect = BaseHTTPError(404, "Not found", {})
     openstack = Openstack(cloud="test_cloud", **valid_creds)
     openstack._driver = mock_driver
 
@@ -134,6 +142,65 @@ def test_openstack_get_size(mocker, mock_driver, valid_creds):
     result = openstack._get_size("unknown_size_id")
     assert result == "unknown"
 
+    mock_driver.list_sizes.assert_called_once()
+
+
+def test_openstack_get_size_fetches_missing_flavor(mocker, mock_driver, valid_creds):
+    mock_size_1 = mocker.Mock(id="size_id_1")
+    mock_size_1.name = "size_name_1"
+    mock_size_3 = mocker.Mock(id="size_id_3")
+    mock_size_3.name = "size_name_3"
+    mock_driver.list_sizes.return_value = [mock_size_1]
+    mock_driver.ex_get_size.return_value = mock_size_3
+    openstack = Openstack(cloud="test_cloud", **valid_creds)
+    openstack._driver = mock_driver
+
+    assert openstack._get_size("size_id_1") == "size_name_1"
+    assert openstack._get_size("size_id_3") == "size_name_3"
+    assert openstack._get_size("size_id_3") == "size_name_3"
+
+    mock_driver.list_sizes.assert_called_once()
+    mock_driver.ex_get_size.assert_called_once_with("size_id_3")
+
+
+def test_openstack_flavors_shared_by_endpoint(mocker, valid_creds):
+    mock_size = mocker.Mock(id="size_id_1")
+    mock_size.name = "size_name_1"
+    drivers = [mocker.Mock(), mocker.Mock()]
+    drivers[0].list_sizes.return_value = [mock_size]
+    clients = []
+    for cloud, driver in zip(("cloud1", "cloud2"), drivers):
+        client = Openstack(
+            cloud=cloud, ex_force_base_url="https://example.com", **valid_creds
+        )
+        client._driver = driver
+        clients.append(client)
+
+    assert clients[0]._get_size("size_id_1") == "size_name_1"
+    assert clients[1]._get_size("size_id_1") == "size_name_1"
+
+    drivers[0].list_sizes.assert_called_once()
+    drivers[1].list_sizes.assert_not_called()
+
+
+def test_openstack_flavors_disk_cache(mocker, mock_driver, valid_creds):
+    mock_size = mocker.Mock(id="size_id_1")
+    mock_size.name = "size_name_1"
+    mock_driver.list_sizes.return_value = [mock_size]
+    openstack = Openstack(cloud="test_cloud", **valid_creds)
+    openstack._driver = mock_driver
+    assert openstack._get_size("size_id_1") == "size_name_1"
+
+    openstack_module._flavors.clear()
+    mock_driver.reset_mock()
+    assert openstack._get_size("size_id_1") == "size_name_1"
+    mock_driver.list_sizes.assert_not_called()
+
+    openstack_module._flavors.clear()
+    mocker.patch.object(openstack_module, "FLAVORS_TTL", -1)
+    assert openstack._get_size("size_id_1") == "size_name_1"
+    mock_driver.list_sizes.assert_called_once()
+
 
 def test_openstack_get_sizes(mocker, mock_driver, valid_creds):
     mock_driver.list_sizes.return_value = [
@@ -173,3 +240,32 @@ def test_openstack_get_instances_with_driver_exception(mock_driver):
         openstack._driver = mock_driver
         result = openstack._get_instances()
         assert len(result) == 0
+
+
+def test_openstack_get_instances_filtered(
+    mocker, mock_driver, mock_instance, valid_creds
+):
+    mock_driver._paginated_request.return_value = {"servers": ["server"]}
+    mock_driver._to_nodes.return_value = [mock_instance]
+    mocker.patch.object(Openstack, "_get_size", return_value="small")
+    openstack = Openstack(cloud="test_cloud", **valid_creds)
+    openstack._driver = mock_driver
+    openstack.options["ex_all_tenants"] = True
+    openstack.filters = Filters(states=frozenset({"stopped"}), name="web?.*")
+
+    result = openstack._get_instances()
+
+    assert [instance.id for instance in result] == ["test_instance_id"]
+    mock_driver.list_nodes.assert_not_called()
+    mock_driver._paginated_request.assert_called_once_with(
+        "/servers/detail",
+        "servers",
+        mock_driver.connection,
+        params={"status": ["SHUTOFF"], "name": "^web.[.].*$", "all_tenants": 1},
+    )
+    mock_driver._to_nodes.assert_called_once_with({"servers": ["server"]})
+
+    # Deleted servers aren't listed
+    openstack.filters = Filters(states=frozenset({"terminated"}))
+    assert not openstack._get_instances()
+    assert mock_driver._paginated_request.call_count == 1
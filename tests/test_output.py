@@ -0,0 +1,76 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name
+
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from pytz import utc
+from cloudview.instance import Instance
+from cloudview.output import WRITERS
+
+FIELDS = ["provider", "name", "time"]
+
+
+@pytest.fixture
+def instances():
+    return [
+        Instance(
+            provider="ec2",
+            cloud=f"cloud{i}",
+            name=f"name{i}",
+            id=f"id{i}",
+            size="s",
+            time=datetime(2023, 9, 10, 15, 30, i, tzinfo=utc),
+            state="running",
+            location="L",
+        )
+        for i in range(2)
+    ]
+
+
+def write(output, instances, fields=None, time_format="%Y-%m-%d %H:%M:%S"):
+    file = io.StringIO()
+    writer = WRITERS[output](file, fields or FIELDS, time_format)
+    writer.header()
+    for instance in instances:
+        writer.write(instance)
+    writer.footer()
+    return file.getvalue()
+
+
+def test_table(instances):
+    lines = write("table", instances).splitlines()
+    assert lines[0].split() == ["PROVIDER", "NAME", "TIME"]
+    assert lines[1].split() == ["ec2/cloud0", "name0", "2023-09-10", "17:30:00"]
+    assert isinstance(instances[0].time, datetime)
+    assert instances[0].provider == "ec2"
+
+
+def test_json(instances):
+    data = json.loads(write("json", instances))
+    assert data == [
+        {
+            "provider": "ec2",
+            "cloud": f"cloud{i}",
+            "name": f"name{i}",
+            "time": f"2023-09-10T15:30:0{i}+00:00",
+        }
+        for i in range(2)
+    ]
+    assert json.loads(write("json", [])) == []
+
+
+def test_ndjson(instances):
+    lines = write("ndjson", instances, fields=["name", "state"]).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"name": "name0", "state": "running"},
+        {"name": "name1", "state": "running"},
+    ]
+
+
+def test_csv(instances):
+    instances[0].extra = {"key": "value"}
+    rows = list(csv.reader(io.StringIO(write("csv", instances, ["name", "extra"]))))
+    assert rows == [["name", "extra"], ["name0", '{"key": "value"}'], ["name1", ""]]
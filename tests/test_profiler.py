@@ -0,0 +1,84 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access,abstract-method
+
+import pstats
+import sys
+import threading
+import time
+
+import pytest
+from cloudview.instance import CSP
+from cloudview.profiler import SHARED_PROFILE, Profiler, collapse, profiler
+from cloudview.scheduler import Scheduler
+
+
+def busy_loop(seconds=0.05):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+    return seconds
+
+
+class Client(CSP):
+    def tasks(self):
+        return [self.list_instances, self.list_instances]
+
+    def list_instances(self):
+        yield busy_loop()
+
+
+@pytest.fixture
+def enabled():
+    profiler.enable()
+    yield profiler
+    if profiler.enabled:
+        profiler.disable()
+
+
+def test_disabled():
+    assert profiler.wrap(busy_loop) is busy_loop
+    assert not profiler.profiles
+
+
+def test_collapse():
+    def inner():
+        return collapse(sys._getframe(), "thread")
+
+    stack = inner().split(";")
+    assert stack[0] == "thread"
+    assert stack[-1].startswith("test_collapse.<locals>.inner (")
+    assert stack[-2].startswith("test_collapse (")
+
+
+def test_wrap(enabled):
+    thread = threading.Thread(target=enabled.wrap(busy_loop), name="worker")
+    thread.start()
+    thread.join()
+    enabled.disable()
+    assert len(enabled.profiles) == (1 if SHARED_PROFILE else 2)
+    assert not enabled._busy
+    stats = pstats.Stats(*enabled.profiles)
+    assert "busy_loop" in {function for _, _, function in stats.stats}
+
+
+def test_scheduler(enabled, tmp_path):
+    results = list(Scheduler(max_workers=2).run([Client(cloud="cloud")]))
+    assert len(results) == 3
+    enabled.disable()
+
+    prefix = str(tmp_path / "profile")
+    enabled.save(prefix)
+    stats = pstats.Stats(f"{prefix}.pstats")
+    functions = {function for _, _, function in stats.stats}
+    assert "busy_loop" in functions
+    with open(f"{prefix}.collapsed", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert any(line.startswith("cloudview") and "busy_loop (" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_save_empty(tmp_path):
+    collector = Profiler()
+    prefix = str(tmp_path / "profile")
+    collector.save(prefix)
+    with open(f"{prefix}.collapsed", encoding="utf-8") as file:
+        assert not file.read()
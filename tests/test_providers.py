@@ -0,0 +1,53 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,protected-access
+
+import os
+import subprocess
+import sys
+from collections import OrderedDict
+
+import pytest
+from cloudview.providers import Registry
+
+
+def test_registry(mocker):
+    registry = Registry({"a": "collections:OrderedDict", "b": "no.such.module:B"})
+    assert list(registry) == ["a", "b"]
+    assert len(registry) == 2
+    assert "b" in registry
+    assert not registry._loaded
+
+    import_module = mocker.spy(sys.modules["cloudview.providers"], "import_module")
+    assert registry["a"] is OrderedDict
+    assert registry["a"] is OrderedDict
+    import_module.assert_called_once_with("collections")
+    with pytest.raises(KeyError):
+        registry["c"]  # pylint: disable=pointless-statement
+
+
+def lazy_modules(code, **env):
+    code += (
+        "; import sys; print(' '.join(m for m in sys.modules if m.startswith("
+        "('cloudview.ec2', 'cloudview.gce', 'cloudview.azure', 'cloudview.openstack',"
+        " 'libcloud.compute.drivers.', 'cryptography'))))"
+    )
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={**os.environ, **env},
+    ).stdout.split()
+
+
+def test_providers_imported_lazily():
+    assert not lazy_modules("import cloudview.cloudview")
+    modules = lazy_modules(
+        "from cloudview.cloudview import PROVIDERS; PROVIDERS['gce']"
+    )
+    assert "cloudview.gce" in modules
+    assert "cloudview.ec2" not in modules
+
+
+def test_ca_bundle_without_openstack():
+    code = "import cloudview.cloudview, libcloud.security as s; print(s.CA_CERTS_PATH)"
+    assert lazy_modules(code, REQUESTS_CA_BUNDLE="/ca.pem") == ["/ca.pem"]
@@ -0,0 +1,54 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,redefined-outer-name
+
+from datetime import datetime
+
+import pytest
+from pytz import utc
+from cloudview.query import Index
+from tests.conftest import make_instance
+
+NOW = datetime(2023, 1, 10, tzinfo=utc).timestamp()
+DAY = 86400
+
+
+@pytest.fixture
+def index():
+    return Index(
+        [
+            make_instance("web1", 8, provider="ec2"),
+            make_instance("web2", 4, provider="ec2", state="stopped"),
+            make_instance("db1", provider="gce", size="large"),
+            make_instance("db2", 2, provider="azure_arm", state="stopped"),
+        ]
+    )
+
+
+def names(instances):
+    return [instance.name for instance in instances]
+
+
+def test_all(index):
+    assert len(index) == 4
+    assert names(index.search()) == ["web1", "web2", "db1", "db2"]
+
+
+def test_filters(index):
+    assert names(index.search({"state": ["stopped"]})) == ["web2", "db2"]
+    assert names(index.search({"provider": ["gce", "azure_arm"]})) == ["db1", "db2"]
+    assert names(index.search({"provider": ["ec2"], "state": ["stopped"]})) == ["web2"]
+    assert names(index.search({"size": ["large"], "state": ["stopped"]})) == []
+    assert names(index.search({"location": ["nowhere"]})) == []
+
+
+def test_name(index):
+    assert names(index.search(name="db*")) == ["db1", "db2"]
+    assert names(index.search({"state": ["stopped"]}, name="*2")) == ["web2", "db2"]
+
+
+def test_age(index):
+    assert names(index.search(older_than=4 * DAY, now=NOW)) == ["web2", "db1", "db2"]
+    assert names(index.search(newer_than=6 * DAY, now=NOW)) == ["web1", "web2"]
+    matches = index.search(older_than=4 * DAY, newer_than=8 * DAY, now=NOW)
+    assert names(matches) == ["web2", "db2"]
+    matches = index.search({"provider": ["ec2"]}, older_than=2 * DAY, now=NOW)
+    assert names(matches) == ["web2"]
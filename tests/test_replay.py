@@ -0,0 +1,165 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name
+
+import json
+import os
+import stat
+import xml.etree.ElementTree as ET
+
+import pytest
+import requests
+from cloudview import session
+from cloudview.replay import (
+    REDACTED,
+    Recorder,
+    Replayer,
+    record_replay,
+    sanitize_body,
+    sanitize_url,
+)
+
+
+def test_sanitize_url():
+    url = "https://host/path?Action=List&X-Amz-Signature=abc&pageToken=next"
+    assert (
+        sanitize_url(url)
+        == f"https://host/path?Action=List&X-Amz-Signature={REDACTED}&pageToken=next"
+    )
+    assert sanitize_url("https://host/path") == "https://host/path"
+
+
+def test_sanitize_body():
+    body = json.dumps(
+        {"access_token": "abc", "items": [{"password": "x", "name": "n"}], "n": 1}
+    )
+    assert json.loads(sanitize_body(body)) == {
+        "access_token": REDACTED,
+        "items": [{"password": REDACTED, "name": "n"}],
+        "n": 1,
+    }
+    assert sanitize_body("<xml/>") == "<xml/>"
+    assert sanitize_body("slow down") == "slow down"
+
+
+def test_sanitize_body_metadata():
+    body = json.dumps(
+        {
+            "metadata": {
+                "items": [
+                    {"key": "ssh-keys", "value": "user:ssh-rsa AAAA"},
+                    {"key": "startup-script", "value": "#!/bin/sh"},
+                    {"key": "role", "value": "web"},
+                ]
+            },
+            "Tags": [{"Key": "db-password", "Value": "hunter2"}],
+        }
+    )
+    assert json.loads(sanitize_body(body)) == {
+        "metadata": {
+            "items": [
+                {"key": "ssh-keys", "value": REDACTED},
+                {"key": "startup-script", "value": REDACTED},
+                {"key": "role", "value": "web"},
+            ]
+        },
+        "Tags": [{"Key": "db-password", "Value": REDACTED}],
+    }
+
+
+def test_sanitize_body_xml():
+    body = (
+        '<Response xmlns="urn:ec2"><keyName>kp</keyName><tagSet>'
+        "<item><key>Name</key><value>web</value></item>"
+        "<item><key>api-token</key><value>abc</value></item>"
+        "</tagSet></Response>"
+    )
+    root = ET.fromstring(sanitize_body(body))
+    namespace = {"ec2": "urn:ec2"}
+    assert root.findtext("ec2:keyName", namespaces=namespace) == REDACTED
+    assert [
+        (
+            item.findtext("ec2:key", namespaces=namespace),
+            item.findtext("ec2:value", namespaces=namespace),
+        )
+        for item in root.iterfind("ec2:tagSet/ec2:item", namespace)
+    ] == [("Name", "web"), ("api-token", REDACTED)]
+
+
+def make_response(request, status, body, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = "OK" if status == 200 else "Error"
+    response.headers.update(headers or {})
+    response._content = body.encode("utf-8")  # pylint: disable=protected-access
+    response.request = request
+    return response
+
+
+def prepare(url, method="GET"):
+    return requests.Request(method, url).prepare()
+
+
+@pytest.fixture
+def recording(tmp_path):
+    recorder = Recorder()
+    responses = iter(
+        [
+            make_response(None, 200, '{"page": 1}', {"X-Subject-Token": "secret"}),
+            make_response(None, 200, '{"page": 2}'),
+            make_response(None, 429, "slow down"),
+        ]
+    )
+
+    def send(request, **_):
+        response = next(responses)
+        response.request = request
+        return response
+
+    recorder(send, "client", prepare("https://host/list?sig=1&Signature=s1"))
+    recorder(send, "client", prepare("https://host/list?sig=1&Signature=s2"))
+    recorder(send, "client", prepare("https://host/other", "POST"))
+    path = str(tmp_path / "recording.json")
+    recorder.save(path)
+    return path
+
+
+def test_recorder(recording):
+    assert stat.S_IMODE(os.stat(recording).st_mode) == 0o600
+    with open(recording, encoding="utf-8") as file:
+        exchanges = json.load(file)["exchanges"]
+    assert [exchange["url"] for exchange in exchanges] == [
+        f"https://host/list?sig=1&Signature={REDACTED}",
+        f"https://host/list?sig=1&Signature={REDACTED}",
+        "https://host/other",
+    ]
+    assert exchanges[0]["headers"] == {"X-Subject-Token": REDACTED}
+    assert exchanges[0]["client"] == "'client'"
+
+
+def test_replayer(mocker, recording):
+    sleep = mocker.patch("cloudview.replay.time.sleep")
+    replayer = Replayer(recording, scale=0.5)
+    send = mocker.Mock()
+
+    url = "https://host/list?sig=1&Signature=new"
+    pages = [replayer(send, None, prepare(url)).json()["page"] for _ in range(3)]
+    assert pages == [1, 2, 2]
+
+    response = replayer(send, None, prepare("https://host/other", "POST"))
+    assert response.status_code == 429
+    assert response.text == "slow down"
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        replayer(send, None, prepare("https://host/unknown"))
+    send.assert_not_called()
+    assert sleep.call_count == 4
+
+
+def test_record_replay(tmp_path, recording):
+    path = str(tmp_path / "new.json")
+    # pylint: disable=protected-access
+    middlewares = list(session._middlewares)
+    with record_replay(record=path, replay=recording, scale=0):
+        assert len(session._middlewares) == len(middlewares) + 2
+    assert session._middlewares == middlewares
+    with open(path, encoding="utf-8") as file:
+        assert not json.load(file)["exchanges"]
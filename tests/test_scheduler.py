@@ -0,0 +1,183 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,too-few-public-methods,abstract-method
+
+import threading
+import time
+from functools import partial
+
+import pytest
+from libcloud.common.exceptions import BaseHTTPError
+from libcloud.compute.types import LibcloudError
+from cloudview import limits
+from cloudview import scheduler as scheduler_module
+from cloudview.instance import CSP, Instance
+from cloudview.scheduler import Scheduler
+from tests.conftest import MockCSP, make_instance
+
+
+class RegionalCSP(MockCSP):
+    def __init__(self, cloud: str, regions: dict) -> None:
+        super().__init__(cloud)
+        self.regions = regions
+
+    def _list_instances_in_region(self, region: str) -> list[Instance]:
+        result = self.regions[region]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def tasks(self):
+        return [
+            partial(self._list_instances_in_region, region) for region in self.regions
+        ]
+
+
+def test_scheduler_run():
+    clients = [
+        RegionalCSP("c1", {"r1": [make_instance("a")], "r2": [make_instance("b")]}),
+        RegionalCSP("c2", {"r1": [make_instance("c")]}),
+        RegionalCSP("c3", {}),
+    ]
+
+    results = list(Scheduler(max_workers=2).run(clients))
+
+    names = sorted(instance.name for _, instance in results if instance is not None)
+    assert names == ["a", "b", "c"]
+    for client in clients:
+        assert results.count((client, None)) == 1
+
+
+def test_scheduler_run_client_done_after_its_instances():
+    client = RegionalCSP("c1", {f"r{i}": [make_instance(str(i))] for i in range(20)})
+
+    results = list(Scheduler(max_workers=4).run([client]))
+
+    assert len(results) == 21
+    assert results[-1] == (client, None)
+
+
+def test_scheduler_run_empty():
+    assert not list(Scheduler().run([]))
+
+
+def test_scheduler_bounded_threads():
+    clients = [
+        RegionalCSP(f"c{i}", {f"r{j}": [make_instance(f"{i}-{j}")] for j in range(30)})
+        for i in range(10)
+    ]
+    before = threading.active_count()
+
+    results = list(Scheduler(max_workers=4).run(clients))
+
+    assert len(results) == 310
+    assert threading.active_count() - before <= 4
+
+
+def test_scheduler_libcloud_error():
+    client = RegionalCSP(
+        "c1", {"r1": LibcloudError("error"), "r2": [make_instance("a")]}
+    )
+
+    results = list(Scheduler(max_workers=2).run([client]))
+
+    assert [instance.name for _, instance in results if instance] == ["a"]
+    assert client.errors == 1
+
+
+def test_scheduler_planning_error():
+    class FailingCSP(CSP):
+        def tasks(self):
+            raise LibcloudError("error")
+
+    client = FailingCSP("c1")
+
+    assert list(Scheduler().run([client])) == [(client, None)]
+    assert client.errors == 1
+
+
+def test_scheduler_unexpected_exception():
+    client = RegionalCSP("c1", {"r1": ValueError("error")})
+
+    with pytest.raises(ValueError):
+        list(Scheduler().run([client]))
+
+
+def test_scheduler_base_exception():
+    class Abort(BaseException):
+        pass
+
+    client = RegionalCSP("c1", {"r1": Abort()})
+
+    with pytest.raises(Abort):
+        list(Scheduler().run([client]))
+
+
+def test_scheduler_wrapper_error(mocker):
+    def wrap(_):
+        def wrapper(*args):
+            raise RuntimeError("wrapper")
+
+        return wrapper
+
+    mocker.patch("cloudview.scheduler.profiler.wrap", side_effect=wrap)
+    client = RegionalCSP("c1", {})
+
+    with pytest.raises(RuntimeError, match="wrapper"):
+        list(Scheduler().run([client]))
+
+
+def test_scheduler_backpressure():
+    produced = []
+
+    class ManyCSP(CSP):
+        def tasks(self):
+            def task():
+                for i in range(100):
+                    produced.append(i)
+                    yield make_instance(str(i))
+
+            return [task]
+
+    results = Scheduler(max_workers=1, maxsize=2).run([ManyCSP("c1")])
+    assert next(results)[1].name == "0"
+    time.sleep(0.2)
+    assert len(produced) < 10
+    results.close()
+
+
+def test_scheduler_retries_throttled_task(monkeypatch):
+    monkeypatch.setattr(limits, "BASE_DELAY", 0.01)
+    calls = []
+
+    class ThrottledCSP(CSP):
+        def tasks(self):
+            def task():
+                calls.append(1)
+                if len(calls) < 3:
+                    raise BaseHTTPError(503, "RequestLimitExceeded")
+                return [make_instance("a")]
+
+            return [task]
+
+    client = ThrottledCSP("c1")
+    results = list(Scheduler().run([client]))
+
+    assert [instance.name for _, instance in results if instance] == ["a"]
+    assert len(calls) == 3
+    assert client.errors == 0
+
+
+def test_scheduler_gives_up_throttled_task(monkeypatch):
+    monkeypatch.setattr(limits, "BASE_DELAY", 0.001)
+    monkeypatch.setattr(scheduler_module, "MAX_RETRIES", 2)
+
+    class ThrottledCSP(CSP):
+        def tasks(self):
+            def task():
+                raise BaseHTTPError(429, "Too many requests")
+
+            return [task]
+
+    client = ThrottledCSP("c1")
+
+    assert list(Scheduler().run([client])) == [(client, None)]
+    assert client.errors == 1
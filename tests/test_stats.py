@@ -0,0 +1,114 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access,abstract-method
+
+import io
+import json
+from datetime import timedelta
+
+import pytest
+import requests
+from cloudview import session
+from cloudview.instance import CSP
+from cloudview.stats import Stats, region_stats, stats
+
+
+@pytest.fixture
+def enabled():
+    stats.enable()
+    yield stats
+    stats.disable()
+
+
+def make_response(content=b"data"):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.elapsed = timedelta(seconds=0.5)
+    return response
+
+
+class Client(CSP):
+    @region_stats
+    def list_region(self, region):
+        stats.middleware(lambda _: make_response(), self, None)
+        if region == "bad":
+            raise ValueError(region)
+        return ["instance1", "instance2"]
+
+
+def test_enable_disable():
+    middlewares = list(session._middlewares)
+    collector = Stats()
+    collector.enable()
+    assert collector.enabled
+    assert collector.middleware in session._middlewares
+    collector.disable()
+    assert session._middlewares == middlewares
+
+
+def test_disabled():
+    client = Client(cloud="cloud")
+    assert client.list_region("region") == ["instance1", "instance2"]
+    assert (client, "region") not in stats.records
+
+
+def test_region_stats(enabled):
+    client = Client(cloud="cloud")
+    client.list_region("region")
+    with pytest.raises(ValueError):
+        client.list_region("bad")
+
+    region = enabled.record(client, "region")
+    assert region.calls == 1
+    assert region.bytes == 4
+    assert region.nodes == 2
+    assert region.errors == 0
+    assert region.first_byte >= 0.5
+    assert region.total is not None
+    assert enabled.record(client, "bad").errors == 1
+    client_record = enabled.record(client)
+    assert client_record.calls == 2
+    assert client_record.bytes == 8
+
+
+def test_middleware_without_client(enabled):
+    enabled.middleware(lambda _: make_response(), None, None)
+    assert not enabled.records
+
+
+def test_constructed(enabled):
+    client = Client(cloud="cloud")
+    with enabled.construct(client):
+        pass
+    assert enabled.record(client).construct >= 0
+
+
+def test_observe(enabled):
+    client = Client(cloud="cloud")
+    results = [(client, "instance1"), (client, "instance2"), (client, None)]
+    assert list(enabled.observe(iter(results))) == results
+    record = enabled.record(client)
+    assert record.nodes == 2
+    assert record.total is not None
+
+
+def test_report(enabled):
+    client = Client(cloud="cloud")
+    client.errors = 1
+    client.list_region("region")
+
+    file = io.StringIO()
+    enabled.report(file, "json")
+    rows = json.loads(file.getvalue())
+    assert [(row["client"], row["region"]) for row in rows] == [
+        ("Client/cloud", ""),
+        ("Client/cloud", "region"),
+    ]
+    assert rows[0]["errors"] == 1
+    assert rows[0]["construct"] is None
+
+    file = io.StringIO()
+    enabled.report(file)
+    lines = file.getvalue().splitlines()
+    assert lines[0].split()[:3] == ["CLIENT", "REGION", "CONSTRUCT"]
+    assert lines[1].split()[:3] == ["Client/cloud", "-", "-"]
+    assert lines[2].split()[1] == "region"
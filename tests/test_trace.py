@@ -0,0 +1,115 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,redefined-outer-name,protected-access,abstract-method
+
+import json
+import threading
+from functools import partial
+
+import pytest
+import requests
+from cloudview import session
+from cloudview.instance import CSP
+from cloudview.scheduler import Scheduler, Task, task_name
+from cloudview.trace import Tracer, traced, tracer
+
+
+@pytest.fixture
+def enabled():
+    tracer.enable()
+    yield tracer
+    tracer.disable()
+
+
+class Client(CSP):
+    def tasks(self):
+        return [
+            partial(self.list_region, "region1"),
+            partial(self.list_region, "region2"),
+        ]
+
+    def list_region(self, region):
+        yield Task(self.list_zone, f"{region}-a")
+        yield self.convert(region)
+
+    def list_zone(self, zone):
+        yield self.convert(zone)
+
+    @traced("convert", "convert")
+    def convert(self, name):
+        return name
+
+
+def test_enable_disable():
+    middlewares = list(session._middlewares)
+    collector = Tracer()
+    collector.enable()
+    assert collector.enabled
+    assert collector.middleware in session._middlewares
+    collector.disable()
+    assert session._middlewares == middlewares
+
+
+def test_disabled():
+    with tracer.span("span") as args:
+        assert args is None
+    assert Client(cloud="cloud").convert("name") == "name"
+    assert not tracer.events
+
+
+def test_span(enabled):
+    with enabled.span("outer", file="clouds.yaml"):
+        with enabled.span("inner", "cat") as args:
+            args["status"] = 200
+    inner, outer = enabled.events
+    assert inner["name"] == "inner" and inner["cat"] == "cat"
+    assert inner["args"] == {"status": "200"}
+    assert outer["args"] == {"file": "clouds.yaml"}
+    assert outer["ph"] == inner["ph"] == "X"
+    assert outer["tid"] == threading.get_native_id()
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_span_exception(enabled):
+    with pytest.raises(ValueError):
+        with enabled.span("span"):
+            raise ValueError
+    assert [event["name"] for event in enabled.events] == ["span"]
+
+
+def test_middleware(enabled):
+    response = requests.Response()
+    response.status_code = 404
+    request = requests.Request("GET", "https://example.com/path?secret=1").prepare()
+    assert enabled.middleware(lambda _: response, "client", request) is response
+    (event,) = enabled.events
+    assert event["name"] == "GET /path"
+    assert event["cat"] == "http"
+    assert event["args"] == {"host": "example.com", "client": "client", "status": "404"}
+
+
+def test_task_name():
+    client = Client(cloud="cloud")
+    assert task_name(partial(client.list_region, "region1")) == (
+        "Client.list_region(region1)"
+    )
+    assert task_name(client.tasks) == "Client.tasks()"
+
+
+def test_scheduler(enabled, tmp_path):
+    client = Client(cloud="cloud")
+    results = list(Scheduler(max_workers=2).run([client]))
+    assert len(results) == 5
+    names = [event["name"] for event in enabled.events]
+    assert names.count("plan") == 1
+    assert names.count("convert") == 4
+    assert "Client.list_region(region1)" in names
+    assert "Client.list_zone(region2-a)" in names
+
+    path = tmp_path / "trace.json"
+    enabled.save(str(path))
+    with open(path, encoding="utf-8") as file:
+        trace = json.load(file)
+    metadata = [event for event in trace["traceEvents"] if event["ph"] == "M"]
+    assert metadata
+    assert all(event["args"]["name"].startswith("cloudview") for event in metadata)
+    assert len(trace["traceEvents"]) == len(metadata) + len(names)
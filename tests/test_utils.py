@@ -1,10 +1,23 @@
 # pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,invalid-name
 
 from datetime import datetime
+
+import pytest
 from dateutil import tz
 from pytz import utc
 from freezegun import freeze_time
-from cloudview.utils import dateit, get_age, timeago, utc_date
+from cloudview import utils
+from cloudview.utils import (
+    DateRenderer,
+    dateit,
+    get_age,
+    parse_address,
+    parse_duration,
+    timeago,
+    utc_date,
+    load_cache,
+    save_cache,
+)
 
 
 @freeze_time("2023-07-15 10:30:00", tz_offset=0)
@@ -39,6 +52,19 @@ def test_utc_date():
         assert utc_date(date_str) == expected_date
 
 
+def test_utc_date_fallback(mocker):
+    parse = mocker.spy(utils.parser, "parse")
+    assert utc_date("2023-03-23T15:18:01Z") == datetime(
+        2023, 3, 23, 15, 18, 1, tzinfo=utc
+    )
+    parse.assert_not_called()
+
+    date = utc_date("Thu, 23 Mar 2023 15:18:01 GMT")
+    assert date == datetime(2023, 3, 23, 15, 18, 1, tzinfo=utc)
+    assert date.tzinfo is utc
+    parse.assert_called_once()
+
+
 # Test cases for the dateit function
 def test_dateit():
     # Test date formatting with the default format
@@ -57,6 +83,26 @@ def test_dateit():
     assert formatted_date == "Sunday, 10 September 2023"
 
 
+def test_date_renderer(mocker):
+    now = datetime(2023, 9, 12, 12, 0, 0, tzinfo=utc)
+    dateit_spy = mocker.spy(utils, "dateit")
+    render = DateRenderer("timeago", now=now)
+    date = datetime(2023, 9, 12, 10, 30, 0, tzinfo=utc)
+    assert render(date) == "1 hour ago"
+    assert render(datetime(2023, 9, 12, 10, 30, 0, tzinfo=utc)) == "1 hour ago"
+    assert render(datetime(2022, 9, 12, 10, 30, 0, tzinfo=utc)) == "1 year ago"
+    assert dateit_spy.call_count == 2
+
+    assert DateRenderer("age", now=now)(date) == "1h30m"
+    assert DateRenderer()(date) == "Tue Sep 12 12:30:00 CEST 2023"
+
+
+@freeze_time("2023-09-12 12:00:00 UTC")
+def test_date_renderer_now():
+    render = DateRenderer("age")
+    assert render.now == datetime(2023, 9, 12, 12, 0, 0, tzinfo=utc)
+
+
 # Test case for a date in the future (should return "in the future")
 @freeze_time("2023-09-12 12:00:00 UTC")
 def test_timeago_future_date():
@@ -111,3 +157,40 @@ def test_timeago_current_date():
     date = datetime(2023, 9, 12, 12, 0, 0, tzinfo=tz.tzutc())
     result = timeago(date)
     assert result == "0 seconds ago"
+
+
+def test_cache(cache_home):
+    assert load_cache("test.json") == (None, float("inf"))
+
+    save_cache("test.json", {"key": "value"})
+    data, age = load_cache("test.json")
+    assert data == {"key": "value"}
+    assert 0 <= age < 60
+
+    path = cache_home / "cloudview" / "test.json"
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_cache_insecure_permissions(cache_home):
+    save_cache("test.json", {"key": "value"})
+    (cache_home / "cloudview" / "test.json").chmod(0o644)
+    assert load_cache("test.json") == (None, float("inf"))
+
+
+def test_parse_address():
+    assert parse_address("9877") == ("", 9877)
+    assert parse_address(":9877") == ("", 9877)
+    assert parse_address("localhost:9877") == ("localhost", 9877)
+    assert parse_address("[::1]:9877") == ("::1", 9877)
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+
+def test_parse_duration():
+    assert parse_duration("90") == 90
+    assert parse_duration("1.5h") == 5400
+    assert parse_duration("7d") == 7 * 86400
+    assert parse_duration("2w") == 14 * 86400
+    for duration in ("", "d", "7x", "-1d", "inf"):
+        with pytest.raises(ValueError):
+            parse_duration(duration)